@@ -0,0 +1,112 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+
+import pytest
+
+import htcondor
+
+from htcondor import dags
+
+SIZES = [10, 100, 300]
+
+SUBMIT = htcondor.Submit(dict(executable="/bin/echo", arguments="$(x)", request_memory="16MB"))
+
+
+def fan_out(size: int) -> dags.DAG:
+    """One root layer with ``size`` child layers."""
+    dag = dags.DAG()
+    root = dag.layer(name="root", submit_description=SUBMIT)
+    for i in range(size):
+        root.child_layer(name="leaf{}".format(i), submit_description=SUBMIT)
+    return dag
+
+
+def chain(size: int) -> dags.DAG:
+    """A single line of ``size`` layers."""
+    dag = dags.DAG()
+    layer = dag.layer(name="layer0", submit_description=SUBMIT)
+    for i in range(1, size):
+        layer = layer.child_layer(name="layer{}".format(i), submit_description=SUBMIT)
+    return dag
+
+
+def diamond(size: int) -> dags.DAG:
+    """
+    A lattice of about ``size`` layers in rows, where each layer is a child of
+    its neighbors in the previous row.
+    """
+    width = max(int(math.sqrt(size)), 1)
+    dag = dags.DAG()
+    previous = None
+    for row in range(max(size // width, 1)):
+        current = [
+            dag.layer(name="r{}c{}".format(row, col), submit_description=SUBMIT)
+            for col in range(width)
+        ]
+        if previous is not None:
+            for col, layer in enumerate(current):
+                layer.add_parents(previous[max(col - 1, 0) : col + 2])
+        previous = current
+    return dag
+
+
+def large_vars(size: int) -> dags.DAG:
+    """A few layers with ``100 * size`` underlying nodes each."""
+    num_vars = 100 * size
+    dag = dags.DAG()
+    split = dag.layer(
+        name="split",
+        submit_description=SUBMIT,
+        vars=[{"x": str(i), "y": 'a "quoted" value'} for i in range(num_vars)],
+    )
+    process = split.child_layer(
+        name="process",
+        submit_description=SUBMIT,
+        vars=[{"x": str(i)} for i in range(num_vars)],
+        edge=dags.OneToOne(),
+    )
+    reduce = process.child_layer(
+        name="reduce",
+        submit_description=SUBMIT,
+        vars=[{"x": str(i)} for i in range(num_vars // 10)],
+        edge=dags.Grouper(10, 1),
+    )
+    reduce.child_layer(name="combine", submit_description=SUBMIT)
+    return dag
+
+
+SHAPES = {
+    "fan_out": fan_out,
+    "chain": chain,
+    "diamond": diamond,
+    "large_vars": large_vars,
+}
+
+
+@pytest.fixture(params=SIZES, ids=lambda size: "n{}".format(size))
+def size(request):
+    return request.param
+
+
+@pytest.fixture(params=list(SHAPES))
+def shape(request):
+    return SHAPES[request.param]
+
+
+@pytest.fixture
+def dag(shape, size):
+    return shape(size)
@@ -0,0 +1,53 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from htcondor import dags
+
+from .conftest import SUBMIT
+
+
+def test_build(benchmark, shape, size):
+    benchmark(shape, size)
+
+
+def build_chain_in_bulk(size):
+    dag = dags.DAG()
+    layers = dag.add_layers(
+        {"name": "layer{}".format(i), "submit_description": SUBMIT} for i in range(size)
+    )
+    dag.add_edges(zip(layers, layers[1:]))
+    return dag
+
+
+def test_build_chain_in_bulk(benchmark, size):
+    benchmark(build_chain_in_bulk, size)
+
+
+def test_remove_half_of_the_layers(benchmark, shape, size):
+    def setup():
+        dag = shape(size)
+        return (dag, list(dag.nodes)[::2]), {}
+
+    benchmark.pedantic(lambda dag, nodes: dag.remove(nodes), setup=setup, rounds=20)
+
+
+def test_transitive_reduction(benchmark, shape, size):
+    def setup():
+        dag = shape(size)
+        # add a shortcut from every root to every leaf
+        dag.add_edges((root, leaf) for root in dag.roots for leaf in dag.leaves if root != leaf)
+        return (dag,), {}
+
+    benchmark.pedantic(lambda dag: dag.transitive_reduction(), setup=setup, rounds=20)
@@ -0,0 +1,48 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+# run each import in a fresh interpreter, like a POST script would
+MODULES = ["htcondor", "htcondor.dags"]
+
+
+def run_python(code: str):
+    env = dict(os.environ)
+    env.setdefault("CONDOR_CONFIG", "/dev/null")
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_import(benchmark, module):
+    benchmark.pedantic(run_python, args=("import {}".format(module),), rounds=20)
+
+
+def test_import_and_write_dag(benchmark, tmp_path):
+    code = "\n".join(
+        (
+            "from pathlib import Path",
+            "from htcondor import dags",
+            "dag = dags.DAG()",
+            "dag.layer(name='a', submit_description=Path('a.sub'), vars=[{'x': '1'}])",
+            "dags.write_dag(dag, Path({!r}))".format(str(tmp_path)),
+        )
+    )
+
+    benchmark.pedantic(run_python, args=(code,), rounds=20)
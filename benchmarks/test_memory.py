@@ -0,0 +1,114 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import tracemalloc
+
+import pytest
+
+from htcondor import dags
+from htcondor.dags.writer import DAGWriter
+
+from .conftest import SHAPES
+
+# the maximum number of bytes per underlying node that may be allocated
+# while building (or writing) each reference shape
+BUILD_BUDGETS = {"fan_out": 1500, "chain": 1500, "diamond": 1800, "large_vars": 350}
+WRITE_BUDGETS = {"fan_out": 2000, "chain": 2000, "diamond": 2000, "large_vars": 250}
+
+
+def traced(func, *args):
+    """Call ``func`` and return its result and the peak traced memory usage."""
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+def num_underlying_nodes(dag):
+    return sum(len(n) for n in dag.nodes)
+
+
+@pytest.mark.parametrize("size", [100, 300])
+@pytest.mark.parametrize("shape_name", list(SHAPES))
+def test_build_memory_budget(record_property, shape_name, size):
+    dag, peak = traced(SHAPES[shape_name], size)
+    per_node = peak / num_underlying_nodes(dag)
+
+    record_property("peak_bytes", peak)
+    record_property("report", dag.memory_report())
+
+    assert per_node < BUILD_BUDGETS[shape_name]
+
+
+@pytest.mark.parametrize("size", [100])
+@pytest.mark.parametrize("shape_name", list(SHAPES))
+def test_write_memory_budget(record_property, tmp_path, shape_name, size):
+    dag = SHAPES[shape_name](size)
+    _, peak = traced(DAGWriter(dag).write, tmp_path)
+    per_node = peak / num_underlying_nodes(dag)
+
+    record_property("peak_bytes", peak)
+
+    assert per_node < WRITE_BUDGETS[shape_name]
+
+
+@pytest.mark.parametrize("shape_name", list(SHAPES))
+def test_memory_report_accounts_for_growth(shape_name):
+    small = SHAPES[shape_name](100).memory_report()
+    large = SHAPES[shape_name](300).memory_report()
+
+    # nothing should grow faster than the DAG itself does
+    for key in small:
+        assert large[key] <= 4 * max(small[key], 1), key
+
+
+class DictJoinNode:
+    """A JoinNode that has a __dict__ instead of __slots__."""
+
+    def __init__(self, id):
+        self.id = id
+
+
+class DictScript:
+    """A Script that has a __dict__ instead of __slots__."""
+
+    def __init__(self, executable, arguments=None):
+        self.executable = executable
+        self.arguments = [str(arg) for arg in arguments or []]
+        self.retry = False
+        self.retry_status = 1
+        self.retry_delay = 0
+
+
+@pytest.mark.parametrize(
+    "slotted, unslotted",
+    [
+        (lambda i: dags.JoinNode(i), lambda i: DictJoinNode(i)),
+        (lambda i: dags.Script("run.sh"), lambda i: DictScript("run.sh")),
+    ],
+    ids=["JoinNode", "Script"],
+)
+def test_slots_save_memory(record_property, slotted, unslotted):
+    num = 100_000
+    _, slotted_peak = traced(lambda: [slotted(i) for i in range(num)])
+    _, unslotted_peak = traced(lambda: [unslotted(i) for i in range(num)])
+
+    record_property("slotted_bytes_per_object", slotted_peak / num)
+    record_property("unslotted_bytes_per_object", unslotted_peak / num)
+
+    assert slotted_peak < 0.9 * unslotted_peak
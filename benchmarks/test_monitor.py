@@ -0,0 +1,78 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from htcondor import dags
+
+SIZES = [1000, 10000, 100000]
+
+
+@pytest.fixture(params=SIZES, ids=lambda size: f"n{size}")
+def jobstate_log(request, tmp_path):
+    path = tmp_path / "jobstate.log"
+    with path.open(mode="w") as f:
+        for i in range(request.param):
+            name = f"layer{i % 10}:{i}"
+            f.write(f"{i} {name} SUBMIT {i}.0 local - {4 * i}\n")
+            f.write(f"{i + 1} {name} EXECUTE {i}.0 local - {4 * i + 1}\n")
+            f.write(f"{i + 30} {name} JOB_TERMINATED {i}.0 local - {4 * i + 2}\n")
+            f.write(f"{i + 30} {name} JOB_SUCCESS 0 local - {4 * i + 3}\n")
+    return path
+
+
+def test_tail_jobstate_log(benchmark, jobstate_log):
+    def tail():
+        tailer = dags.JobstateLogTailer(jobstate_log)
+        tailer.poll()
+        return tailer
+
+    tailer = benchmark(tail)
+
+    assert len(tailer.in_flight) == 0
+    assert tailer.totals().failed == 0
+
+
+@pytest.fixture(params=SIZES, ids=lambda size: f"n{size}")
+def node_status_file(request, tmp_path):
+    path = tmp_path / "dagfile.dag.status"
+    with path.open(mode="w") as f:
+        f.write('[\n  Type = "DagStatus";\n  NodesTotal = {};\n]\n'.format(request.param))
+        for i in range(request.param):
+            f.write(
+                f'[\n  Type = "NodeStatus";\n  Node = "layer{i % 10}:{i}";\n'
+                f'  NodeStatus = {i % 8}; /* "STATUS" */\n  StatusDetails = "";\n'
+                f"  RetryCount = 0;\n  JobProcsQueued = 0;\n  JobProcsHeld = 0;\n]\n"
+            )
+        f.write('[\n  Type = "StatusEnd";\n  NextUpdate = 10;\n]\n')
+    return path
+
+
+def test_read_node_status_file(benchmark, node_status_file):
+    def read():
+        reader = dags.NodeStatusFileReader(node_status_file)
+        reader.poll()
+        return reader
+
+    reader = benchmark(read)
+
+    assert reader.totals().total == reader.dag_status["NodesTotal"]
+
+
+def test_poll_unchanged_node_status_file(benchmark, node_status_file):
+    reader = dags.NodeStatusFileReader(node_status_file)
+    reader.poll()
+
+    assert not benchmark(reader.poll)
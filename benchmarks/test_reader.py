@@ -0,0 +1,25 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from htcondor import dags
+
+
+def test_read_dag(benchmark, dag, tmp_path):
+    dag_file = dags.write_dag(dag, tmp_path)
+
+    read = benchmark(dags.read_dag, dag_file)
+
+    assert len(read.nodes) == len(dag.nodes)
+    benchmark.extra_info["bytes"] = dag_file.stat().st_size
@@ -0,0 +1,40 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from htcondor import dags
+from htcondor.dags.rescue import parse_rescue_file_text, apply_rescue
+
+from .conftest import large_vars
+
+
+@pytest.fixture
+def rescue_text(size):
+    header = "# Rescue DAG file\n# Total number of Nodes: {}\n\n".format(size)
+    return header + "\n".join(
+        "DONE process{}{}".format(dags.DEFAULT_SEPARATOR, i) for i in range(100 * size)
+    )
+
+
+def test_parse_rescue_file_text(benchmark, rescue_text):
+    benchmark(parse_rescue_file_text, rescue_text, dags.SimpleFormatter())
+
+
+def test_apply_rescue(benchmark, rescue_text, size):
+    dag = large_vars(size)
+    finished_nodes = parse_rescue_file_text(rescue_text, dags.SimpleFormatter())
+
+    benchmark(apply_rescue, dag, finished_nodes)
@@ -0,0 +1,25 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from htcondor import dags
+from htcondor.dags.expand import ExpandedGraph
+
+
+def test_expand(benchmark, dag):
+    benchmark(ExpandedGraph, dag)
+
+
+def test_simulate(benchmark, dag):
+    benchmark(dags.simulate, dag, slots=100, default_runtime=1, seed=0)
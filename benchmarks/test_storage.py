@@ -0,0 +1,45 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pickle
+
+from htcondor import dags
+
+
+def test_dump(benchmark, dag, tmp_path):
+    path = benchmark(dag.dump, tmp_path / "dag.bin")
+    benchmark.extra_info["bytes"] = path.stat().st_size
+
+
+def test_load(benchmark, dag, tmp_path):
+    path = dag.dump(tmp_path / "dag.bin")
+
+    loaded = benchmark(dags.DAG.load, path)
+
+    assert len(loaded.nodes) == len(dag.nodes)
+
+
+def test_load_and_materialize_vars(benchmark, dag, tmp_path):
+    path = dag.dump(tmp_path / "dag.bin")
+
+    def load():
+        loaded = dags.DAG.load(path)
+        return sum(len(n.vars) for n in loaded.nodes if isinstance(n, dags.NodeLayer))
+
+    benchmark(load)
+
+
+def test_pickle_round_trip(benchmark, dag):
+    benchmark(lambda: pickle.loads(pickle.dumps(dag)))
@@ -0,0 +1,71 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from htcondor import dags
+
+
+def test_walk_depth_first(benchmark, dag):
+    benchmark(lambda: list(dag.walk(dags.WalkOrder.DEPTH_FIRST)))
+
+
+def test_walk_breadth_first(benchmark, dag):
+    benchmark(lambda: list(dag.walk(dags.WalkOrder.BREADTH_FIRST)))
+
+
+def test_walk_descendants_of_roots(benchmark, dag):
+    benchmark(lambda: list(dag.roots.walk_descendants()))
+
+
+def test_walk_ancestors_of_leaves(benchmark, dag):
+    benchmark(lambda: list(dag.leaves.walk_ancestors()))
+
+
+def test_node_to_children(benchmark, dag):
+    benchmark(lambda: dag.node_to_children)
+
+
+def test_children_of_every_node(benchmark, dag):
+    benchmark(lambda: [n.children for n in dag.nodes])
+
+
+def test_contains_every_node(benchmark, dag):
+    nodes = list(dag.nodes)
+    benchmark(lambda: all(n in dag for n in nodes))
+
+
+def test_nodes_set_operations(benchmark, dag):
+    nodes = list(dag.nodes)
+    left = dags.Nodes(nodes[: len(nodes) // 2 + 1])
+    right = dags.Nodes(nodes[len(nodes) // 2 :])
+    benchmark(lambda: ((left | right) - (left & right)))
+
+
+def test_downstream_of_roots(benchmark, dag):
+    roots = dag.roots
+    benchmark(dag.downstream_of, roots)
+
+
+def test_build_reachability_index(benchmark, dag):
+    benchmark(dags.ReachabilityIndex, dag)
+
+
+def test_is_ancestor_for_every_edge(benchmark, dag):
+    index = dag.reachability()
+    pairs = list(dag._edges)
+    benchmark(lambda: all(index.is_ancestor(parent, child) for parent, child in pairs))
+
+
+def test_critical_path(benchmark, dag):
+    benchmark(dag.critical_path, 1)
@@ -0,0 +1,30 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from htcondor.dags.writer import DAGWriter, WriterStats
+
+
+def test_yield_dag_file_lines(benchmark, dag):
+    lines = benchmark(lambda: sum(1 for _ in DAGWriter(dag).yield_dag_file_lines()))
+    benchmark.extra_info["lines"] = lines
+
+
+def test_write(benchmark, dag, tmp_path):
+    path = benchmark(DAGWriter(dag).write, tmp_path)
+    benchmark.extra_info["bytes"] = path.stat().st_size
+
+
+def test_yield_dag_file_lines_with_stats(benchmark, dag):
+    benchmark(lambda: sum(1 for _ in DAGWriter(dag, stats=WriterStats()).yield_dag_file_lines()))
@@ -15,7 +15,6 @@
 
 import logging as _logging
 
-
 # SET UP NULL LOG HANDLER
 _logger = _logging.getLogger(__name__)
 _logger.setLevel(_logging.DEBUG)
@@ -32,16 +31,32 @@ from .node import (
     Nodes,
 )
 from .walk_order import WalkOrder
+from .reachability import ReachabilityIndex
+from .analysis import CriticalPath
 from .edges import (
     JoinNode,
     JoinFactory,
+    EdgeEstimate,
     BaseEdge,
     ManyToMany,
     OneToOne,
     Grouper,
     Slicer,
+    Window,
+    SparseEdge,
 )
-from .writer import DEFAULT_DAG_FILE_NAME, CONFIG_FILE_NAME, write_dag
+from .writer import DEFAULT_DAG_FILE_NAME, CONFIG_FILE_NAME, write_dag, WriterStats
 from .formatter import DEFAULT_SEPARATOR, NodeNameFormatter, SimpleFormatter
 from .rescue import rescue, find_rescue_file
+from .simulate import simulate, SimulationResult
+from .local import run_locally, LocalRunResult
+from .reader import read_dag
+from .monitor import (
+    JobstateLogTailer,
+    LayerProgress,
+    RuntimeHistogram,
+    NodeStatusFileReader,
+    NodeStatus,
+    LayerStatus,
+)
 from . import exceptions
@@ -0,0 +1,243 @@
+# Copyright 2020 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Optional, Dict, List, Tuple
+
+from . import dag, node, utils
+from .reachability import topological_order
+
+
+class CriticalPath:
+    """
+    The result of :meth:`DAG.critical_path`: the longest path through the DAG,
+    weighted by the expected runtimes of its nodes, and the timing of every
+    node on an unlimited (or evenly shared) pool of slots.
+
+    Every dictionary is keyed by the nodes of the DAG.
+
+    Attributes
+    ----------
+    path
+        The nodes on the critical path, from a root to a leaf.
+    length
+        The total expected runtime of the critical path (the makespan).
+    durations
+        How long each node is expected to take, from when its first
+        underlying node can start to when its last one finishes.
+    work
+        The sum of the expected runtimes of each node's underlying nodes.
+    earliest_start
+        The earliest time each node can start.
+    latest_start
+        The latest time each node can start without delaying the whole DAG.
+    slack
+        How long each node could be delayed without delaying the whole DAG
+        (``latest_start - earliest_start``). Nodes on the critical path have
+        no slack.
+    """
+
+    __slots__ = (
+        "path",
+        "length",
+        "durations",
+        "work",
+        "earliest_start",
+        "latest_start",
+        "slack",
+    )
+
+    def __init__(
+        self,
+        path: List[node.BaseNode],
+        length: float,
+        durations: Dict[node.BaseNode, float],
+        work: Dict[node.BaseNode, float],
+        earliest_start: Dict[node.BaseNode, float],
+        latest_start: Dict[node.BaseNode, float],
+    ):
+        self.path = path
+        self.length = length
+        self.durations = durations
+        self.work = work
+        self.earliest_start = earliest_start
+        self.latest_start = latest_start
+        self.slack = {n: latest_start[n] - earliest_start[n] for n in earliest_start}
+
+    def __repr__(self) -> str:
+        return utils.make_repr(self, ("length", "path"))
+
+
+def critical_path(
+    dag: "dag.DAG", default_runtime: float = 0, slots: Optional[int] = None
+) -> CriticalPath:
+    """See :meth:`DAG.critical_path`."""
+    order = topological_order(dag)
+
+    durations = {}
+    work = {}
+    for n in order:
+        durations[n], work[n] = node_duration(n, default_runtime, slots)
+
+    earliest_start = {}
+    earliest_finish = {}
+    via = {}
+    for n in order:
+        latest_parent = max(dag._edges.parents_of(n), key=earliest_finish.__getitem__, default=None)
+        if latest_parent is None:
+            earliest_start[n] = 0
+        else:
+            earliest_start[n] = earliest_finish[latest_parent]
+            via[n] = latest_parent
+        earliest_finish[n] = earliest_start[n] + durations[n]
+
+    length = max(earliest_finish.values(), default=0)
+
+    latest_start = {}
+    for n in reversed(order):
+        finish = min((latest_start[c] for c in dag._edges.children_of(n)), default=length)
+        latest_start[n] = finish - durations[n]
+
+    path = []
+    if len(order) > 0:
+        n = max(order, key=earliest_finish.__getitem__)
+        while n is not None:
+            path.append(n)
+            n = via.get(n)
+        path.reverse()
+
+    return CriticalPath(
+        path=path,
+        length=length,
+        durations=durations,
+        work=work,
+        earliest_start=earliest_start,
+        latest_start=latest_start,
+    )
+
+
+def node_duration(
+    n: node.BaseNode, default_runtime: float = 0, slots: Optional[int] = None
+) -> Tuple[float, float]:
+    """
+    Return the expected ``(duration, work)`` of the logical node ``n``:
+    how long it takes from when its first underlying node can start to when
+    its last one finishes, and the sum of the runtimes of its underlying nodes.
+
+    Underlying nodes that are marked ``noop`` or ``done`` take no time,
+    and underlying nodes without a runtime take ``default_runtime``.
+    Without ``slots``, all of the underlying nodes run at the same time;
+    with ``slots``, the duration is at least ``work / slots``.
+
+    Only the entries of the ``runtime``, ``noop``, and ``done`` dictionaries
+    are looked at, so this does not depend on the number of underlying nodes.
+    """
+    num_nodes = len(n)
+    skipped = {
+        idx
+        for flags in (n.noop, n.done)
+        for idx, flag in flags.items()
+        if flag and 0 <= idx < num_nodes
+    }
+    num_running = num_nodes - len(skipped)
+
+    runtime = n.runtime
+    if runtime is None:
+        runtime = default_runtime
+
+    if isinstance(runtime, dict):
+        given = [
+            value for idx, value in runtime.items() if 0 <= idx < num_nodes and idx not in skipped
+        ]
+        num_default = num_running - len(given)
+        total = sum(given) + default_runtime * num_default
+        if num_default > 0:
+            given.append(default_runtime)
+        longest = max(given, default=0)
+    else:
+        longest = runtime if num_running > 0 else 0
+        total = runtime * num_running
+
+    if slots is not None and slots > 0:
+        return max(longest, total / slots), total
+    return longest, total
+
+
+def remaining_path_lengths(
+    dag: "dag.DAG",
+    weighted: bool = True,
+    default_runtime: float = 0,
+    respect_categories: bool = False,
+) -> Dict[node.BaseNode, float]:
+    """
+    Return the length of the longest path from the start of each node to the
+    end of the DAG, including the node itself.
+
+    Parameters
+    ----------
+    dag
+        The DAG to measure.
+    weighted
+        If ``True``, each node counts for its duration, as in
+        :meth:`DAG.critical_path`. If ``False``, each node counts for one step,
+        so the result is the number of layers downstream of each node
+        (including itself).
+    default_runtime
+        The runtime of underlying nodes that do not have one.
+        Only used if ``weighted`` is ``True``.
+    respect_categories
+        If ``True``, nodes in a category that has a limit in the DAG's
+        ``max_jobs_per_category`` are treated as if they only had that many
+        slots: a weighted node lasts at least ``work / limit``, and an
+        unweighted node counts for one step per batch of ``limit`` underlying
+        nodes.
+    """
+    limits = dag.max_jobs_per_category if respect_categories else {}
+
+    remaining = {}
+    for n in reversed(topological_order(dag)):
+        limit = limits.get(n.category) if n.category is not None else None
+        if weighted:
+            duration, _ = node_duration(n, default_runtime, limit)
+        elif limit is not None and limit > 0:
+            duration = max(-(-len(n) // limit), 1)
+        else:
+            duration = 1
+
+        remaining[n] = duration + max((remaining[c] for c in dag._edges.children_of(n)), default=0)
+
+    return remaining
+
+
+def plan_priorities(
+    dag: "dag.DAG",
+    weighted: bool = True,
+    default_runtime: float = 0,
+    respect_categories: bool = False,
+) -> Dict[node.BaseNode, int]:
+    """
+    Rank the nodes of the ``dag`` by :func:`remaining_path_lengths`,
+    so that nodes with longer paths ahead of them get higher priorities.
+    The nodes with the shortest remaining paths get priority ``0``,
+    and each longer distinct remaining path length gets the next integer.
+    See :meth:`DAG.assign_priorities`.
+    """
+    remaining = remaining_path_lengths(
+        dag,
+        weighted=weighted,
+        default_runtime=default_runtime,
+        respect_categories=respect_categories,
+    )
+    ranks = {length: rank for rank, length in enumerate(sorted(set(remaining.values())))}
+    return {n: ranks[length] for n, length in remaining.items()}
@@ -13,16 +13,39 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Optional, Dict, Union, Any, Iterator, Callable, Tuple, Set, Mapping
+from typing import (
+    Optional,
+    Dict,
+    Union,
+    Any,
+    Iterator,
+    Callable,
+    Tuple,
+    Mapping,
+    List,
+    Iterable,
+)
 import logging
 
 import collections
+import copy
 import functools
 from pathlib import Path
 import collections.abc
 import fnmatch
-
-from . import node, edges, utils, exceptions
+import itertools
+import sys
+
+from . import (
+    node,
+    edges,
+    utils,
+    exceptions,
+    formatter,
+    reachability,
+    analysis,
+    storage,
+)
 from .walk_order import WalkOrder
 
 logger = logging.getLogger(__name__)
@@ -104,15 +127,7 @@ class NodeStatusFile:
 def _check_node_name_uniqueness(func):
     @functools.wraps(func)
     def wrapper(dag: "DAG", **kwargs):
-        name = kwargs["name"]
-        if name in dag._nodes:
-            raise exceptions.DuplicateNodeName(
-                "the DAG already has a node named {}: {}".format(name, dag._nodes[name])
-            )
-        if dag._final_node is not None and dag._final_node.name == name:
-            raise exceptions.DuplicateNodeName(
-                "the DAG already has a node named {}: {}".format(name, dag._final_node)
-            )
+        dag._check_new_node_names((kwargs["name"],))
 
         return func(dag, **kwargs)
 
@@ -162,6 +177,7 @@ class DAG:
         self._nodes = NodeStore()
         self._edges = EdgeStore()
         self._final_node = None
+        self._reachability = None
 
         self.jobstate_log = jobstate_log if jobstate_log is None else Path(jobstate_log)
         self.max_jobs_per_category = max_jobs_by_category or {}
@@ -211,7 +227,7 @@ class DAG:
             or breadth-first (siblings before parents).
         """
         yield from self._walk(
-            initial_stack=self.node_to_parents[node],
+            initial_stack=node.parents,
             add_to_stack=lambda n: n.parents,
             order=order,
         )
@@ -238,7 +254,7 @@ class DAG:
             or breadth-first (siblings before children).
         """
         yield from self._walk(
-            initial_stack=self.node_to_children[node],
+            initial_stack=node.children,
             add_to_stack=lambda n: n.children,
             order=order,
         )
@@ -311,6 +327,204 @@ class DAG:
         self._final_node = n
         return n
 
+    def add_layers(self, specs: Iterable[Mapping[str, Any]]) -> List[node.NodeLayer]:
+        """
+        Create many new :class:`NodeLayer` in the graph at once,
+        with no parents or children.
+        Each of the ``specs`` is a mapping of keyword arguments that are
+        forwarded to :class:`NodeLayer`, just like the keyword arguments of
+        :meth:`layer`.
+
+        The names of all of the new layers are checked for uniqueness in one
+        pass before any of them are added, so if any of the names is already
+        taken (or is used twice in ``specs``), the DAG is not changed.
+
+        Parameters
+        ----------
+        specs
+            The keyword arguments for each new layer.
+
+        Returns
+        -------
+        layers : List[NodeLayer]
+            The new layers, in the same order as ``specs``.
+        """
+        layers = [node.NodeLayer(dag=self, **spec) for spec in specs]
+        self._check_new_node_names([n.name for n in layers])
+        self._nodes.add(*layers)
+        return layers
+
+    def add_edges(
+        self,
+        pairs: Iterable[Tuple[node.BaseNode, node.BaseNode]],
+        edge: Optional["edges.BaseEdge"] = None,
+    ) -> None:
+        """
+        Add many edges to the graph at once.
+        This is equivalent to calling :meth:`BaseNode.add_children` for
+        each ``(parent, child)`` pair, but all of the new edges share the same
+        ``edge`` instance.
+
+        Parameters
+        ----------
+        pairs
+            The ``(parent, child)`` pairs of nodes to connect.
+        edge
+            The type of edge to use; an instance of a concrete subclass of
+            :class:`BaseEdge`. If ``None``, a single :class:`ManyToMany` edge
+            will be used for all of the pairs.
+        """
+        if edge is None:
+            edge = edges.ManyToMany()
+        self._edges.add_many(pairs, edge)
+
+    def remove(self, *nodes: node.BaseNode) -> None:
+        """
+        Remove the ``nodes`` from the DAG, along with all of the edges to and
+        from them.
+        The cost is proportional to the number of edges the ``nodes`` have,
+        not to the size of the whole DAG.
+        Nodes that are not in this DAG are ignored.
+
+        Parameters
+        ----------
+        nodes
+            The nodes to remove.
+        """
+        for n in utils.flatten(nodes):
+            if n is self._final_node:
+                self._final_node = None
+                continue
+            if n not in self._nodes:
+                continue
+
+            for child in list(self._edges.children_of(n)):
+                self._edges.pop(n, child)
+            for parent in list(self._edges.parents_of(n)):
+                self._edges.pop(parent, n)
+            self._nodes.remove(n)
+
+    def subgraph(self, *nodes: node.BaseNode) -> "DAG":
+        """
+        Return a new :class:`DAG` that contains only the ``nodes``,
+        and the edges between them.
+
+        The nodes in the new DAG are shallow copies of the original nodes:
+        their configuration (``vars``, submit descriptions, scripts, and so on)
+        is shared with the original nodes, not copied, so building a subgraph
+        only costs time proportional to its own size.
+        Changing the shared objects in place changes them in both DAGs.
+        The DAG-level configuration is copied from this DAG.
+        The ``FINAL`` node is only included if it is one of the ``nodes``.
+
+        Parameters
+        ----------
+        nodes
+            The nodes to include in the subgraph.
+        """
+        return self._subgraph(self._own_nodes(nodes))
+
+    def downstream_of(self, *nodes: node.BaseNode) -> "DAG":
+        """
+        Return a new :class:`DAG` that contains the ``nodes`` and all of their
+        descendants, and the edges between them.
+        See :meth:`subgraph` for what is shared with this DAG.
+
+        Parameters
+        ----------
+        nodes
+            The nodes to start from.
+        """
+        return self._subgraph(
+            self._reachable(self._own_nodes(nodes), self._edges.children_of)
+        )
+
+    def upstream_of(self, *nodes: node.BaseNode) -> "DAG":
+        """
+        Return a new :class:`DAG` that contains the ``nodes`` and all of their
+        ancestors, and the edges between them.
+        See :meth:`subgraph` for what is shared with this DAG.
+
+        Parameters
+        ----------
+        nodes
+            The nodes to start from.
+        """
+        return self._subgraph(
+            self._reachable(self._own_nodes(nodes), self._edges.parents_of)
+        )
+
+    def _own_nodes(self, nodes) -> Dict[node.BaseNode, None]:
+        own = {}
+        for n in utils.flatten(nodes):
+            if n is not self._final_node and n not in self._nodes:
+                raise exceptions.NodeNotInDAG("{} is not in the DAG".format(n))
+            own[n] = None
+        return own
+
+    def _reachable(
+        self,
+        start: Dict[node.BaseNode, None],
+        neighbours: Callable[[node.BaseNode], Iterable[node.BaseNode]],
+    ) -> Dict[node.BaseNode, None]:
+        reached = dict(start)
+        stack = list(start)
+        while len(stack) > 0:
+            for n in neighbours(stack.pop()):
+                if n not in reached:
+                    reached[n] = None
+                    stack.append(n)
+        return reached
+
+    def _subgraph(self, nodes: Dict[node.BaseNode, None]) -> "DAG":
+        sub = DAG(
+            dagman_config=dict(self.dagman_config),
+            dagman_job_attributes=dict(self.dagman_job_attrs),
+            max_jobs_by_category=dict(self.max_jobs_per_category),
+            dot_config=self.dot_config,
+            jobstate_log=self.jobstate_log,
+            node_status_file=self.node_status_file,
+        )
+
+        copies = {}
+        for n in nodes:
+            c = copy.copy(n)
+            c._dag = sub
+            copies[n] = c
+            if n is self._final_node:
+                sub._final_node = c
+            else:
+                sub._nodes.nodes[c.name] = c
+
+        for n, c in copies.items():
+            for child in self._edges.children_of(n):
+                if child in copies:
+                    sub._edges.add(c, copies[child], self._edges.get(n, child))
+
+        return sub
+
+    def _check_new_node_names(self, names: Iterable[str]) -> None:
+        final_name = self._final_node.name if self._final_node is not None else None
+        new_names = set()
+        for name in names:
+            if name in self._nodes:
+                raise exceptions.DuplicateNodeName(
+                    "the DAG already has a node named {}: {}".format(
+                        name, self._nodes[name]
+                    )
+                )
+            if name == final_name:
+                raise exceptions.DuplicateNodeName(
+                    "the DAG already has a node named {}: {}".format(
+                        name, self._final_node
+                    )
+                )
+            if name in new_names:
+                raise exceptions.DuplicateNodeName(
+                    "more than one new node is named {}".format(name)
+                )
+            new_names.add(name)
+
     def select(self, selector: Callable[[node.BaseNode], bool]) -> node.Nodes:
         """
         Return a :class:`Nodes` of the nodes in the DAG that satisfy ``selector``.
@@ -335,11 +549,7 @@ class DAG:
         containing its children.
         The :class:`Nodes` will be empty if the node has no children.
         """
-        d = {n: set() for n in self.nodes}
-        for parent, child in self.edges:
-            d[parent].add(child)
-
-        return {k: node.Nodes(v) for k, v in d.items()}
+        return {n: node.Nodes(self._edges.children_of(n)) for n in self._nodes}
 
     @property
     def node_to_parents(self) -> Dict[node.BaseNode, node.Nodes]:
@@ -348,11 +558,7 @@ class DAG:
         containing its parents.
         The :class:`Nodes` will be empty if the node has no parents.
         """
-        d = {n: set() for n in self.nodes}
-        for parent, child in self.edges:
-            d[child].add(parent)
-
-        return {k: node.Nodes(v) for k, v in d.items()}
+        return {n: node.Nodes(self._edges.parents_of(n)) for n in self._nodes}
 
     @property
     def nodes(self) -> node.Nodes:
@@ -408,6 +614,410 @@ class DAG:
             alignment={"Type": "ljust", "Parents": "ljust"},
         )
 
+    def validate(
+        self, node_name_formatter: Optional[formatter.NodeNameFormatter] = None
+    ) -> None:
+        """
+        Check the whole DAG for problems that would otherwise only be found
+        partway through writing it out, and raise a single
+        :class:`~exceptions.InvalidDAG` that lists all of them.
+        No edges or underlying node names are generated, so this is cheap even
+        for very large DAGs, but it can't catch everything that writing can.
+
+        The checks are:
+
+        * every edge is compatible with the layers it connects,
+          as determined by :meth:`BaseEdge.check`.
+          The built-in edges only look at the sizes of the layers, except for
+          :class:`SparseEdge`, which takes one pass over its index arrays.
+          Custom edges that don't override :meth:`BaseEdge.check`
+          are not checked;
+        * every edge connects nodes that are actually in this DAG;
+        * no two nodes (including the ``FINAL`` node) have the same name;
+        * the first and last underlying node names of every layer can be
+          formatted (for example, the layer name does not contain the
+          formatter's separator).
+          The other names are not generated, so collisions between the
+          underlying node names of different layers (possible with a custom
+          :class:`NodeNameFormatter`) are not detected;
+        * the graph has no cycles.
+
+        Parameters
+        ----------
+        node_name_formatter
+            The :class:`NodeNameFormatter` that the DAG will be written with.
+            If not provided, the default is :class:`SimpleFormatter`.
+        """
+        if node_name_formatter is None:
+            node_name_formatter = formatter.SimpleFormatter()
+
+        errors = []
+        errors.extend(self._check_node_names(node_name_formatter))
+        errors.extend(self._check_edges())
+        errors.extend(self._check_cycles())
+
+        if len(errors) > 0:
+            raise exceptions.InvalidDAG(errors)
+
+    def _check_node_names(
+        self, node_name_formatter: formatter.NodeNameFormatter
+    ) -> List[exceptions.DAGsException]:
+        errors = []
+
+        names = {}
+        for n in itertools.chain(self._nodes, (self._final_node,)):
+            if n is None:
+                continue
+            if n.name in names:
+                errors.append(
+                    exceptions.DuplicateNodeName(
+                        "the DAG has more than one node named {}: {} and {}".format(
+                            n.name, names[n.name], n
+                        )
+                    )
+                )
+            names[n.name] = n
+
+            if isinstance(n, node.FinalNode):
+                continue
+            for idx in {0, len(n) - 1}:
+                try:
+                    node_name_formatter.generate(n.name, max(idx, 0))
+                except exceptions.DAGsException as e:
+                    errors.append(e)
+                    break
+
+        return errors
+
+    def _check_edges(self) -> List[exceptions.DAGsException]:
+        errors = []
+
+        for (parent, child), edge in self._edges.items():
+            for n in (parent, child):
+                if self._nodes.nodes.get(n.name) is not n:
+                    errors.append(
+                        exceptions.NodeNotInDAG(
+                            "the edge {} from {} to {} uses {}, which is not in the DAG".format(
+                                edge, parent, child, n
+                            )
+                        )
+                    )
+            try:
+                edge.check(parent, child)
+            except exceptions.DAGsException as e:
+                errors.append(e)
+
+        return errors
+
+    def _check_cycles(self) -> List[exceptions.DAGsException]:
+        # Kahn's algorithm: whatever can't be peeled off from the roots is
+        # part of (or downstream of) a cycle
+        num_parents = collections.Counter()
+        children = collections.defaultdict(list)
+        for parent, child in self._edges:
+            num_parents[child] += 1
+            children[parent].append(child)
+
+        stack = [n for n in self._nodes if num_parents[n] == 0]
+        num_visited = 0
+        while len(stack) > 0:
+            n = stack.pop()
+            num_visited += 1
+            for c in children[n]:
+                num_parents[c] -= 1
+                if num_parents[c] == 0:
+                    stack.append(c)
+
+        if num_visited == len(self._nodes):
+            return []
+
+        stuck = sorted(n.name for n in self._nodes if num_parents[n] > 0)
+        return [
+            exceptions.CycleInDAG(
+                "the DAG has a cycle through (or downstream of) these nodes: {}".format(
+                    ", ".join(stuck)
+                )
+            )
+        ]
+
+    def memory_report(self) -> Dict[str, int]:
+        """
+        Return an approximate breakdown of how many bytes of memory the DAG
+        is using, attributed to its main consumers:
+
+        ``nodes``
+            The logical node objects themselves, not counting the entries
+            listed below.
+        ``vars``
+            The ``vars`` of every :class:`NodeLayer` (the lists, the
+            dictionaries, and their keys and values).
+        ``noop_and_done``
+            The per-node ``noop`` and ``done`` dictionaries.
+        ``edges``
+            The edge store, including its ``(parent, child)`` key tuples
+            and the edge objects.
+        ``submit_descriptions``
+            The :class:`htcondor.Submit` objects. Their contents live outside
+            of Python, so they are approximated by the length of their text.
+
+        Objects that are shared (for example, the same ``vars`` dictionary
+        used for several underlying nodes, or one submit description used
+        for several layers) are only counted once.
+        """
+        report = dict.fromkeys(
+            ("nodes", "vars", "noop_and_done", "edges", "submit_descriptions"), 0
+        )
+
+        all_nodes = list(self._nodes)
+        if self._final_node is not None:
+            all_nodes.append(self._final_node)
+
+        # the nodes themselves are counted last, so that references to them
+        # (and to the DAG) are not followed while counting everything else
+        node_ids = {id(n) for n in all_nodes}
+        seen = {id(self)} | node_ids
+
+        for n in all_nodes:
+            if isinstance(n, node.NodeLayer):
+                report["vars"] += utils.sizeof(n._vars, seen)
+            report["noop_and_done"] += utils.sizeof(n.noop, seen)
+            report["noop_and_done"] += utils.sizeof(n.done, seen)
+
+            submit_description = getattr(n, "submit_description", None)
+            if utils.is_submit(submit_description):
+                if id(submit_description) not in seen:
+                    seen.add(id(submit_description))
+                    report["submit_descriptions"] += sys.getsizeof(
+                        submit_description
+                    ) + len(str(submit_description))
+
+        report["edges"] += utils.sizeof(self._edges, seen)
+
+        seen -= node_ids
+        for n in all_nodes:
+            report["nodes"] += utils.sizeof(n, seen)
+
+        return report
+
+    def reachability(self) -> "reachability.ReachabilityIndex":
+        """
+        Return a :class:`ReachabilityIndex` for the DAG, which can quickly
+        answer whether one node is an ancestor of another,
+        and find the descendants or ancestors of many nodes at once.
+
+        The index is built the first time this method is called, and the same
+        index is returned by later calls until nodes or edges are added to or
+        removed from the DAG.
+
+        Raises :class:`~exceptions.CycleInDAG` if the DAG has a cycle.
+        """
+        version = (self._nodes.version, self._edges.version)
+        if self._reachability is None or self._reachability[0] != version:
+            self._reachability = (version, reachability.ReachabilityIndex(self))
+        return self._reachability[1]
+
+    def transitive_reduction(self) -> List[Tuple[node.BaseNode, node.BaseNode]]:
+        """
+        Remove every :class:`ManyToMany` edge whose ordering is already implied
+        by another path between the same two nodes made only of
+        :class:`ManyToMany` edges, so that the written DAG has fewer
+        ``PARENT ... CHILD ...`` lines but the same ordering between the
+        underlying nodes.
+
+        Other kinds of edges are never removed, and paths that use them (or
+        that go through an empty layer) are not considered, because they do
+        not order every underlying parent node before every underlying child
+        node.
+
+        The nodes are visited in reverse topological order, keeping a bitset
+        of the nodes reachable from each one; each node's children are
+        visited in topological order, so a child that is already reachable
+        through an earlier child is redundant.
+
+        Raises :class:`~exceptions.CycleInDAG` if the DAG has a cycle.
+
+        Returns
+        -------
+        removed : List[Tuple[BaseNode, BaseNode]]
+            The ``(parent, child)`` pairs of the edges that were removed.
+        """
+        order = reachability.topological_order(self)
+        positions = {n: idx for idx, n in enumerate(order)}
+        reachable = [0] * len(order)
+
+        removed = []
+        for idx in reversed(range(len(order))):
+            parent = order[idx]
+            children = sorted(
+                (
+                    c
+                    for c in self._edges.children_of(parent)
+                    if isinstance(self._edges.get(parent, c), edges.ManyToMany)
+                ),
+                key=positions.__getitem__,
+            )
+
+            bits = 0
+            for child in children:
+                position = positions[child]
+                if (bits >> position) & 1:
+                    removed.append((parent, child))
+                    continue
+                bits |= 1 << position
+                if len(child) > 0:
+                    bits |= reachable[position]
+            reachable[idx] = bits
+
+        for parent, child in removed:
+            self._edges.pop(parent, child)
+
+        return removed
+
+    def critical_path(
+        self, default_runtime: float = 0, slots: Optional[int] = None
+    ) -> "analysis.CriticalPath":
+        """
+        Find the longest path through the DAG, weighted by the expected
+        ``runtime`` of each node, along with the earliest and latest start
+        times and the slack of every node.
+        This takes one pass over the logical nodes and edges in each
+        direction, so it is cheap even for very large layers.
+
+        Each layer is treated as a block: it starts when all of its parents
+        have finished, and it lasts as long as its slowest underlying node
+        (underlying nodes marked ``noop`` or ``done`` take no time).
+        If ``slots`` is given, a layer also lasts at least as long as it would
+        take to run all of its underlying nodes on that many slots.
+        Edges that let some underlying nodes start early (like
+        :class:`OneToOne`) are not taken into account, so the result is
+        conservative for them.
+        The ``FINAL`` node is not included.
+
+        Raises :class:`~exceptions.CycleInDAG` if the DAG has a cycle.
+
+        Parameters
+        ----------
+        default_runtime
+            The runtime of underlying nodes that do not have one.
+        slots
+            The number of underlying nodes that can run at the same time.
+            If ``None``, there is no limit.
+
+        Returns
+        -------
+        critical_path : :class:`CriticalPath`
+        """
+        return analysis.critical_path(
+            self, default_runtime=default_runtime, slots=slots
+        )
+
+    def assign_priorities(
+        self,
+        weighted: bool = True,
+        default_runtime: float = 0,
+        respect_categories: bool = False,
+    ) -> Dict[node.BaseNode, int]:
+        """
+        Set the ``priority`` of every node in the DAG (except the ``FINAL``
+        node) so that DAGMan submits nodes with more work ahead of them
+        before nodes with less, which shortens the DAG's overall runtime when
+        there are more ready nodes than slots to run them on.
+
+        Nodes are ranked by the longest path from their start to the end of
+        the DAG (see :meth:`critical_path`); the nodes with the shortest
+        remaining paths get priority ``0`` (which is not written to the DAG
+        file), and each longer distinct remaining path gets the next integer.
+        Any existing priorities are overwritten.
+
+        Raises :class:`~exceptions.CycleInDAG` if the DAG has a cycle.
+
+        Parameters
+        ----------
+        weighted
+            If ``True``, paths are weighted by the expected ``runtime`` of
+            their nodes. If ``False``, every node counts the same, so nodes
+            are ranked by how many layers are downstream of them.
+        default_runtime
+            The runtime of underlying nodes that do not have one.
+        respect_categories
+            If ``True``, nodes in a category that is limited by
+            ``max_jobs_by_category`` are treated as if they could only use
+            that many slots, which makes throttled layers (and the nodes
+            upstream of them) more urgent.
+
+        Returns
+        -------
+        priorities : Dict[BaseNode, int]
+            The priority that was assigned to each node.
+        """
+        priorities = analysis.plan_priorities(
+            self,
+            weighted=weighted,
+            default_runtime=default_runtime,
+            respect_categories=respect_categories,
+        )
+        for n, priority in priorities.items():
+            n.priority = priority
+        return priorities
+
+    def estimate(self) -> "edges.EdgeEstimate":
+        """
+        Estimate how many ``PARENT ... CHILD ...`` lines, join nodes, and
+        node names the edges in the DAG will produce when it is written out,
+        by adding up :meth:`BaseEdge.estimate` for every edge.
+        Nothing is actually generated, and the ``vars`` of the layers are
+        never looked at (only their lengths are used).
+
+        Incompatible edges raise the same exceptions that writing the DAG would.
+        """
+        return sum(
+            (
+                edge.estimate(parent, child)
+                for (parent, child), edge in self._edges.items()
+            ),
+            edges.EdgeEstimate(),
+        )
+
+    def dump(self, path: Path) -> Path:
+        """
+        Store the DAG in a compact binary file, so that it can be read back
+        with :meth:`DAG.load` much faster than it could be built again.
+        Everything about the DAG is stored, except for objects that are not
+        part of this package (other than :class:`htcondor.Submit`).
+
+        Parameters
+        ----------
+        path
+            The path to write the file to.
+
+        Returns
+        -------
+        path : :class:`pathlib.Path`
+            The path the file was written to.
+        """
+        return storage.dump(self, path)
+
+    @staticmethod
+    def load(path: Path) -> "DAG":
+        """
+        Read a DAG stored by :meth:`DAG.dump`.
+
+        The file is memory-mapped and only its header is read up front;
+        the ``vars`` of each :class:`NodeLayer` are only decoded when they are
+        first used.
+
+        Parameters
+        ----------
+        path
+            The path to the file to read.
+
+        Returns
+        -------
+        dag : :class:`DAG`
+            The stored DAG.
+        """
+        return storage.load(path)
+
 
 class EdgeStore:
     """
@@ -418,6 +1028,13 @@ class EdgeStore:
 
     def __init__(self):
         self.edges = {}
+        # incremented on every change, so that derived data can tell if it is stale
+        self.version = 0
+        # adjacency index, so that the edges of a single node can be found
+        # without looking at all of them; the inner dictionaries are used
+        # as insertion-ordered sets
+        self.children = {}
+        self.parents = {}
 
     def __iter__(self) -> Iterator[edges.BaseEdge]:
         yield from self.edges
@@ -438,6 +1055,12 @@ class EdgeStore:
         except KeyError:
             return None
 
+    def children_of(self, parent: node.BaseNode) -> Iterable[node.BaseNode]:
+        return self.children.get(parent, {}).keys()
+
+    def parents_of(self, child: node.BaseNode) -> Iterable[node.BaseNode]:
+        return self.parents.get(child, {}).keys()
+
     def add(
         self,
         parent: node.BaseNode,
@@ -447,11 +1070,44 @@ class EdgeStore:
         if edge is None:
             edge = edges.ManyToMany()
         self.edges[(parent, child)] = edge
+        self.version += 1
+        self.children.setdefault(parent, {})[child] = None
+        self.parents.setdefault(child, {})[parent] = None
+
+    def add_many(
+        self,
+        pairs: Iterable[Tuple[node.BaseNode, node.BaseNode]],
+        edge: edges.BaseEdge,
+    ) -> None:
+        self.version += 1
+        all_edges, children, parents = self.edges, self.children, self.parents
+        for parent, child in pairs:
+            all_edges[(parent, child)] = edge
+            try:
+                children[parent][child] = None
+            except KeyError:
+                children[parent] = {child: None}
+            try:
+                parents[child][parent] = None
+            except KeyError:
+                parents[child] = {parent: None}
 
     def pop(
         self, parent: node.BaseNode, child: node.BaseNode
     ) -> Optional[edges.BaseEdge]:
-        return self.edges.pop((parent, child), None)
+        edge = self.edges.pop((parent, child), None)
+        if edge is not None:
+            self.version += 1
+            self._unindex(self.children, parent, child)
+            self._unindex(self.parents, child, parent)
+        return edge
+
+    @staticmethod
+    def _unindex(index, key: node.BaseNode, other: node.BaseNode) -> None:
+        neighbours = index[key]
+        del neighbours[other]
+        if len(neighbours) == 0:
+            del index[key]
 
 
 class NodeStore:
@@ -466,22 +1122,25 @@ class NodeStore:
 
     def __init__(self):
         self.nodes = {}
+        self.version = 0
 
     def add(self, *nodes: node.BaseNode) -> None:
+        self.version += 1
         for n in nodes:
             if isinstance(n, node.BaseNode):
                 self.nodes[n.name] = n
             elif isinstance(n, node.Nodes):
-                self.add(self, n)
+                self.nodes.update(n.nodes.nodes)
 
     def remove(self, *nodes: node.BaseNode) -> None:
+        self.version += 1
         for n in nodes:
             if isinstance(n, str):
                 self.nodes.pop(n, None)
             elif isinstance(n, node.BaseNode):
                 self.nodes.pop(n.name, None)
             elif isinstance(n, node.Nodes):
-                self.remove(n)
+                self.remove(*n.nodes.nodes.keys())
 
     def __getitem__(self, n: Union[node.BaseNode, str]) -> node.BaseNode:
         if isinstance(n, str):
@@ -496,9 +1155,11 @@ class NodeStore:
 
     def __contains__(self, n: Union[node.BaseNode, str]) -> bool:
         if isinstance(n, node.BaseNode):
-            return n in self.nodes.values()
+            # any node equal to n has the same name, so it can only be stored there
+            stored = self.nodes.get(n.name)
+            return stored is not None and (stored is n or stored == n)
         elif isinstance(n, str):
-            return n in self.nodes.keys()
+            return n in self.nodes
         return False
 
     def items(self) -> Iterator[Tuple[str, node.BaseNode]]:
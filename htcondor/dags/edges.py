@@ -13,36 +13,122 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Tuple, Iterable, Union
+from typing import Tuple, Iterable, Iterator, Union, Optional, Sequence, List
 
 import abc
+import array
 import itertools
 
 from . import node, utils, exceptions
 
 
-class JoinNode:
-    def __init__(self, id: int):
-        self.id = id
+class JoinNode(int):
+    """
+    A join node, identified by a plain integer ID.
+    Join nodes are only created by :meth:`JoinFactory.get_join_node`.
+    """
+
+    __slots__ = ()
+
+    @property
+    def id(self) -> int:
+        return int(self)
+
+    def __repr__(self) -> str:
+        return "{}({})".format(type(self).__name__, int(self))
 
 
 class JoinFactory:
+    """
+    Hands out join nodes with sequential IDs.
+    It only keeps track of how many join nodes it has handed out
+    (the join nodes are ``JoinNode(0)`` through ``JoinNode(count - 1)``),
+    not the join nodes themselves.
+    """
+
+    __slots__ = ("count",)
+
     def __init__(self):
-        self.id_generator = itertools.count(0)
-        self.joins = []
+        self.count = 0
 
     def get_join_node(self) -> JoinNode:
-        j = JoinNode(next(self.id_generator))
-        self.joins.append(j)
+        j = JoinNode(self.count)
+        self.count += 1
         return j
 
 
+class EdgeEstimate:
+    """
+    The cost of writing out an edge (or a whole DAG's worth of edges),
+    as computed by :meth:`BaseEdge.estimate`.
+    Estimates can be added together.
+    """
+
+    __slots__ = ("lines", "joins", "names")
+
+    def __init__(self, lines: int = 0, joins: int = 0, names: int = 0):
+        """
+        Parameters
+        ----------
+        lines
+            The number of ``PARENT ... CHILD ...`` lines.
+        joins
+            The number of join nodes
+            (each of which is also written out as a ``JOB`` line).
+        names
+            The total number of node names in the ``PARENT ... CHILD ...`` lines.
+        """
+        self.lines = lines
+        self.joins = joins
+        self.names = names
+
+    def __add__(self, other: "EdgeEstimate") -> "EdgeEstimate":
+        if not isinstance(other, EdgeEstimate):
+            return NotImplemented
+        return EdgeEstimate(
+            lines=self.lines + other.lines,
+            joins=self.joins + other.joins,
+            names=self.names + other.names,
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, EdgeEstimate):
+            return NotImplemented
+        return (self.lines, self.joins, self.names) == (
+            other.lines,
+            other.joins,
+            other.names,
+        )
+
+    def __repr__(self) -> str:
+        return utils.make_repr(self, ("lines", "joins", "names"))
+
+
+def _group_estimate(
+    num_parents: int, num_children: int, count: int = 1
+) -> EdgeEstimate:
+    """
+    The estimate for ``count`` groups of parent and child nodes that are
+    connected through a join node unless either side has a single node.
+    """
+    if num_parents == 1 or num_children == 1:
+        return EdgeEstimate(
+            lines=count, joins=0, names=count * (num_parents + num_children)
+        )
+    return EdgeEstimate(
+        lines=2 * count, joins=count, names=count * (num_parents + num_children + 2)
+    )
+
+
 class BaseEdge(abc.ABC):
     """
     An abstract class that represents the edge between two logical nodes
     in the DAG.
     """
 
+    # subclasses that do not define __slots__ themselves get a __dict__ as usual
+    __slots__ = ()
+
     @abc.abstractmethod
     def get_edges(
         self, parent: "node.BaseNode", child: "node.BaseNode", join_factory: JoinFactory
@@ -93,6 +179,58 @@ class BaseEdge(abc.ABC):
         """
         raise NotImplementedError
 
+    def estimate(self, parent: "node.BaseNode", child: "node.BaseNode") -> EdgeEstimate:
+        """
+        Estimate how many lines, join nodes, and node names the writer will
+        produce for this edge between the ``parent`` and ``child``,
+        without writing anything.
+
+        The default implementation simply counts the edge specifications
+        produced by :meth:`get_edges`, so it takes as long as generating the
+        edges does. Concrete edges should override it with a closed-form
+        calculation where possible.
+        Incompatible layers raise the same exceptions as :meth:`get_edges`.
+
+        Parameters
+        ----------
+        parent
+            The parent, a concrete subclass of :class:`BaseNode`.
+        child
+            The child, a concrete subclass of :class:`BaseNode`.
+
+        Returns
+        -------
+        estimate : :class:`EdgeEstimate`
+        """
+        join_factory = JoinFactory()
+        lines = names = 0
+        for p, c in self.get_edges(parent, child, join_factory):
+            lines += 1
+            names += (1 if isinstance(p, JoinNode) else len(p)) + (
+                1 if isinstance(c, JoinNode) else len(c)
+            )
+        return EdgeEstimate(lines=lines, joins=join_factory.count, names=names)
+
+    def check(self, parent: "node.BaseNode", child: "node.BaseNode") -> None:
+        """
+        Raise the exception that :meth:`get_edges` would raise if this edge
+        cannot connect the ``parent`` and ``child``, without generating any
+        edges.
+        This is what :meth:`DAG.validate` uses to check edges.
+
+        The default implementation does nothing, so edges that don't override
+        it are assumed to be compatible with any layers.
+        Concrete edges should override it with a check on the sizes of the
+        layers where possible.
+
+        Parameters
+        ----------
+        parent
+            The parent, a concrete subclass of :class:`BaseNode`.
+        child
+            The child, a concrete subclass of :class:`BaseNode`.
+        """
+
     def __repr__(self) -> str:
         return self.__class__.__name__
 
@@ -103,6 +241,8 @@ class ManyToMany(BaseEdge):
     is a child of every node in the parent layer.
     """
 
+    __slots__ = ()
+
     def get_edges(
         self, parent: "node.BaseNode", child: "node.BaseNode", join_factory: JoinFactory
     ) -> Iterable[
@@ -124,6 +264,9 @@ class ManyToMany(BaseEdge):
             yield tuple(range(num_parent_vars)), join
             yield join, tuple(range(num_child_vars))
 
+    def estimate(self, parent: "node.BaseNode", child: "node.BaseNode") -> EdgeEstimate:
+        return _group_estimate(len(parent), len(child))
+
 
 class OneToOne(BaseEdge):
     """
@@ -133,6 +276,8 @@ class OneToOne(BaseEdge):
     The parent and child layers must have the same number of underlying nodes.
     """
 
+    __slots__ = ()
+
     def get_edges(
         self, parent: "node.BaseNode", child: "node.BaseNode", join_factory: JoinFactory
     ) -> Iterable[
@@ -142,6 +287,19 @@ class OneToOne(BaseEdge):
             Tuple[JoinNode, Tuple[int]],
         ]
     ]:
+        num_vars = self._check_sizes(parent, child)
+
+        yield from (((i,), (i,)) for i in range(num_vars))
+
+    def estimate(self, parent: "node.BaseNode", child: "node.BaseNode") -> EdgeEstimate:
+        num_vars = self._check_sizes(parent, child)
+
+        return EdgeEstimate(lines=num_vars, joins=0, names=2 * num_vars)
+
+    def check(self, parent: "node.BaseNode", child: "node.BaseNode") -> None:
+        self._check_sizes(parent, child)
+
+    def _check_sizes(self, parent: "node.BaseNode", child: "node.BaseNode") -> int:
         num_parent_vars = len(parent)
         num_child_vars = len(child)
 
@@ -152,7 +310,7 @@ class OneToOne(BaseEdge):
                 )
             )
 
-        yield from (((i,), (i,)) for i in range(num_parent_vars))
+        return num_parent_vars
 
 
 class Grouper(BaseEdge):
@@ -161,15 +319,36 @@ class Grouper(BaseEdge):
     divided into chunks based on their respective chunk sizes (given in the
     constructor). Chunks are then connected like a :class:`OneToOne` edge.
 
-    The number of chunks in each layer must be the same, and each layer must be
-    evenly-divided into chunks (no leftover underlying nodes).
+    The number of chunks in each layer must be the same.
+    By default, each layer must be evenly-divided into chunks
+    (no leftover underlying nodes). If ``ragged`` is ``True``, the last chunk
+    in each layer may be smaller than the others instead.
+    Chunks can also be given explicitly as boundary indices, in which case
+    they may have any sizes at all.
 
+    Chunks are connected through a join node only when both chunks have more
+    than one node in them; otherwise the chunks are connected directly.
     When both chunk sizes are ``1`` this is identical to a :class:`OneToOne`
-    edge, and you should use that edge instead because it produces a more
-    compact representation.
+    edge.
     """
 
-    def __init__(self, parent_chunk_size: int = 1, child_chunk_size: int = 1):
+    __slots__ = (
+        "parent_chunk_size",
+        "child_chunk_size",
+        "ragged",
+        "parent_boundaries",
+        "child_boundaries",
+    )
+
+    def __init__(
+        self,
+        parent_chunk_size: int = 1,
+        child_chunk_size: int = 1,
+        *,
+        ragged: bool = False,
+        parent_boundaries: Optional[Sequence[int]] = None,
+        child_boundaries: Optional[Sequence[int]] = None
+    ):
         """
         Parameters
         ----------
@@ -177,9 +356,24 @@ class Grouper(BaseEdge):
             The number of nodes in each chunk in the parent layer.
         child_chunk_size
             The number of nodes in each chunk in the child layer.
+        ragged
+            If ``True``, the last chunk in each layer may have fewer nodes
+            than the chunk size.
+        parent_boundaries
+            The indices in the parent layer where new chunks begin,
+            in increasing order (like :func:`numpy.split`).
+            For example, ``[2, 5]`` splits a parent layer with seven nodes into
+            chunks ``0-1``, ``2-4``, and ``5-6``.
+            If given, ``parent_chunk_size`` is ignored.
+        child_boundaries
+            The indices in the child layer where new chunks begin.
+            If given, ``child_chunk_size`` is ignored.
         """
         self.parent_chunk_size = parent_chunk_size
         self.child_chunk_size = child_chunk_size
+        self.ragged = ragged
+        self.parent_boundaries = parent_boundaries
+        self.child_boundaries = child_boundaries
 
     def get_edges(
         self, parent: "node.BaseNode", child: "node.BaseNode", join_factory: JoinFactory
@@ -190,48 +384,126 @@ class Grouper(BaseEdge):
             Tuple[JoinNode, Tuple[int]],
         ]
     ]:
-        num_parent_vars = len(parent)
-        num_child_vars = len(child)
+        parent_runs, child_runs = self._check_chunks(parent, child)
 
-        if num_parent_vars % self.parent_chunk_size != 0:
-            raise exceptions.IncompatibleGrouper(
-                "Cannot apply edge {} to parent layer {} because number of real parent nodes ({}) is not evenly divisible by the parent chunk size ({})".format(
-                    self, parent, len(parent), self.parent_chunk_size
-                )
-            )
-        if num_child_vars % self.child_chunk_size != 0:
-            raise exceptions.IncompatibleGrouper(
-                "Cannot apply edge {} to child layer {} because number of real child nodes ({}) is not evenly divisible by the child chunk size ({})".format(
-                    self, child, len(child), self.child_chunk_size
-                )
-            )
-        if (num_parent_vars // self.parent_chunk_size) != (
-            num_child_vars // self.child_chunk_size
+        for parent_chunk, child_chunk in zip(
+            self._chunks(parent_runs), self._chunks(child_runs)
         ):
+            parent_group = tuple(parent_chunk)
+            child_group = tuple(child_chunk)
+            if len(parent_group) == 1 or len(child_group) == 1:
+                yield parent_group, child_group
+            else:
+                join = join_factory.get_join_node()
+                yield parent_group, join
+                yield join, child_group
+
+    def estimate(self, parent: "node.BaseNode", child: "node.BaseNode") -> EdgeEstimate:
+        parent_runs, child_runs = self._check_chunks(parent, child)
+
+        # walk both run-length lists at once, so that evenly-divided layers
+        # only take a couple of steps no matter how many chunks they have
+        estimate = EdgeEstimate()
+        parent_runs, child_runs = list(parent_runs), list(child_runs)
+        p = c = 0
+        while p < len(parent_runs) and c < len(child_runs):
+            parent_length, parent_count = parent_runs[p]
+            child_length, child_count = child_runs[c]
+            count = min(parent_count, child_count)
+
+            estimate += _group_estimate(parent_length, child_length, count)
+
+            parent_runs[p] = (parent_length, parent_count - count)
+            child_runs[c] = (child_length, child_count - count)
+            if parent_runs[p][1] == 0:
+                p += 1
+            if child_runs[c][1] == 0:
+                c += 1
+
+        return estimate
+
+    def check(self, parent: "node.BaseNode", child: "node.BaseNode") -> None:
+        self._check_chunks(parent, child)
+
+    def _check_chunks(
+        self, parent: "node.BaseNode", child: "node.BaseNode"
+    ) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+        parent_runs = self._chunk_runs(
+            "parent", parent, self.parent_chunk_size, self.parent_boundaries
+        )
+        child_runs = self._chunk_runs(
+            "child", child, self.child_chunk_size, self.child_boundaries
+        )
+
+        num_parent_chunks = sum(count for _, count in parent_runs)
+        num_child_chunks = sum(count for _, count in child_runs)
+        if num_parent_chunks != num_child_chunks:
             raise exceptions.IncompatibleGrouper(
-                "Cannot apply edge {} to layers {} and {} because they do not produce the same number of chunks (parent chunk: {} / {} = {}, child chunk: {} / {} = {})".format(
+                "Cannot apply edge {} to layers {} and {} because they do not produce the same number of chunks (parent: {} nodes in {} chunks, child: {} nodes in {} chunks)".format(
                     self,
                     parent,
                     child,
                     len(parent),
-                    self.parent_chunk_size,
-                    len(parent) // self.parent_chunk_size,
+                    num_parent_chunks,
                     len(child),
-                    self.child_chunk_size,
-                    len(child) // self.child_chunk_size,
+                    num_child_chunks,
                 )
             )
 
-        for parent_group, child_group in zip(
-            utils.grouper(range(num_parent_vars), self.parent_chunk_size),
-            utils.grouper(range(num_child_vars), self.child_chunk_size),
-        ):
-            join = join_factory.get_join_node()
-            yield parent_group, join
-            yield join, child_group
+        return parent_runs, child_runs
+
+    def _chunk_runs(
+        self,
+        which: str,
+        layer: "node.BaseNode",
+        chunk_size: int,
+        boundaries: Optional[Sequence[int]],
+    ) -> List[Tuple[int, int]]:
+        """
+        Divide the layer into chunks, returned as a run-length encoded list of
+        ``(chunk length, number of chunks)`` pairs.
+        """
+        num_vars = len(layer)
+
+        if boundaries is not None:
+            starts = [0, *boundaries]
+            stops = [*boundaries, num_vars]
+            if any(start >= stop for start, stop in zip(starts, stops)):
+                raise exceptions.IncompatibleGrouper(
+                    "Cannot apply edge {} to {} layer {} because the {} boundaries ({}) are not strictly increasing indices between 0 and the number of real {} nodes ({})".format(
+                        self, which, layer, which, list(boundaries), which, num_vars
+                    )
+                )
+            return [(stop - start, 1) for start, stop in zip(starts, stops)]
+
+        if num_vars % chunk_size != 0 and not self.ragged:
+            raise exceptions.IncompatibleGrouper(
+                "Cannot apply edge {} to {} layer {} because number of real {} nodes ({}) is not evenly divisible by the {} chunk size ({})".format(
+                    self, which, layer, which, num_vars, which, chunk_size
+                )
+            )
+
+        runs = [(chunk_size, num_vars // chunk_size)]
+        if num_vars % chunk_size != 0:
+            runs.append((num_vars % chunk_size, 1))
+        return runs
+
+    def _chunks(self, runs: List[Tuple[int, int]]) -> Iterator[range]:
+        start = 0
+        for length, count in runs:
+            for _ in range(count):
+                yield range(start, start + length)
+                start += length
 
     def __repr__(self) -> str:
-        return utils.make_repr(self, ("parent_chunk_size", "child_chunk_size"))
+        attrs = ["parent_chunk_size", "child_chunk_size"]
+        if self.ragged:
+            attrs.append("ragged")
+        if self.parent_boundaries is not None:
+            attrs.append("parent_boundaries")
+        if self.child_boundaries is not None:
+            attrs.append("child_boundaries")
+        return utils.make_repr(self, attrs)
 
 
 class Slicer(BaseEdge):
@@ -242,6 +514,8 @@ class Slicer(BaseEdge):
     slice.
     """
 
+    __slots__ = ("parent_slice", "child_slice")
+
     def __init__(
         self, parent_slice: slice = slice(None), child_slice: slice = slice(None)
     ):
@@ -284,5 +558,492 @@ class Slicer(BaseEdge):
         ):
             yield (parent_index,), (child_index,)
 
+    def estimate(self, parent: "node.BaseNode", child: "node.BaseNode") -> EdgeEstimate:
+        num_edges = min(
+            _islice_length(len(parent), self.parent_slice),
+            _islice_length(len(child), self.child_slice),
+        )
+
+        return EdgeEstimate(lines=num_edges, joins=0, names=2 * num_edges)
+
+    def check(self, parent: "node.BaseNode", child: "node.BaseNode") -> None:
+        _islice_length(len(parent), self.parent_slice)
+        _islice_length(len(child), self.child_slice)
+
     def __repr__(self) -> str:
         return utils.make_repr(self, ("parent_slice", "child_slice"))
+
+
+def _islice_length(length: int, s: slice) -> int:
+    """The number of items that :func:`itertools.islice` takes from ``range(length)``."""
+    # islice rejects negative and zero-step slices, so reject them the same way
+    itertools.islice((), s.start, s.stop, s.step)
+
+    start = s.start or 0
+    stop = length if s.stop is None else min(s.stop, length)
+    step = s.step or 1
+    return len(range(start, stop, step))
+
+
+class Window(BaseEdge):
+    """
+    This edge connects each node in the child layer to a "window" of nodes
+    in the parent layer, centered on the parent node with the same index.
+    Child node ``i`` is a child of parent nodes ``i - before`` through
+    ``i + after`` (inclusive); indices that fall outside the parent layer
+    are dropped.
+
+    Neighboring windows overlap heavily, so by default the child layer is
+    split into blocks that share their common parents through a join node.
+    The block size is picked to minimize the number of bytes written out,
+    counting each join node's own ``JOB`` line and the extra ``PARENT`` lines
+    it needs, and a join is only used for a block when that is actually
+    smaller than connecting each child directly.
+    Narrow windows are usually cheaper without any joins at all.
+    """
+
+    __slots__ = ("before", "after", "compress")
+
+    def __init__(self, before: int = 1, after: int = 1, compress: bool = True):
+        """
+        Parameters
+        ----------
+        before
+            The number of parent nodes before the center of each window.
+        after
+            The number of parent nodes after the center of each window.
+        compress
+            If ``True``, overlapping windows will share join nodes where that
+            makes the representation more compact.
+            If ``False``, each child node gets its own ``PARENT`` line.
+        """
+        if before < 0 or after < 0:
+            raise ValueError("Window sizes must be non-negative")
+
+        self.before = before
+        self.after = after
+        self.compress = compress
+
+    @property
+    def width(self) -> int:
+        """The number of parent nodes in an un-clipped window."""
+        return self.before + self.after + 1
+
+    def window(self, child_index: int, num_parent_vars: int) -> Tuple[int, int]:
+        """
+        Return the half-open range ``(start, stop)`` of parent indices in the
+        window for the child node at ``child_index``.
+        The range is empty (``start >= stop``) if the window lies entirely
+        outside of the parent layer.
+        """
+        return (
+            max(child_index - self.before, 0),
+            min(child_index + self.after + 1, num_parent_vars),
+        )
+
+    def block_size(
+        self, parent_name_length: int = 8, child_name_length: int = 8, join_name_length: int = 10
+    ) -> int:
+        """
+        The number of consecutive child nodes that share a join node.
+        A block of ``B`` children has ``width - B + 1`` parents in common,
+        and each child in the block has ``B - 1`` parents of its own.
+
+        The block size is picked to minimize the number of bytes written for a
+        block in the middle of the layers, counting the join node's own ``JOB``
+        line and the extra ``PARENT`` lines it needs.
+        If no block is smaller than connecting each child directly,
+        the block size is ``1`` (no join nodes are used).
+
+        Parameters
+        ----------
+        parent_name_length
+            The typical length of a node name in the parent layer.
+        child_name_length
+            The typical length of a node name in the child layer.
+        join_name_length
+            The typical length of a join node name.
+        """
+        p, c, j = parent_name_length, child_name_length, join_name_length
+
+        best_size, best_cost = 1, _line_bytes(self.width * p, self.width, c, 1)
+        for size in range(2, self.width + 1):
+            common = self.width - size + 1
+            cost = (
+                _join_job_bytes(j)
+                + _line_bytes(common * p, common, j, 1)
+                + _line_bytes(j, 1, size * c, size)
+                + size * _line_bytes((size - 1) * p, size - 1, c, 1)
+            ) / size
+            if cost < best_cost:
+                best_size, best_cost = size, cost
+        return best_size
+
+    def _layer_block_size(
+        self, parent: "node.BaseNode", child: "node.BaseNode", join_factory: JoinFactory
+    ) -> int:
+        """The block size to use between the ``parent`` and ``child`` layers."""
+        if not self.compress:
+            return 1
+        return self.block_size(
+            len(parent.name) + 1 + len(str(max(len(parent) - 1, 0))),
+            len(child.name) + 1 + len(str(max(len(child) - 1, 0))),
+            _join_name_length(join_factory),
+        )
+
+    def get_edges(
+        self, parent: "node.BaseNode", child: "node.BaseNode", join_factory: JoinFactory
+    ) -> Iterable[
+        Union[
+            Tuple[Tuple[int], Tuple[int]],
+            Tuple[Tuple[int], JoinNode],
+            Tuple[JoinNode, Tuple[int]],
+        ]
+    ]:
+        num_parent_vars = len(parent)
+        num_child_vars = len(child)
+
+        # node names are assumed to look like the default formatter's,
+        # "{layer name}:{index}", when deciding whether a join is worth it
+        parent_prefix = len(parent.name) + 1
+        child_prefix = len(child.name) + 1
+
+        block_size = self._layer_block_size(parent, child, join_factory)
+
+        for block_start in range(0, num_child_vars, block_size):
+            windows = [
+                (child_index, self.window(child_index, num_parent_vars))
+                for child_index in range(
+                    block_start, min(block_start + block_size, num_child_vars)
+                )
+            ]
+            windows = [(c, (start, stop)) for c, (start, stop) in windows if start < stop]
+            if len(windows) == 0:
+                continue
+
+            common_start = max(start for _, (start, _) in windows)
+            common_stop = min(stop for _, (_, stop) in windows)
+            num_common = common_stop - common_start
+
+            if len(windows) == 1 or num_common <= 0:
+                for c, (start, stop) in windows:
+                    yield tuple(range(start, stop)), (c,)
+                continue
+
+            extras = [
+                (c, tuple(itertools.chain(range(start, common_start), range(common_stop, stop))))
+                for c, (start, stop) in windows
+            ]
+
+            # only use a join if it actually makes the written DAG smaller
+            join_name_length = _join_name_length(join_factory)
+            direct_cost = sum(
+                _line_bytes(
+                    _names_length(parent_prefix, range(start, stop)),
+                    stop - start,
+                    _names_length(child_prefix, (c,)),
+                    1,
+                )
+                for c, (start, stop) in windows
+            )
+            join_cost = (
+                _join_job_bytes(join_name_length)
+                + _line_bytes(
+                    _names_length(parent_prefix, range(common_start, common_stop)),
+                    num_common,
+                    join_name_length,
+                    1,
+                )
+                + _line_bytes(
+                    join_name_length,
+                    1,
+                    _names_length(child_prefix, (c for c, _ in windows)),
+                    len(windows),
+                )
+                + sum(
+                    _line_bytes(
+                        _names_length(parent_prefix, extra),
+                        len(extra),
+                        _names_length(child_prefix, (c,)),
+                        1,
+                    )
+                    for c, extra in extras
+                    if len(extra) > 0
+                )
+            )
+
+            if join_cost >= direct_cost:
+                for c, (start, stop) in windows:
+                    yield tuple(range(start, stop)), (c,)
+                continue
+
+            join = join_factory.get_join_node()
+            yield tuple(range(common_start, common_stop)), join
+            yield join, tuple(c for c, _ in windows)
+
+            for c, extra in extras:
+                if len(extra) > 0:
+                    yield extra, (c,)
+
+    def __repr__(self) -> str:
+        return utils.make_repr(self, ("before", "after", "compress"))
+
+
+def _line_bytes(
+    parent_names_length: int, num_parents: int, child_names_length: int, num_children: int
+) -> int:
+    """
+    The length of a ``PARENT ... CHILD ...`` line,
+    given the total length and number of the names on each side.
+    """
+    # "PARENT " + space-separated parents + " CHILD " + space-separated children + "\n"
+    return 13 + parent_names_length + num_parents + child_names_length + num_children
+
+
+def _join_job_bytes(join_name_length: int) -> int:
+    """The length of the ``JOB`` line for a join node."""
+    # "JOB " + name + " __JOIN__.sub NOOP\n"
+    return 23 + join_name_length
+
+
+def _join_name_length(join_factory: JoinFactory) -> int:
+    """The length of the name of the next join node, like ``__JOIN__:12``."""
+    return len("__JOIN__:") + len(str(join_factory.count))
+
+
+def _names_length(prefix_length: int, indices: Iterable[int]) -> int:
+    """The total length of the names ``{prefix}{index}`` for the ``indices``."""
+    return sum(prefix_length + len(str(i)) for i in indices)
+
+
+INDEX_BUFFER_FORMATS = set("bBhHiIlLqQnN")
+
+
+def _as_index_buffer(indices) -> Sequence[int]:
+    """
+    Return a flat, indexable view of ``indices`` without copying it if it
+    already supports the buffer protocol with an integer format
+    (like :class:`array.array` or a one-dimensional NumPy array).
+    Anything else is copied into an :class:`array.array`.
+    """
+    try:
+        view = memoryview(indices)
+    except TypeError:
+        return array.array("q", indices)
+
+    if view.ndim != 1 or view.format.lstrip("@=<>!") not in INDEX_BUFFER_FORMATS:
+        view.release()
+        return array.array("q", indices)
+
+    return view
+
+
+class SparseEdge(BaseEdge):
+    """
+    This edge connects arbitrary individual nodes in the layers, given as
+    arrays of parent and child node indices.
+
+    The indices may be given in coordinate (COO) form, as two equal-length
+    arrays where ``parents[k]`` is a parent of ``children[k]``,
+    or in compressed (CSR) form via :meth:`SparseEdge.from_csr`.
+    Arrays that support the buffer protocol with an integer type
+    (like :class:`array.array` or a one-dimensional NumPy array) are used
+    directly, without copying them.
+
+    Edges are emitted grouped by child: each child node gets a single
+    ``PARENT ... CHILD`` line, and consecutive children with identical parents
+    share a line. Repeated ``(parent, child)`` pairs are only written once.
+    """
+
+    __slots__ = ("parents", "children", "offsets")
+
+    def __init__(self, parents: Sequence[int], children: Sequence[int]):
+        """
+        Parameters
+        ----------
+        parents
+            The parent node index of each edge.
+        children
+            The child node index of each edge.
+        """
+        self.parents = _as_index_buffer(parents)
+        self.children = _as_index_buffer(children)
+        self.offsets = None
+
+        if len(self.parents) != len(self.children):
+            raise exceptions.IncompatibleSparseEdge(
+                "parents and children must have the same length, but they have lengths {} and {}".format(
+                    len(self.parents), len(self.children)
+                )
+            )
+
+    @classmethod
+    def from_csr(cls, offsets: Sequence[int], parents: Sequence[int]) -> "SparseEdge":
+        """
+        Create a :class:`SparseEdge` from compressed sparse rows, with one
+        row per child node.
+        The parents of child node ``i`` are
+        ``parents[offsets[i]:offsets[i + 1]]``,
+        so ``offsets`` has one more entry than the child layer has nodes.
+
+        Parameters
+        ----------
+        offsets
+            The offsets of each child's parents in ``parents``.
+        parents
+            The parent node indices, grouped by child.
+        """
+        edge = cls.__new__(cls)
+        edge.offsets = _as_index_buffer(offsets)
+        edge.parents = _as_index_buffer(parents)
+        edge.children = None
+
+        if len(edge.offsets) == 0 or edge.offsets[-1] != len(edge.parents):
+            raise exceptions.IncompatibleSparseEdge(
+                "the last offset must be the number of parent indices ({})".format(
+                    len(edge.parents)
+                )
+            )
+
+        return edge
+
+    def __len__(self) -> int:
+        """The number of underlying edges."""
+        return len(self.parents)
+
+    def get_edges(
+        self, parent: "node.BaseNode", child: "node.BaseNode", join_factory: JoinFactory
+    ) -> Iterable[
+        Union[
+            Tuple[Tuple[int], Tuple[int]],
+            Tuple[Tuple[int], JoinNode],
+            Tuple[JoinNode, Tuple[int]],
+        ]
+    ]:
+        num_parent_vars = len(parent)
+        num_child_vars = len(child)
+
+        previous_parents = None
+        previous_children = []
+        for child_index, parent_indices in self._rows(num_child_vars):
+            if len(parent_indices) == 0:
+                continue
+            if not 0 <= child_index < num_child_vars:
+                raise exceptions.IncompatibleSparseEdge(
+                    "Cannot apply edge {} to child layer {} because it has no node with index {}".format(
+                        self, child, child_index
+                    )
+                )
+            for parent_index in parent_indices:
+                if not 0 <= parent_index < num_parent_vars:
+                    raise exceptions.IncompatibleSparseEdge(
+                        "Cannot apply edge {} to parent layer {} because it has no node with index {}".format(
+                            self, parent, parent_index
+                        )
+                    )
+
+            if parent_indices == previous_parents:
+                previous_children.append(child_index)
+                continue
+
+            if previous_parents is not None:
+                yield previous_parents, tuple(previous_children)
+            previous_parents = parent_indices
+            previous_children = [child_index]
+
+        if previous_parents is not None:
+            yield previous_parents, tuple(previous_children)
+
+    def check(self, parent: "node.BaseNode", child: "node.BaseNode") -> None:
+        # this takes one pass over the index arrays, but doesn't group them
+        # into edges like get_edges does
+        if len(self.parents) == 0:
+            return
+
+        if self.offsets is not None:
+            # children without any parents are skipped, so only the last child
+            # that has parents needs to be in the child layer
+            offsets = self.offsets
+            last_child = len(offsets) - 2
+            while offsets[last_child] == offsets[last_child + 1]:
+                last_child -= 1
+            child_indices = (0, last_child)
+        else:
+            child_indices = (min(self.children), max(self.children))
+
+        for which, layer, indices in (
+            ("parent", parent, (min(self.parents), max(self.parents))),
+            ("child", child, child_indices),
+        ):
+            for index in indices:
+                if not 0 <= index < len(layer):
+                    raise exceptions.IncompatibleSparseEdge(
+                        "Cannot apply edge {} to {} layer {} because it has no node with index {}".format(
+                            self, which, layer, index
+                        )
+                    )
+
+    def _rows(self, num_child_vars: int) -> Iterator[Tuple[int, Tuple[int]]]:
+        """
+        Yield ``(child index, parent indices)`` for each child, in order.
+        Repeated parents of a child are only yielded once.
+        """
+        if self.offsets is not None:
+            offsets, parents = self.offsets, self.parents
+            for child_index in range(len(offsets) - 1):
+                yield child_index, tuple(
+                    dict.fromkeys(parents[offsets[child_index] : offsets[child_index + 1]])
+                )
+            return
+
+        children = self.children
+        if all(a <= b for a, b in zip(children, itertools.islice(children, 1, None))):
+            order = range(len(children))
+        else:
+            order = self._order_by_child(num_child_vars)
+
+        parents = self.parents
+        for child_index, positions in itertools.groupby(
+            order, key=children.__getitem__
+        ):
+            yield child_index, tuple(dict.fromkeys(parents[k] for k in positions))
+
+    def _order_by_child(self, num_child_vars: int) -> Sequence[int]:
+        """
+        Counting-sort the edge positions by child index,
+        without copying the parent or child arrays themselves.
+        """
+        children = self.children
+        num_rows = max(num_child_vars, max(children) + 1)
+
+        starts = array.array("q", bytes(8 * (num_rows + 1)))
+        for c in children:
+            if c < 0:
+                raise exceptions.IncompatibleSparseEdge(
+                    "Edge {} has a negative child index ({})".format(self, c)
+                )
+            starts[c + 1] += 1
+        for row in range(num_rows):
+            starts[row + 1] += starts[row]
+
+        order = array.array("q", bytes(8 * len(children)))
+        for position, c in enumerate(children):
+            order[starts[c]] = position
+            starts[c] += 1
+
+        return order
+
+    def __getstate__(self):
+        # memoryviews can't be pickled, so send copies of the buffers instead
+        return (
+            None,
+            {
+                slot: array.array("q", value)
+                if isinstance(value, memoryview)
+                else value
+                for slot, value in utils.slot_state(self)[1].items()
+            },
+        )
+
+    def __repr__(self) -> str:
+        return "{}(edges = {})".format(type(self).__name__, len(self))
@@ -44,3 +44,41 @@ class NoRescueFileFound(DAGsException):
 
 class CannotInvertFormat(DAGsException):
     pass
+
+
+class IncompatibleSparseEdge(DAGsException):
+    pass
+
+
+class CycleInDAG(DAGsException):
+    pass
+
+
+class NodeNotInDAG(DAGsException):
+    pass
+
+
+class CannotRunLocally(DAGsException):
+    pass
+
+
+class InvalidDAG(DAGsException):
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__(
+            "The DAG has {} problem(s):\n{}".format(
+                len(self.errors), "\n".join("  {!r}".format(e) for e in self.errors)
+            )
+        )
+
+
+class CannotReadDAGFile(DAGsException):
+    pass
+
+
+class CannotDumpDAG(DAGsException):
+    pass
+
+
+class CannotLoadDAG(DAGsException):
+    pass
@@ -0,0 +1,150 @@
+# Copyright 2020 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Tuple, Optional
+
+from array import array
+
+from . import dag, node, edges
+from .walk_order import WalkOrder
+
+
+class ExpandedGraph:
+    """
+    The graph of underlying (actual DAGMan) nodes that a :class:`DAG` turns
+    into when it is written out, including the join nodes created by its
+    edges, stored compactly in integer arrays.
+
+    Every underlying node has an integer ID.
+    The underlying nodes of each logical node have consecutive IDs, starting
+    at ``offsets[i]`` for ``layers[i]`` (``positions`` maps each logical node
+    to its ``i``), and ``layer_ids`` holds the ``i`` of every underlying node
+    (``-1`` for join nodes).
+    The logical nodes are in the same order that the writer writes them out,
+    so the join nodes are numbered the same way too.
+    The join nodes come after all of them: join node ``j`` (which the writer
+    names ``__JOIN__`` and ``j``) has ID ``num_nodes + j``.
+
+    The children of node ``i`` are
+    ``children[child_offsets[i]:child_offsets[i + 1]]``,
+    and ``num_parents[i]`` is how many parents it has.
+
+    The ``FINAL`` node is not part of the graph.
+    """
+
+    __slots__ = (
+        "layers",
+        "positions",
+        "offsets",
+        "num_nodes",
+        "num_joins",
+        "layer_ids",
+        "child_offsets",
+        "children",
+        "num_parents",
+    )
+
+    def __init__(self, dag: "dag.DAG"):
+        """
+        Parameters
+        ----------
+        dag
+            The DAG to expand.
+        """
+        self.layers = list(dag.walk(order=WalkOrder.BREADTH_FIRST))
+        self.positions = {n: idx for idx, n in enumerate(self.layers)}
+
+        self.offsets = array("q", [0])
+        for n in self.layers:
+            self.offsets.append(self.offsets[-1] + len(n))
+        self.num_nodes = self.offsets[-1]
+
+        parents, children, self.num_joins = self._expand_edges(dag)
+        total = self.num_nodes + self.num_joins
+
+        self.layer_ids = array("l", [-1]) * total
+        for layer_id in range(len(self.layers)):
+            start, stop = self.offsets[layer_id], self.offsets[layer_id + 1]
+            self.layer_ids[start:stop] = array("l", [layer_id]) * (stop - start)
+
+        # counting sort of the edges by parent, into compressed sparse rows
+        counts = array("q", [0]) * (total + 1)
+        self.num_parents = array("l", [0]) * total
+        for p, c in zip(parents, children):
+            counts[p + 1] += 1
+            self.num_parents[c] += 1
+        for i in range(total):
+            counts[i + 1] += counts[i]
+        self.child_offsets = array("q", counts)
+
+        self.children = array("q", [0]) * len(children)
+        for p, c in zip(parents, children):
+            self.children[counts[p]] = c
+            counts[p] += 1
+
+    def _expand_edges(self, dag: "dag.DAG") -> Tuple[array, array, int]:
+        positions = self.positions
+        join_factory = edges.JoinFactory()
+
+        # join nodes are recorded as ~id until we know how many there are
+        parents = array("q")
+        children = array("q")
+        for parent_layer in self.layers:
+            parent_offset = self.offsets[positions[parent_layer]]
+            for child_layer in parent_layer.children:
+                child_offset = self.offsets[positions[child_layer]]
+                edge = dag._edges.get(parent_layer, child_layer)
+                for p, c in edge.get_edges(parent_layer, child_layer, join_factory):
+                    if isinstance(p, edges.JoinNode):
+                        p = (~p,)
+                    else:
+                        p = [parent_offset + idx for idx in p]
+                    if isinstance(c, edges.JoinNode):
+                        c = (~c,)
+                    else:
+                        c = [child_offset + idx for idx in c]
+                    for p_id in p:
+                        for c_id in c:
+                            parents.append(p_id)
+                            children.append(c_id)
+
+        for ids in (parents, children):
+            for i, x in enumerate(ids):
+                if x < 0:
+                    ids[i] = self.num_nodes + ~x
+
+        return parents, children, join_factory.count
+
+    def __len__(self) -> int:
+        return self.num_nodes + self.num_joins
+
+    def children_of(self, node_id: int) -> array:
+        """Return the IDs of the children of the underlying node ``node_id``."""
+        return self.children[self.child_offsets[node_id] : self.child_offsets[node_id + 1]]
+
+    def locate(self, node_id: int) -> Optional[Tuple[node.BaseNode, int]]:
+        """
+        Return the logical node that the underlying node ``node_id`` belongs to,
+        and its index in that logical node, or ``None`` for join nodes.
+        """
+        if node_id >= self.num_nodes:
+            return None
+        layer_id = self.layer_ids[node_id]
+        return self.layers[layer_id], node_id - self.offsets[layer_id]
+
+    def ids_of(self, n: node.BaseNode) -> range:
+        """Return the IDs of the underlying nodes of the logical node ``n``."""
+        layer_id = self.positions[n]
+        return range(self.offsets[layer_id], self.offsets[layer_id + 1])
@@ -0,0 +1,543 @@
+# Copyright 2020 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Optional, Dict, List, Mapping, Tuple
+
+import concurrent.futures
+import heapq
+import itertools
+import os
+import re
+import shlex
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+from . import dag, node, utils, exceptions
+from .expand import ExpandedGraph
+from .formatter import NodeNameFormatter, SimpleFormatter
+from .writer import DEFAULT_DAG_FILE_NAME
+
+SUCCEEDED = "succeeded"
+SKIPPED = "skipped"
+FAILED = "failed"
+ABORTED = "aborted"
+
+_SUBMIT_MACRO = re.compile(r"\$\((\w+)\)")
+_SCRIPT_MACRO = re.compile(r"\$(JOB|RETRY|MAX_RETRIES|RETURN|PRE_SCRIPT_RETURN)\b")
+
+
+class LocalRunResult:
+    """
+    The result of :func:`run_locally`.
+
+    Attributes
+    ----------
+    return_code
+        ``0`` if every node succeeded; otherwise, what DAGMan would have
+        exited with (``1``, or the return value of an abort condition).
+    aborted
+        ``True`` if the DAG was stopped by an abort condition.
+    num_succeeded
+        The number of underlying nodes that finished successfully
+        (including ``NOOP`` nodes and nodes that were already ``DONE``).
+    num_skipped
+        The number of underlying nodes that were skipped by their ``PRE``
+        script exiting with ``pre_skip_exit_code``.
+    num_failed
+        The number of underlying nodes that failed, even after retrying.
+    num_unrun
+        The number of underlying nodes that never ran, because one of their
+        ancestors failed or the DAG was aborted.
+    failed
+        The names of the underlying nodes that failed.
+    rescue_file
+        The rescue file that was written, if the DAG did not succeed
+        (or was aborted).
+    """
+
+    __slots__ = (
+        "return_code",
+        "aborted",
+        "num_succeeded",
+        "num_skipped",
+        "num_failed",
+        "num_unrun",
+        "failed",
+        "rescue_file",
+    )
+
+    def __init__(self, **kwargs):
+        for k, v in kwargs.items():
+            setattr(self, k, v)
+
+    def __repr__(self) -> str:
+        return utils.make_repr(
+            self, ("return_code", "aborted", "num_succeeded", "num_failed", "num_unrun"),
+        )
+
+
+def run_locally(
+    dag: "dag.DAG",
+    dag_dir: Path,
+    max_workers: Optional[int] = None,
+    max_jobs_by_category: Optional[Mapping[str, int]] = None,
+    node_name_formatter: Optional[NodeNameFormatter] = None,
+    dag_file_name: str = DEFAULT_DAG_FILE_NAME,
+) -> LocalRunResult:
+    """
+    Run the ``dag`` on this machine, without HTCondor, roughly the way DAGMan
+    would run it.
+    This is meant for testing DAG-generating code and for running small DAGs
+    on a workstation; only the parts of the submit descriptions that make
+    sense locally are used.
+
+    The DAG is expanded into underlying nodes and join nodes exactly as it
+    would be written out.
+    Each underlying node runs the ``executable`` of its layer's submit
+    description with its ``arguments``, after replacing ``$(name)`` macros
+    with the node's ``vars`` (or ``$(JOB)`` with the node's name, or other
+    submit description entries).
+    If ``input``, ``output``, or ``error`` are set, they are used for the
+    job's standard input, output, and error.
+    Jobs run in the node's ``dir`` (relative to ``dag_dir``),
+    or in ``dag_dir`` itself.
+    Up to ``max_workers`` nodes (each with its own process) run at the same
+    time, in ``priority`` order, limited by ``max_jobs_by_category``.
+
+    Like DAGMan, a node runs its ``PRE`` script, its job, and its ``POST``
+    script (with the ``$JOB``, ``$RETRY``, ``$MAX_RETRIES``, ``$RETURN``, and
+    ``$PRE_SCRIPT_RETURN`` macros replaced in their arguments); the node
+    succeeds if its ``POST`` script does, or if its job does when it has no
+    ``POST`` script.
+    ``RETRY`` (and ``UNLESS-EXIT``), ``PRE_SKIP``, ``ABORT-DAG-ON``,
+    deferred script retries, ``DONE``, and ``NOOP`` are all respected,
+    and the ``FINAL`` node runs at the end no matter what.
+    If the DAG does not succeed, a rescue file is written to ``dag_dir``,
+    which can be applied to the DAG with :func:`rescue` (or used by DAGMan).
+
+    :class:`SubDAG` nodes cannot be run locally.
+
+    Parameters
+    ----------
+    dag
+        The DAG to run.
+    dag_dir
+        The directory to run the DAG in, and to write the rescue file to.
+    max_workers
+        The maximum number of nodes to run at the same time.
+        If ``None``, it is the number of CPUs.
+    max_jobs_by_category
+        The maximum number of nodes in each category to run at the same time.
+        If ``None``, the DAG's own limits are used.
+    node_name_formatter
+        The :class:`NodeNameFormatter` to name the underlying nodes with.
+        If not provided, the default is :class:`SimpleFormatter`.
+    dag_file_name
+        The name the DAG would have been written with; the rescue file is
+        named after it.
+    """
+    dag_dir = Path(dag_dir).absolute()
+    if node_name_formatter is None:
+        node_name_formatter = SimpleFormatter()
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_jobs_by_category is None:
+        max_jobs_by_category = dag.max_jobs_per_category
+
+    for n in dag.nodes:
+        if isinstance(n, node.SubDAG):
+            raise exceptions.CannotRunLocally(
+                "{} is a SubDAG, which cannot be run locally".format(n)
+            )
+
+    graph = ExpandedGraph(dag)
+    runner = _Runner(dag_dir)
+    layers = graph.layers
+    submit_macros = [_submit_macros(n.submit_description) for n in layers]
+    category = [n.category if n.category in max_jobs_by_category else None for n in layers]
+
+    num_nodes = graph.num_nodes
+    offsets = graph.offsets
+    layer_ids = graph.layer_ids
+    child_offsets = graph.child_offsets
+    children = graph.children
+    remaining = graph.num_parents
+    # 0 = waiting for parents, 1 = ready or running, 2 = finished, 3 = failed
+    state = bytearray(len(graph))
+
+    sequence = itertools.count()
+    waiting = {c: [] for c in set(category)}
+    in_category = dict.fromkeys(waiting, 0)
+
+    counts = dict.fromkeys((SUCCEEDED, SKIPPED, FAILED), 0)
+    failed = []
+    abort_code = None
+
+    def job_for(n: int) -> "_Job":
+        layer_id = layer_ids[n]
+        layer, idx = layers[layer_id], n - offsets[layer_id]
+        name = node_name_formatter.generate(layer.name, idx)
+        return _Job(name, layer, idx, submit_macros[layer_id], dag_dir)
+
+    def ready(n: int) -> bool:
+        """Make ``n`` ready, and return whether it finishes immediately."""
+        state[n] = 1
+        if n >= num_nodes:
+            return True
+        layer_id = layer_ids[n]
+        layer, idx = layers[layer_id], n - offsets[layer_id]
+        if layer.noop.get(idx, False) and layer.pre is None and layer.post is None:
+            counts[SUCCEEDED] += 1
+            return True
+        entry = (-layer.priority, next(sequence), n)
+        heapq.heappush(waiting[category[layer_id]], entry)
+        return False
+
+    def finish(n: int) -> None:
+        stack = [n]
+        while len(stack) > 0:
+            n = stack.pop()
+            state[n] = 2
+            for c in children[child_offsets[n] : child_offsets[n + 1]]:
+                remaining[c] -= 1
+                if remaining[c] == 0 and state[c] == 0 and ready(c):
+                    stack.append(c)
+
+    # nodes that are already done are finished from the start, but their
+    # children only become ready once all of their parents are finished
+    for layer_id, layer in enumerate(layers):
+        for idx, is_done in layer.done.items():
+            if is_done and 0 <= idx < len(layer):
+                n = offsets[layer_id] + idx
+                state[n] = 2
+                counts[SUCCEEDED] += 1
+                for c in children[child_offsets[n] : child_offsets[n + 1]]:
+                    remaining[c] -= 1
+    for n in range(len(graph)):
+        if remaining[n] == 0 and state[n] == 0 and ready(n):
+            finish(n)
+
+    running = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while True:
+            while abort_code is None and len(running) < max_workers:
+                best = None
+                for c, heap in waiting.items():
+                    if len(heap) == 0:
+                        continue
+                    if c is not None and in_category[c] >= max_jobs_by_category[c]:
+                        continue
+                    if best is None or heap[0] < best[1][0]:
+                        best = (c, heap)
+                if best is None:
+                    break
+                c, heap = best
+                _, _, n = heapq.heappop(heap)
+                in_category[c] += 1
+                running[pool.submit(runner.run_node, job_for(n))] = n
+
+            if len(running) == 0:
+                break
+
+            finished, _ = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in finished:
+                n = running.pop(future)
+                in_category[category[layer_ids[n]]] -= 1
+                status, code = future.result()
+
+                if status == ABORTED:
+                    abort = layers[layer_ids[n]].abort
+                    abort_code = (
+                        abort.dag_return_value if abort.dag_return_value is not None else code
+                    )
+                    runner.abort()
+                    # the node itself may still have succeeded
+                    status = SUCCEEDED if code == 0 else FAILED
+
+                if status == FAILED:
+                    state[n] = 3
+                    counts[FAILED] += 1
+                    failed.append(job_for(n).name)
+                    continue
+
+                counts[status] += 1
+                finish(n)
+
+    aborted = abort_code is not None
+    if aborted:
+        return_code = abort_code
+    elif counts[FAILED] > 0:
+        return_code = 1
+    else:
+        return_code = 0
+
+    final = dag._final_node
+    if final is not None:
+        runner.stopping.clear()
+        status, _ = runner.run_node(
+            _Job(final.name, final, 0, _submit_macros(final.submit_description), dag_dir)
+        )
+        if status == FAILED and return_code == 0:
+            return_code = 1
+
+    rescue_file = None
+    if return_code != 0 or aborted:
+        rescue_file = write_rescue_file(
+            dag_dir,
+            dag_file_name,
+            (
+                node_name_formatter.generate(layers[layer_ids[n]].name, n - offsets[layer_ids[n]])
+                for n in range(num_nodes)
+                if state[n] == 2
+            ),
+        )
+
+    num_unrun = num_nodes - sum(counts.values())
+    return LocalRunResult(
+        return_code=return_code,
+        aborted=aborted,
+        num_succeeded=counts[SUCCEEDED],
+        num_skipped=counts[SKIPPED],
+        num_failed=counts[FAILED],
+        num_unrun=num_unrun,
+        failed=failed,
+        rescue_file=rescue_file,
+    )
+
+
+class _Job:
+    """Everything needed to run one underlying node."""
+
+    __slots__ = ("name", "node", "index", "macros", "cwd")
+
+    def __init__(
+        self,
+        name: str,
+        node_: node.BaseNode,
+        index: int,
+        submit_macros: Dict[str, str],
+        dag_dir: Path,
+    ):
+        self.name = name
+        self.node = node_
+        self.index = index
+
+        macros = dict(submit_macros)
+        if isinstance(node_, node.NodeLayer):
+            macros.update((k.lower(), str(v)) for k, v in node_.vars[index].items())
+        macros["job"] = name
+        self.macros = macros
+
+        self.cwd = dag_dir / node_.dir if node_.dir is not None else dag_dir
+
+    def expand(self, key: str) -> Optional[str]:
+        """Return the value of a submit description entry, with macros replaced."""
+        value = self.macros.get(key)
+        if value is None:
+            return None
+        # entries can refer to other entries, so keep going until nothing changes
+        for _ in range(10):
+            expanded = _SUBMIT_MACRO.sub(lambda m: self.macros.get(m.group(1).lower(), ""), value)
+            if expanded == value:
+                break
+            value = expanded
+        return value
+
+
+class _Runner:
+    """Runs the processes for nodes, and stops them all if the DAG is aborted."""
+
+    def __init__(self, dag_dir: Path):
+        self.dag_dir = dag_dir
+        self.stopping = threading.Event()
+        self.processes = set()
+        self.lock = threading.Lock()
+
+    def abort(self) -> None:
+        self.stopping.set()
+        with self.lock:
+            for process in self.processes:
+                process.terminate()
+
+    def run_node(self, job: _Job) -> Tuple[str, int]:
+        n = job.node
+        max_retries = n.retries or 0
+
+        retry = 0
+        while True:
+            pre_code = None
+            if n.pre is not None:
+                pre_code = self.run_script(n.pre, job, retry, max_retries)
+                if pre_code == n.pre_skip_exit_code:
+                    return SKIPPED, 0
+
+            if pre_code not in (None, 0):
+                code = pre_code
+            else:
+                if n.noop.get(job.index, False):
+                    code = 0
+                else:
+                    code = self.run_job(job)
+                if n.post is not None:
+                    code = self.run_script(
+                        n.post,
+                        job,
+                        retry,
+                        max_retries,
+                        return_code=code,
+                        pre_script_return=pre_code,
+                    )
+
+            if n.abort is not None and code == n.abort.node_exit_value:
+                return ABORTED, code
+            if code == 0:
+                return SUCCEEDED, 0
+            if self.stopping.is_set() or retry >= max_retries or code == n.retry_unless_exit:
+                return FAILED, code
+            retry += 1
+
+    def run_job(self, job: _Job) -> int:
+        executable = job.expand("executable")
+        if executable is None:
+            return 1
+        arguments = job.expand("arguments") or ""
+
+        files = {}
+        try:
+            for key, mode in (("input", "rb"), ("output", "wb"), ("error", "wb")):
+                path = job.expand(key)
+                if path:
+                    files[key] = (job.cwd / path).open(mode)
+            return self.run(
+                [_resolve(executable, job.cwd)] + split_arguments(arguments),
+                job.cwd,
+                stdin=files.get("input", subprocess.DEVNULL),
+                stdout=files.get("output", subprocess.DEVNULL),
+                stderr=files.get("error", subprocess.DEVNULL),
+            )
+        finally:
+            for f in files.values():
+                f.close()
+
+    def run_script(
+        self,
+        script: node.Script,
+        job: _Job,
+        retry: int,
+        max_retries: int,
+        return_code: Optional[int] = None,
+        pre_script_return: Optional[int] = None,
+    ) -> int:
+        macros = {
+            "JOB": job.name,
+            "RETRY": str(retry),
+            "MAX_RETRIES": str(max_retries),
+            "RETURN": str(return_code if return_code is not None else -1),
+            "PRE_SCRIPT_RETURN": str(pre_script_return if pre_script_return is not None else -1),
+        }
+        argv = [_resolve(str(script.executable), job.cwd)] + [
+            _SCRIPT_MACRO.sub(lambda m: macros[m.group(1)], arg) for arg in script.arguments
+        ]
+
+        while True:
+            code = self.run(argv, job.cwd)
+            if not (script.retry and code == script.retry_status):
+                return code
+            if self.stopping.wait(script.retry_delay):
+                return code
+
+    def run(self, argv: List[str], cwd: Path, **kwargs) -> int:
+        if self.stopping.is_set():
+            return 1
+        try:
+            process = subprocess.Popen(argv, cwd=str(cwd), **kwargs)
+        except OSError:
+            # like a shell, report a missing or unrunnable executable as 127
+            return 127
+
+        with self.lock:
+            self.processes.add(process)
+        try:
+            return process.wait()
+        finally:
+            with self.lock:
+                self.processes.discard(process)
+
+
+def _submit_macros(submit_description) -> Dict[str, str]:
+    if submit_description is None:
+        return {}
+    if not utils.is_submit(submit_description):
+        submit_description = utils.bindings().Submit(Path(submit_description).read_text())
+    return {k.lower(): str(v) for k, v in submit_description.items()}
+
+
+def _resolve(executable: str, cwd: Path) -> str:
+    """Executables are relative to the working directory, if they exist there."""
+    path = cwd / executable
+    if path.exists():
+        return str(path)
+    return executable
+
+
+def split_arguments(arguments: str) -> List[str]:
+    """
+    Split an HTCondor ``arguments`` value into individual arguments.
+    Both the new syntax (surrounded by double quotes, with single quotes
+    grouping arguments that contain spaces) and the old syntax
+    (separated by whitespace) are understood.
+    """
+    arguments = arguments.strip()
+    if len(arguments) >= 2 and arguments[0] == arguments[-1] == '"':
+        inner = arguments[1:-1].replace('""', '"')
+        lexer = shlex.shlex(inner, posix=True)
+        lexer.whitespace_split = True
+        lexer.quotes = "'"
+        lexer.escape = ""
+        return list(lexer)
+    return arguments.split()
+
+
+def write_rescue_file(dag_dir: Path, dag_file_name: str, done_node_names) -> Path:
+    """
+    Write a rescue file that marks the named nodes as ``DONE``,
+    next to any existing rescue files, with the next rescue number.
+    """
+    existing = sorted(Path(dag_dir).glob("{}.rescue*".format(dag_file_name)))
+    number = 1
+    if len(existing) > 0:
+        try:
+            number = int(existing[-1].name.rsplit(".rescue", 1)[1]) + 1
+        except ValueError:
+            number = len(existing) + 1
+    path = Path(dag_dir) / "{}.rescue{:03d}".format(dag_file_name, number)
+
+    with path.open(mode="w") as f:
+        f.write("# Rescue DAG file, created after running\n")
+        f.write("#  the {} DAG file\n".format(dag_file_name))
+        f.write(
+            "# Created {} by htcondor.dags.run_locally\n".format(
+                time.strftime("%m/%d/%Y %H:%M:%S UTC", time.gmtime())
+            )
+        )
+        f.write("# Rescue DAG version: 2.0.1 (partial)\n\n")
+        for name in done_node_names:
+            f.write("DONE {}\n".format(name))
+
+    return path
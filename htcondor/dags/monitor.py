@@ -0,0 +1,594 @@
+# Copyright 2020 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Optional, Tuple, Dict, Union
+
+import enum
+import math
+import os
+import re
+from pathlib import Path
+
+from . import dag, utils, exceptions
+from .formatter import NodeNameFormatter, SimpleFormatter
+
+JOIN_NODE_LAYER_NAME = "__JOIN__"
+
+
+def _parse_node_name(formatter: NodeNameFormatter, name: str) -> Tuple[str, int]:
+    """
+    Invert a node name with the ``formatter``. Names it cannot invert (like
+    the ``FINAL`` node's) become index ``0`` of a logical node with that name.
+    """
+    try:
+        return formatter.parse(name)
+    except (ValueError, exceptions.CannotInvertFormat):
+        return name, 0
+
+
+class RuntimeHistogram:
+    """
+    A histogram of job runtimes, in seconds, with a fixed number of
+    exponentially-growing buckets, so that it takes the same amount of
+    memory no matter how many runtimes are added to it.
+
+    Bucket ``0`` holds runtimes under one second, and bucket ``i`` holds
+    runtimes from :math:`2^{i-1}` up to :math:`2^i` seconds.
+    The last bucket also holds anything longer.
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    NUM_BUCKETS = 24
+
+    def __init__(self):
+        self.counts = [0] * self.NUM_BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, seconds: float) -> None:
+        """Add one runtime to the histogram."""
+        seconds = max(seconds, 0)
+        bucket = 0 if seconds < 1 else int(math.log2(seconds)) + 1
+        self.counts[min(bucket, self.NUM_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    @property
+    def mean(self) -> Optional[float]:
+        """The mean runtime, or ``None`` if there are no runtimes."""
+        return self.total / self.count if self.count > 0 else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Return an upper bound on the ``q``-th quantile (between ``0`` and ``1``)
+        of the runtimes: the upper edge of the bucket it falls in.
+        Returns ``None`` if there are no runtimes.
+        """
+        if self.count == 0:
+            return None
+        target = q * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count > 0:
+                return min(2 ** bucket, self.max)
+        return self.max
+
+    def __repr__(self) -> str:
+        return utils.make_repr(self, ("count", "mean", "max"))
+
+
+class LayerProgress:
+    """
+    How far along the underlying nodes of one logical node are,
+    as seen in a DAGMan log.
+
+    Attributes
+    ----------
+    submitted
+        How many times jobs were submitted (including retries).
+    idle
+        How many jobs are submitted, but not running.
+    running
+        How many jobs are running.
+    done
+        How many nodes have finished successfully.
+    failed
+        How many nodes have failed (and not been retried yet).
+    runtimes
+        A :class:`RuntimeHistogram` of how long the jobs ran.
+    """
+
+    __slots__ = ("submitted", "idle", "running", "done", "failed", "runtimes")
+
+    def __init__(self):
+        self.submitted = 0
+        self.idle = 0
+        self.running = 0
+        self.done = 0
+        self.failed = 0
+        self.runtimes = RuntimeHistogram()
+
+    def __repr__(self) -> str:
+        return utils.make_repr(self, ("submitted", "idle", "running", "done", "failed"))
+
+
+# the states that jobs in flight can be in
+_IDLE = 0
+_RUNNING = 1
+_TERMINATED = 2
+_WAITING_FOR_POST = 3
+
+
+class JobstateLogTailer:
+    """
+    Follows a DAGMan jobstate log (see the ``jobstate_log`` argument of
+    :class:`DAG`) as it is written, and keeps a running
+    :class:`LayerProgress` for each logical node in the DAG.
+
+    Every call to :meth:`poll` reads whatever has been appended to the log
+    since the last call, a chunk at a time, and remembers the byte offset it
+    got to, so the log is never read twice and never held in memory.
+    Besides the per-layer counters, only the nodes that are currently in
+    flight (submitted, but not finished) and the nodes that have failed (so
+    that a retry can be recognized) are remembered, so memory use does not
+    grow with the length of the log.
+    A tailer can be pickled and unpickled to resume following a log later.
+
+    Node names are mapped back to logical nodes and indices with the
+    ``node_name_formatter`` the DAG was written with.
+    Join nodes are ignored, and names that the formatter cannot parse
+    (like the ``FINAL`` node's) are treated as index ``0`` of a logical node
+    with that name.
+
+    A node that has a ``POST`` script is only done (or failed) once its
+    ``POST`` script finishes. If the ``dag`` is given, the tailer knows from
+    the start which logical nodes have ``POST`` scripts; otherwise, it finds
+    out when it first sees one run, and may count the first node of that
+    logical node as done (or failed) based on its job alone.
+    """
+
+    __slots__ = (
+        "path",
+        "offset",
+        "node_name_formatter",
+        "layers",
+        "post_layers",
+        "in_flight",
+        "failed_nodes",
+        "dagman_started",
+        "dagman_exit_code",
+        "chunk_size",
+    )
+
+    def __init__(
+        self,
+        path: Path,
+        node_name_formatter: Optional[NodeNameFormatter] = None,
+        dag: Optional["dag.DAG"] = None,
+        offset: int = 0,
+        chunk_size: int = 1 << 20,
+    ):
+        """
+        Parameters
+        ----------
+        path
+            The path to the jobstate log.
+        node_name_formatter
+            The :class:`NodeNameFormatter` the DAG was written with.
+            If not provided, the default is :class:`SimpleFormatter`.
+        dag
+            The DAG the log is for, if available.
+        offset
+            The byte offset to start reading from.
+            Events before it are not counted.
+        chunk_size
+            How many bytes to read from the log at a time.
+        """
+        self.path = Path(path)
+        self.offset = offset
+        self.node_name_formatter = node_name_formatter or SimpleFormatter()
+        self.chunk_size = chunk_size
+
+        self.layers = {}
+        self.post_layers = set()
+        if dag is not None:
+            self.post_layers.update(n.name for n in dag.nodes if n.post is not None)
+            if dag._final_node is not None and dag._final_node.post is not None:
+                self.post_layers.add(dag._final_node.name)
+
+        self.in_flight = {}
+        self.failed_nodes = set()
+
+        self.dagman_started = None
+        self.dagman_exit_code = None
+
+    def __repr__(self) -> str:
+        return utils.make_repr(self, ("path", "offset"))
+
+    @property
+    def finished(self) -> bool:
+        """``True`` if DAGMan has written that it finished."""
+        return self.dagman_exit_code is not None
+
+    def totals(self) -> LayerProgress:
+        """Return the sum of the progress of every logical node (without runtimes)."""
+        total = LayerProgress()
+        for progress in self.layers.values():
+            for attr in ("submitted", "idle", "running", "done", "failed"):
+                setattr(total, attr, getattr(total, attr) + getattr(progress, attr))
+        return total
+
+    def poll(self) -> int:
+        """
+        Read and process everything that has been written to the log since the
+        last call (only whole lines; a partially-written last line is left for
+        the next call).
+        If the log has been truncated or replaced by a shorter one, it is read
+        again from the start.
+
+        Returns
+        -------
+        num_events : int
+            The number of lines that were processed.
+        """
+        try:
+            f = self.path.open(mode="rb")
+        except FileNotFoundError:
+            return 0
+
+        num_events = 0
+        with f:
+            f.seek(0, 2)
+            if f.tell() < self.offset:
+                self.offset = 0
+            f.seek(self.offset)
+
+            leftover = b""
+            while True:
+                chunk = f.read(self.chunk_size)
+                if len(chunk) == 0:
+                    break
+                data = leftover + chunk
+                end = data.rfind(b"\n") + 1
+                leftover = data[end:]
+                if end == 0:
+                    continue
+                self.offset += end
+                for line in data[:end].decode("utf-8", "replace").split("\n"):
+                    if self._process_line(line):
+                        num_events += 1
+
+        return num_events
+
+    def _process_line(self, line: str) -> bool:
+        parts = line.split()
+        if len(parts) < 3:
+            return False
+
+        try:
+            timestamp = int(parts[0])
+        except ValueError:
+            return False
+        name, event = parts[1], parts[2]
+
+        if name == "INTERNAL":
+            if event == "***" and len(parts) > 3:
+                if parts[3] == "DAGMAN_STARTED":
+                    self.dagman_started = timestamp
+                    self.dagman_exit_code = None
+                elif parts[3] == "DAGMAN_FINISHED" and len(parts) > 4:
+                    try:
+                        self.dagman_exit_code = int(parts[4])
+                    except ValueError:
+                        pass
+            return True
+
+        layer, index = _parse_node_name(self.node_name_formatter, name)
+        if layer == JOIN_NODE_LAYER_NAME:
+            return True
+        key = (layer, index)
+
+        progress = self.layers.get(layer)
+        if progress is None:
+            progress = self.layers[layer] = LayerProgress()
+
+        if event == "SUBMIT":
+            if key in self.failed_nodes:
+                # this is a retry
+                self.failed_nodes.discard(key)
+                progress.failed -= 1
+            self._leave_state(key, progress)
+            progress.submitted += 1
+            progress.idle += 1
+            self.in_flight[key] = (_IDLE, timestamp)
+        elif event == "EXECUTE":
+            self._leave_state(key, progress)
+            progress.running += 1
+            self.in_flight[key] = (_RUNNING, timestamp)
+        elif event in ("JOB_EVICTED", "JOB_HELD"):
+            state = self.in_flight.get(key)
+            if state is not None and state[0] == _RUNNING:
+                self._record_runtime(progress, state[1], timestamp)
+            self._leave_state(key, progress)
+            progress.idle += 1
+            self.in_flight[key] = (_IDLE, timestamp)
+        elif event in ("JOB_TERMINATED", "JOB_ABORTED"):
+            state = self.in_flight.get(key)
+            if state is not None and state[0] == _RUNNING:
+                self._record_runtime(progress, state[1], timestamp)
+            self._leave_state(key, progress)
+            self.in_flight[key] = (_TERMINATED, timestamp)
+        elif event in ("JOB_SUCCESS", "JOB_FAILURE"):
+            if layer in self.post_layers:
+                self._leave_state(key, progress)
+                self.in_flight[key] = (_WAITING_FOR_POST, timestamp)
+            else:
+                self._finish(key, progress, event == "JOB_SUCCESS")
+        elif event == "POST_SCRIPT_STARTED":
+            self.post_layers.add(layer)
+            state = self.in_flight.get(key)
+            if state is None or state[0] != _WAITING_FOR_POST:
+                # we didn't know this layer had POST scripts, so the job (or PRE
+                # script) event that came just before this already finished the
+                # node; the POST script decides how it ends, so take that back
+                if key in self.failed_nodes:
+                    self.failed_nodes.discard(key)
+                    progress.failed -= 1
+                elif progress.done > 0:
+                    progress.done -= 1
+                self._leave_state(key, progress)
+                self.in_flight[key] = (_WAITING_FOR_POST, timestamp)
+        elif event in ("POST_SCRIPT_SUCCESS", "POST_SCRIPT_FAILURE"):
+            state = self.in_flight.get(key)
+            if state is not None and state[0] == _WAITING_FOR_POST:
+                self._finish(key, progress, event == "POST_SCRIPT_SUCCESS")
+        elif event in ("PRE_SCRIPT_FAILURE", "SUBMIT_FAILURE"):
+            if key in self.failed_nodes:
+                self.failed_nodes.discard(key)
+                progress.failed -= 1
+            self._finish(key, progress, False)
+
+        return True
+
+    def _leave_state(self, key: Tuple[str, int], progress: LayerProgress) -> None:
+        state = self.in_flight.pop(key, None)
+        if state is None:
+            return
+        if state[0] == _IDLE:
+            progress.idle -= 1
+        elif state[0] == _RUNNING:
+            progress.running -= 1
+
+    def _finish(self, key: Tuple[str, int], progress: LayerProgress, success: bool):
+        self._leave_state(key, progress)
+        if success:
+            progress.done += 1
+        else:
+            progress.failed += 1
+            self.failed_nodes.add(key)
+
+    def _record_runtime(self, progress: LayerProgress, start: int, stop: int):
+        progress.runtimes.add(stop - start)
+
+
+class NodeStatus(enum.IntEnum):
+    """
+    The states that DAGMan reports nodes to be in, in its node status file
+    (see :class:`NodeStatusFile`).
+    """
+
+    NOT_READY = 0
+    READY = 1
+    PRERUN = 2
+    SUBMITTED = 3
+    POSTRUN = 4
+    DONE = 5
+    ERROR = 6
+    FUTILE = 7
+
+    def __repr__(self) -> str:
+        return "{}.{}".format(type(self).__name__, self.name)
+
+
+class LayerStatus:
+    """
+    How many of the underlying nodes of one logical node are in each
+    :class:`NodeStatus`, as of the last time DAGMan wrote its node status file.
+    Index it with a :class:`NodeStatus` to get the number of nodes in that state.
+    """
+
+    __slots__ = ("counts",)
+
+    def __init__(self):
+        self.counts = [0] * len(NodeStatus)
+
+    def __getitem__(self, status: NodeStatus) -> int:
+        return self.counts[status]
+
+    @property
+    def total(self) -> int:
+        """The number of underlying nodes that were in the node status file."""
+        return sum(self.counts)
+
+    def __repr__(self) -> str:
+        counts = ", ".join(
+            "{}={}".format(status.name, count)
+            for status, count in zip(NodeStatus, self.counts)
+            if count > 0
+        )
+        return "{}({})".format(type(self).__name__, counts)
+
+
+_NODE_AD = re.compile(rb'Type = "NodeStatus";\s*Node = "([^"]*)";\s*NodeStatus = (\d+);')
+_DAG_AD = re.compile(rb'\[\s*Type = "DagStatus";(.*?)\]', re.DOTALL)
+_END_AD = re.compile(rb'\[\s*Type = "StatusEnd";(.*?)\]', re.DOTALL)
+_INT_ATTRIBUTE = re.compile(rb"(\w+) = (-?\d+);")
+
+
+class NodeStatusFileReader:
+    """
+    Reads the node status file that DAGMan writes (see :class:`NodeStatusFile`)
+    and keeps a :class:`LayerStatus` for each logical node in the DAG.
+
+    DAGMan replaces the whole file each time it updates it, so every call to
+    :meth:`poll` first checks whether the file has changed, and does nothing
+    if it has not; polling a large DAG more often than DAGMan updates the file
+    is cheap.
+    When the file has changed, it is read a chunk at a time and only the node
+    names and statuses are pulled out of it, instead of parsing every ClassAd.
+
+    Node names are mapped back to logical nodes with the
+    ``node_name_formatter`` the DAG was written with.
+    Join nodes are ignored, and names that the formatter cannot parse
+    (like the ``FINAL`` node's) are treated as index ``0`` of a logical node
+    with that name.
+    """
+
+    __slots__ = (
+        "path",
+        "node_name_formatter",
+        "layers",
+        "dag_status",
+        "next_update",
+        "chunk_size",
+        "_stamp",
+    )
+
+    def __init__(
+        self,
+        path: Union[Path, "dag.NodeStatusFile"],
+        node_name_formatter: Optional[NodeNameFormatter] = None,
+        chunk_size: int = 1 << 20,
+    ):
+        """
+        Parameters
+        ----------
+        path
+            The path to the node status file, or the :class:`NodeStatusFile`
+            that it was configured with. A relative path is relative to the
+            current working directory, not the DAG directory.
+        node_name_formatter
+            The :class:`NodeNameFormatter` the DAG was written with.
+            If not provided, the default is :class:`SimpleFormatter`.
+        chunk_size
+            How many bytes to read from the file at a time.
+        """
+        if isinstance(path, dag.NodeStatusFile):
+            path = path.path
+        self.path = Path(path)
+        self.node_name_formatter = node_name_formatter or SimpleFormatter()
+        self.chunk_size = chunk_size
+
+        self.layers = {}
+        self.dag_status = {}
+        self.next_update = None
+
+        self._stamp = None
+
+    def __repr__(self) -> str:
+        return utils.make_repr(self, ("path",))
+
+    def totals(self) -> LayerStatus:
+        """Return the sum of the status of every logical node."""
+        total = LayerStatus()
+        for status in self.layers.values():
+            total.counts = [a + b for a, b in zip(total.counts, status.counts)]
+        return total
+
+    def poll(self) -> bool:
+        """
+        Read the node status file again, if it has changed since the last time
+        it was read.
+
+        Returns
+        -------
+        changed : bool
+            ``True`` if the file was read, ``False`` if it has not changed
+            (or does not exist yet).
+        """
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return False
+
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stamp == self._stamp:
+            return False
+
+        with self.path.open(mode="rb") as f:
+            # stat the file we actually opened, in case it was replaced since
+            stat = os.fstat(f.fileno())
+            self._stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            self._read(f)
+
+        return True
+
+    def _read(self, f) -> None:
+        layers = {}
+        parse = self.node_name_formatter.parse
+        num_statuses = len(NodeStatus)
+        dag_status = {}
+        end = {}
+
+        leftover = b""
+        while True:
+            chunk = f.read(self.chunk_size)
+            if len(chunk) == 0:
+                data, leftover = leftover, b""
+            else:
+                data = leftover + chunk
+                # only look at whole ClassAds; the rest waits for the next chunk
+                boundary = data.rfind(b"]") + 1
+                data, leftover = data[:boundary], data[boundary:]
+
+            if not dag_status:
+                match = _DAG_AD.search(data)
+                if match is not None:
+                    dag_status = _int_attributes(match.group(1))
+
+            for name, code in _NODE_AD.findall(data):
+                code = int(code)
+                if code >= num_statuses:
+                    continue
+                name = name.decode()
+                try:
+                    layer, _ = parse(name)
+                except (ValueError, exceptions.CannotInvertFormat):
+                    layer = name
+                if layer == JOIN_NODE_LAYER_NAME:
+                    continue
+                status = layers.get(layer)
+                if status is None:
+                    status = layers[layer] = LayerStatus()
+                status.counts[code] += 1
+
+            match = _END_AD.search(data)
+            if match is not None:
+                end = _int_attributes(match.group(1))
+
+            if len(chunk) == 0:
+                break
+
+        self.layers = layers
+        self.dag_status = dag_status
+        self.next_update = end.get("NextUpdate")
+
+
+def _int_attributes(ad: bytes) -> Dict[str, int]:
+    return {key.decode(): int(value) for key, value in _INT_ATTRIBUTE.findall(ad)}
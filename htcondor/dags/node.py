@@ -14,20 +14,23 @@
 # limitations under the License.
 
 
-from typing import Optional, Dict, Iterable, Union, List, Iterator, Mapping
+from typing import Optional, Dict, Iterable, Union, List, Iterator, Mapping, TYPE_CHECKING
 
 import itertools
 import functools
 from pathlib import Path
 import abc
 
-import htcondor
-
 from . import dag, edges, utils
 from .walk_order import WalkOrder
 
+if TYPE_CHECKING:  # pragma: no cover
+    import htcondor
+
 
 class Script:
+    __slots__ = ("executable", "arguments", "retry", "retry_status", "retry_delay")
+
     def __init__(
         self,
         executable: Union[str, Path],
@@ -75,6 +78,8 @@ class DAGAbortCondition:
     See :ref:`abort-dag-on` for more information about DAG aborts.
     """
 
+    __slots__ = ("node_exit_value", "dag_return_value")
+
     def __init__(self, node_exit_value: int, dag_return_value: Optional[int] = None):
         """
         Parameters
@@ -106,6 +111,24 @@ class BaseNode(abc.ABC):
     method on.
     """
 
+    # subclasses that do not define __slots__ themselves get a __dict__ as usual
+    __slots__ = (
+        "_dag",
+        "name",
+        "dir",
+        "noop",
+        "done",
+        "retries",
+        "retry_unless_exit",
+        "priority",
+        "category",
+        "abort",
+        "pre",
+        "pre_skip_exit_code",
+        "post",
+        "runtime",
+    )
+
     def __init__(
         self,
         dag: "dag.DAG",
@@ -121,7 +144,8 @@ class BaseNode(abc.ABC):
         pre_skip_exit_code: Optional[int] = None,
         priority: int = 0,
         category: Optional[str] = None,
-        abort: Optional[DAGAbortCondition] = None
+        abort: Optional[DAGAbortCondition] = None,
+        runtime: Optional[Union[float, Mapping[int, float]]] = None
     ):
         """
         Parameters
@@ -160,6 +184,14 @@ class BaseNode(abc.ABC):
         abort
             A :class:`DAGAbortCondition` which may cause the entire DAG to stop
             if this node exits in a certain way.
+        runtime
+            How long this node is expected to run, in whatever units you like
+            (as long as they are the same for every node).
+            For a :class:`NodeLayer`, this can be a dictionary mapping individual
+            underlying node indices to their expected runtimes; a single number
+            applies to every underlying node.
+            This is not used by DAGMan; it is used by analyses like
+            :meth:`DAG.critical_path`.
         """
         self._dag = dag
         self.name = name
@@ -177,6 +209,9 @@ class BaseNode(abc.ABC):
         self.priority = priority
         self.category = category
         self.abort = abort
+        if isinstance(runtime, Mapping):
+            runtime = dict(runtime)
+        self.runtime = runtime
 
         self.pre = pre
         self.pre_skip_exit_code = pre_skip_exit_code
@@ -188,6 +223,27 @@ class BaseNode(abc.ABC):
     def __repr__(self) -> str:
         return utils.make_repr(self, ("name",))
 
+    def __reduce__(self):
+        # nodes are hashed by name, and the rest of their state refers back to
+        # them (through the DAG's edges), so the name has to be restored first
+        instance_dict, slots = utils.slot_state(self)
+        # htcondor.Submit objects can't be pickled, so send their text instead
+        submit_text = None
+        if utils.is_submit(slots.get("submit_description")):
+            submit_text = str(slots.pop("submit_description"))
+        return _new_node, (type(self), self.name, submit_text), (instance_dict, slots)
+
+    def __copy__(self):
+        # copying doesn't need to go through __reduce__ like pickling does,
+        # and copies share the original's htcondor.Submit instead of rebuilding it
+        new = type(self).__new__(type(self))
+        instance_dict, slots = utils.slot_state(self)
+        if instance_dict is not None:
+            new.__dict__.update(instance_dict)
+        for slot, value in slots.items():
+            setattr(new, slot, value)
+        return new
+
     def __iter__(self) -> "BaseNode":
         yield self
 
@@ -350,7 +406,7 @@ class BaseNode(abc.ABC):
         """
         nodes = utils.flatten(nodes)
         for node in nodes:
-            self._dag._edges.remove(self, node)
+            self._dag._edges.pop(self, node)
 
         return self
 
@@ -394,19 +450,19 @@ class BaseNode(abc.ABC):
         """
         nodes = utils.flatten(nodes)
         for node in nodes:
-            self._dag._edges.remove(node, self)
+            self._dag._edges.pop(node, self)
 
         return self
 
     @property
     def children(self) -> "Nodes":
         """Return a :class:`Nodes` containing all of the children of this node."""
-        return self._dag.node_to_children[self]
+        return Nodes(self._dag._edges.children_of(self))
 
     @property
     def parents(self) -> "Nodes":
         """Return a :class:`Nodes` containing all of the parents of this node."""
-        return self._dag.node_to_parents[self]
+        return Nodes(self._dag._edges.parents_of(self))
 
     def walk_ancestors(
         self, order: WalkOrder = WalkOrder.DEPTH_FIRST
@@ -421,6 +477,15 @@ class BaseNode(abc.ABC):
         return self._dag.walk_descendants(node=self, order=order)
 
 
+def _new_node(cls, name: str, submit_text: Optional[str] = None) -> BaseNode:
+    """Create an empty node with just its name set, for unpickling."""
+    n = cls.__new__(cls)
+    n.name = name
+    if submit_text is not None:
+        n.submit_description = utils.bindings().Submit(submit_text)
+    return n
+
+
 class NodeLayer(BaseNode):
     """
     Represents a "layer" of actual ``JOB`` nodes that share a submit description
@@ -428,11 +493,13 @@ class NodeLayer(BaseNode):
     Each underlying actual node's attributes may be customized using ``vars``.
     """
 
+    __slots__ = ("submit_description", "_vars")
+
     def __init__(
         self,
         dag: "dag.DAG",
         *,
-        submit_description: Union[Optional[htcondor.Submit], Path] = None,
+        submit_description: Union[Optional["htcondor.Submit"], Path] = None,
         vars: Optional[Iterable[Dict[str, str]]] = None,
         **kwargs
     ):
@@ -454,16 +521,33 @@ class NodeLayer(BaseNode):
         """
         super().__init__(dag, **kwargs)
 
-        self.submit_description = submit_description or htcondor.Submit({})
+        self.submit_description = submit_description or utils.bindings().Submit({})
 
         # todo: this is bad, should be an empty list
         if vars is None:
             vars = [{}]
-        self.vars = list(vars)
+        self.vars = vars
+
+    @property
+    def vars(self) -> List[Dict[str, str]]:
+        """
+        The ``VARS`` for this logical node; one dictionary per actual node.
+        """
+        # a layer loaded by DAG.load holds its vars in columnar form until
+        # they are needed
+        if not isinstance(self._vars, list):
+            self._vars = self._vars.materialize()
+        return self._vars
+
+    @vars.setter
+    def vars(self, vars: Iterable[Dict[str, str]]) -> None:
+        # copy, so that layers made from the same list don't share it
+        # (copy.copy of a node shares its vars, through __copy__)
+        self._vars = list(vars)
 
     def __len__(self):
         """The number of actual nodes in the layer."""
-        return len(self.vars)
+        return len(self._vars)
 
 
 class SubDAG(BaseNode):
@@ -473,6 +557,8 @@ class SubDAG(BaseNode):
     See :ref:`subdag-external` for more information on sub-DAGs.
     """
 
+    __slots__ = ("dag_file",)
+
     def __init__(self, dag: "dag.DAG", *, dag_file: Path, **kwargs):
         """
         Parameters
@@ -498,10 +584,12 @@ class FinalNode(BaseNode):
     See :ref:`final-node` for more information on the ``FINAL`` node.
     """
 
+    __slots__ = ("submit_description",)
+
     def __init__(
         self,
         dag: "dag.DAG",
-        submit_description: Union[Optional[htcondor.Submit], Path] = None,
+        submit_description: Union[Optional["htcondor.Submit"], Path] = None,
         **kwargs
     ):
         """
@@ -519,7 +607,7 @@ class FinalNode(BaseNode):
         """
         super().__init__(dag, **kwargs)
 
-        self.submit_description = submit_description or htcondor.Submit({})
+        self.submit_description = submit_description or utils.bindings().Submit({})
 
 
 class Nodes:
@@ -542,6 +630,54 @@ class Nodes:
         for node in nodes:
             self.nodes.add(node)
 
+    @classmethod
+    def _from_name_map(cls, name_map: Dict[str, BaseNode]) -> "Nodes":
+        """Make a :class:`Nodes` that uses ``name_map`` as its name-to-node mapping."""
+        nodes = cls.__new__(cls)
+        nodes.nodes = dag.NodeStore()
+        nodes.nodes.nodes = name_map
+        return nodes
+
+    def _name_map_of(self, other) -> Optional[Dict[str, BaseNode]]:
+        if isinstance(other, Nodes):
+            return other.nodes.nodes
+        if isinstance(other, BaseNode):
+            return {other.name: other}
+        return None
+
+    def __or__(self, other: Union["Nodes", BaseNode]) -> "Nodes":
+        """The nodes that are in either this :class:`Nodes` or ``other``."""
+        other_map = self._name_map_of(other)
+        if other_map is None:
+            return NotImplemented
+        return Nodes._from_name_map({**self.nodes.nodes, **other_map})
+
+    def __and__(self, other: Union["Nodes", BaseNode]) -> "Nodes":
+        """The nodes that are in both this :class:`Nodes` and ``other``."""
+        other_map = self._name_map_of(other)
+        if other_map is None:
+            return NotImplemented
+        small, large = sorted((self.nodes.nodes, other_map), key=len)
+        return Nodes._from_name_map(
+            {name: n for name, n in small.items() if large.get(name) == n}
+        )
+
+    def __sub__(self, other: Union["Nodes", BaseNode]) -> "Nodes":
+        """The nodes that are in this :class:`Nodes`, but not in ``other``."""
+        other_map = self._name_map_of(other)
+        if other_map is None:
+            return NotImplemented
+        return Nodes._from_name_map(
+            {
+                name: n
+                for name, n in self.nodes.nodes.items()
+                if other_map.get(name) != n
+            }
+        )
+
+    __ror__ = __or__
+    __rand__ = __and__
+
     def __eq__(self, other):
         return self.nodes == other.nodes
 
@@ -762,13 +898,26 @@ class Nodes:
         return self
 
     def walk_ancestors(self, order: WalkOrder = WalkOrder.DEPTH_FIRST):
-        """Walk over all of the ancestors of all of the nodes in this :class:`Nodes`, in the given order."""
-        return itertools.chain.from_iterable(
-            n.walk_ancestors(order=order) for n in self
-        )
+        """
+        Walk over all of the ancestors of all of the nodes in this :class:`Nodes`, in the given order.
+        Each ancestor is visited once, even if it is an ancestor of more than one of the nodes.
+        """
+        return self._walk(lambda n: n.parents, order)
 
     def walk_descendants(self, order: WalkOrder = WalkOrder.DEPTH_FIRST):
-        """Walk over all of the descendants of all of the nodes in this :class:`Nodes`, in the given order."""
-        return itertools.chain.from_iterable(
-            n.walk_descendants(order=order) for n in self
+        """
+        Walk over all of the descendants of all of the nodes in this :class:`Nodes`, in the given order.
+        Each descendant is visited once, even if it is a descendant of more than one of the nodes.
+        """
+        return self._walk(lambda n: n.children, order)
+
+    def _walk(self, add_to_stack, order: WalkOrder) -> Iterator[BaseNode]:
+        # a single walk from all of the nodes at once, so that the parts of the
+        # graph that they share are only walked once
+        if len(self) == 0:
+            return iter(())
+        return next(iter(self))._dag._walk(
+            initial_stack=itertools.chain.from_iterable(add_to_stack(n) for n in self),
+            add_to_stack=add_to_stack,
+            order=order,
         )
@@ -0,0 +1,173 @@
+# Copyright 2020 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import List, Iterable, Iterator
+
+from . import dag, node, exceptions
+
+
+class ReachabilityIndex:
+    """
+    A :class:`ReachabilityIndex` answers questions about which nodes of a
+    :class:`DAG` can be reached from which other nodes by following edges,
+    without walking the graph for each question.
+
+    Every node gets a position in a topological order of the graph, and the
+    descendants of each node are stored as a bitset: a Python :class:`int`
+    with one bit set for each descendant's position.
+    Building the index takes one pass over the graph in reverse topological
+    order; afterwards, :meth:`is_ancestor` is a single bit test and the
+    descendants of many nodes can be combined with bitwise ``|``.
+    The ancestor bitsets are only built the first time they are needed.
+
+    The bitsets take up to :math:`N^2` bits in total for :math:`N`
+    logical nodes, so this is meant for graphs of layers and subDAGs,
+    not of the (possibly much more numerous) underlying nodes.
+
+    Do not create one of these yourself; use :meth:`DAG.reachability`,
+    which reuses the index until the DAG's nodes or edges change.
+    The ``FINAL`` node is not part of the graph, so it is not in the index.
+
+    The ``order`` attribute is the list of indexed nodes, in the topological
+    order that the bit positions refer to (parents before children).
+    """
+
+    __slots__ = ("order", "_positions", "_descendants", "_ancestors", "_parents")
+
+    def __init__(self, dag: "dag.DAG"):
+        """
+        Parameters
+        ----------
+        dag
+            The DAG to index.
+        """
+        self.order = topological_order(dag)
+        self._positions = {n: idx for idx, n in enumerate(self.order)}
+
+        positions = self._positions
+        children = [[positions[c] for c in dag._edges.children_of(n)] for n in self.order]
+        self._parents = [[positions[p] for p in dag._edges.parents_of(n)] for n in self.order]
+
+        self._descendants = _closure(children, reversed(range(len(self.order))))
+        self._ancestors = None
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def __contains__(self, node) -> bool:
+        return node in self._positions
+
+    def is_ancestor(self, ancestor: node.BaseNode, descendant: node.BaseNode) -> bool:
+        """
+        Return ``True`` if ``descendant`` can be reached from ``ancestor``
+        by following edges from parents to children.
+        A node is not its own ancestor.
+        """
+        return bool((self._descendants[self._position(ancestor)] >> self._position(descendant)) & 1)
+
+    def is_descendant(self, descendant: node.BaseNode, ancestor: node.BaseNode) -> bool:
+        """
+        Return ``True`` if ``descendant`` can be reached from ``ancestor``
+        by following edges from parents to children.
+        A node is not its own descendant.
+        """
+        return self.is_ancestor(ancestor, descendant)
+
+    def descendants(self, *nodes: node.BaseNode) -> node.Nodes:
+        """
+        Return a :class:`Nodes` of all of the descendants of any of the ``nodes``.
+        """
+        return self._nodes_of(self._union(self._descendants, nodes))
+
+    def ancestors(self, *nodes: node.BaseNode) -> node.Nodes:
+        """
+        Return a :class:`Nodes` of all of the ancestors of any of the ``nodes``.
+        """
+        if self._ancestors is None:
+            self._ancestors = _closure(self._parents, range(len(self.order)))
+        return self._nodes_of(self._union(self._ancestors, nodes))
+
+    def descendant_bits(self, node: node.BaseNode) -> int:
+        """
+        Return the bitset of the descendants of the ``node``.
+        Bit ``i`` is set if ``order[i]`` is a descendant of the ``node``.
+        """
+        return self._descendants[self._position(node)]
+
+    def _position(self, n: node.BaseNode) -> int:
+        try:
+            return self._positions[n]
+        except KeyError:
+            raise exceptions.NodeNotInDAG("{} is not in the reachability index".format(n))
+
+    def _union(self, bitsets: List[int], nodes) -> int:
+        bits = 0
+        for n in node.Nodes(nodes):
+            bits |= bitsets[self._position(n)]
+        return bits
+
+    def _nodes_of(self, bits: int) -> node.Nodes:
+        return node.Nodes(self.order[idx] for idx in iter_bits(bits))
+
+
+def _closure(neighbours: List[List[int]], positions: Iterable[int]) -> List[int]:
+    """
+    Compute the transitive closure of ``neighbours`` as one bitset per position,
+    visiting ``positions`` so that every neighbour is visited before the
+    positions that point to it.
+    """
+    closure = [0] * len(neighbours)
+    for idx in positions:
+        bits = 0
+        for other in neighbours[idx]:
+            bits |= closure[other] | (1 << other)
+        closure[idx] = bits
+    return closure
+
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """Yield the positions of the set bits of ``bits``, from lowest to highest."""
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+
+def topological_order(dag: "dag.DAG") -> List[node.BaseNode]:
+    """
+    Return the nodes of the ``dag`` (not including the ``FINAL`` node)
+    in a topological order: every node comes after all of its parents.
+
+    Raises :class:`~exceptions.CycleInDAG` if there is no such order.
+    """
+    children_of = dag._edges.children_of
+    num_parents = {n: len(dag._edges.parents_of(n)) for n in dag._nodes}
+
+    order = [n for n, count in num_parents.items() if count == 0]
+    for n in order:
+        for c in children_of(n):
+            num_parents[c] -= 1
+            if num_parents[c] == 0:
+                order.append(c)
+
+    if len(order) != len(num_parents):
+        stuck = sorted(n.name for n, count in num_parents.items() if count > 0)
+        raise exceptions.CycleInDAG(
+            "the DAG has a cycle through (or downstream of) these nodes: {}".format(
+                ", ".join(stuck)
+            )
+        )
+
+    return order
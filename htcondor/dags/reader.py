@@ -0,0 +1,687 @@
+# Copyright 2020 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Optional, List, Dict, Tuple, Iterable, Iterator, Union, TYPE_CHECKING
+
+import collections
+import itertools
+import re
+from array import array
+from pathlib import Path
+
+from . import dag, node, edges, utils, exceptions
+from .formatter import NodeNameFormatter, SimpleFormatter
+
+if TYPE_CHECKING:  # pragma: no cover
+    import htcondor
+
+JOIN_NODE_LAYER_NAME = "__JOIN__"
+
+_VAR = re.compile(r'(\w[\w.+-]*)\s*=\s*"((?:[^"\\]|\\.)*)"')
+_ESCAPE = re.compile(r"\\(.)")
+
+# parent indices, child indices, and the ID of the join node between them (if any)
+Block = Tuple[Tuple[int, ...], Tuple[int, ...], Optional[int]]
+
+
+def read_dag(
+    dag_file: Path,
+    node_name_formatter: Optional[NodeNameFormatter] = None,
+    load_submit_descriptions: bool = True,
+) -> dag.DAG:
+    """
+    Read a DAG description file back into a :class:`DAG`.
+
+    The file is read one line at a time, so it is never held in memory as a
+    whole.
+    Underlying node names are grouped into logical nodes with the
+    ``node_name_formatter``: every underlying node that it maps to the same
+    name becomes part of the same :class:`NodeLayer`, with its index giving
+    its position in the layer (and its ``VARS`` giving the layer's
+    ``vars``).
+    Names that the formatter cannot parse become their own single-node
+    :class:`NodeLayer`. The settings of a logical node (``RETRY``,
+    ``SCRIPT``, ``PRIORITY``, etc.) are taken from its first underlying
+    node that has them.
+
+    The edges between each pair of logical nodes are compared against
+    :class:`ManyToMany`, :class:`OneToOne`, :class:`Grouper`,
+    :class:`Slicer`, and :class:`Window` edges that would write out the same
+    ``PARENT ... CHILD`` structure; if none of them do, a
+    :class:`SparseEdge` with exactly the underlying edges in the file is used.
+    Join nodes (see :class:`JoinNode`) written by :func:`write_dag` are
+    recognized by their name and folded back into these edges, and an edge
+    that uses the same join nodes as the file is preferred.
+
+    A DAG written by :func:`write_dag` and read back with this function
+    (with the same formatter) writes out the same DAG description file again,
+    as long as every edge in it connects at least one pair of nodes (an edge
+    that connects none leaves nothing in the file to read back).
+
+    Parameters
+    ----------
+    dag_file
+        The path to the DAG description file.
+    node_name_formatter
+        The :class:`NodeNameFormatter` that was used to write the DAG.
+        If not provided, the default is :class:`SimpleFormatter`.
+    load_submit_descriptions
+        If ``True``, submit files given by relative paths (like the ones
+        that :func:`write_dag` writes) are read into :class:`htcondor.Submit`
+        objects. Otherwise, and for absolute paths, the logical node's
+        ``submit_description`` is the absolute :class:`~pathlib.Path` to the
+        submit file.
+
+    Returns
+    -------
+    dag : :class:`DAG`
+        The reconstructed DAG.
+    """
+    return DAGReader(
+        node_name_formatter=node_name_formatter, load_submit_descriptions=load_submit_descriptions,
+    ).read(dag_file)
+
+
+class _LogicalNode:
+    """Everything we know about one logical node while reading the file."""
+
+    __slots__ = ("kind", "name", "file", "dir", "vars", "noop", "done", "kwargs")
+
+    def __init__(self, kind: str, name: str, file: str, dir: Optional[str]):
+        self.kind = kind
+        self.name = name
+        self.file = file
+        self.dir = dir
+        self.vars = []
+        self.noop = {}
+        self.done = {}
+        self.kwargs = {}
+
+    def vars_of(self, index: int) -> Dict[str, str]:
+        """Return the vars of the underlying node at ``index``, making room for it."""
+        if index >= len(self.vars):
+            self.vars.extend({} for _ in range(index + 1 - len(self.vars)))
+        return self.vars[index]
+
+
+class DAGReader:
+    """Not re-entrant!"""
+
+    def __init__(
+        self,
+        node_name_formatter: Optional[NodeNameFormatter] = None,
+        load_submit_descriptions: bool = True,
+    ):
+        """
+        Parameters
+        ----------
+        node_name_formatter
+            The :class:`NodeNameFormatter` that was used to write the DAG.
+            If not provided, the default is :class:`SimpleFormatter`.
+        load_submit_descriptions
+            If ``True``, read relative submit files into
+            :class:`htcondor.Submit` objects.
+        """
+        if node_name_formatter is None:
+            node_name_formatter = SimpleFormatter()
+        self.node_name_formatter = node_name_formatter
+        self.load_submit_descriptions = load_submit_descriptions
+
+        self._handlers = {
+            "JOB": self._read_job,
+            "SUBDAG": self._read_subdag,
+            "FINAL": self._read_final,
+            "VARS": self._read_vars,
+            "PARENT": self._read_parent,
+            "RETRY": self._read_retry,
+            "SCRIPT": self._read_script,
+            "PRE_SKIP": self._read_pre_skip,
+            "PRIORITY": self._read_priority,
+            "CATEGORY": self._read_category,
+            "MAXJOBS": self._read_maxjobs,
+            "ABORT-DAG-ON": self._read_abort,
+            "DONE": self._read_done,
+            "CONFIG": self._read_config,
+            "JOBSTATE_LOG": self._read_jobstate_log,
+            "NODE_STATUS_FILE": self._read_node_status_file,
+            "DOT": self._read_dot,
+            "SET_JOB_ATTR": self._read_set_job_attr,
+        }
+
+    def read(self, dag_file: Path) -> dag.DAG:
+        dag_file = Path(dag_file).absolute()
+        self.dag_dir = dag_file.parent
+
+        self.dag = dag.DAG()
+        self.nodes = {}  # logical node name -> _LogicalNode, in file order
+        self.blocks = collections.OrderedDict()  # (parent, child) -> [Block]
+        self.join_parents = collections.defaultdict(list)
+        self.join_children = collections.defaultdict(list)
+
+        with dag_file.open(mode="r") as f:
+            for line_number, line in enumerate(f, start=1):
+                parts = line.split(None, 1)
+                if len(parts) == 0 or parts[0].startswith("#"):
+                    continue
+
+                handler = self._handlers.get(parts[0]) or self._handlers.get(parts[0].upper())
+                if handler is None:
+                    raise exceptions.CannotReadDAGFile(
+                        "Line {} of {}: {} commands are not supported".format(
+                            line_number, dag_file, parts[0]
+                        )
+                    )
+
+                try:
+                    handler(parts[1].strip() if len(parts) > 1 else "")
+                except (IndexError, ValueError, KeyError) as e:
+                    raise exceptions.CannotReadDAGFile(
+                        "Line {} of {} could not be read: {!r}".format(
+                            line_number, dag_file, line.strip()
+                        )
+                    ) from e
+
+        self._build_nodes()
+        self._build_edges()
+
+        return self.dag
+
+    def _parse(self, name: str) -> Tuple[str, int]:
+        try:
+            return self.node_name_formatter.parse(name)
+        except (ValueError, exceptions.CannotInvertFormat):
+            return name, 0
+
+    def _node(self, name: str) -> Tuple[_LogicalNode, int]:
+        if name in self.nodes:  # the FINAL node, whose name is not formatted
+            return self.nodes[name], 0
+        layer, index = self._parse(name)
+        return self.nodes[layer], index
+
+    def _add_node(self, kind: str, rest: str) -> None:
+        parts = rest.split()
+        name, file, options = parts[0], parts[1], parts[2:]
+
+        if kind == "FINAL":
+            layer, index = name, 0
+        else:
+            layer, index = self._parse(name)
+        if layer == JOIN_NODE_LAYER_NAME:
+            return
+
+        dir = None
+        if "DIR" in options:
+            dir = options[options.index("DIR") + 1]
+
+        logical_node = self.nodes.get(layer)
+        if logical_node is None:
+            logical_node = self.nodes[layer] = _LogicalNode(kind, layer, file, dir)
+        logical_node.vars_of(index)
+
+        if "NOOP" in options:
+            logical_node.noop[index] = True
+        if "DONE" in options:
+            logical_node.done[index] = True
+
+    def _read_job(self, rest: str) -> None:
+        self._add_node("JOB", rest)
+
+    def _read_subdag(self, rest: str) -> None:
+        # the EXTERNAL keyword is optional
+        if rest.split(None, 1)[0].upper() == "EXTERNAL":
+            rest = rest.split(None, 1)[1]
+        self._add_node("SUBDAG", rest)
+
+    def _read_final(self, rest: str) -> None:
+        self._add_node("FINAL", rest)
+
+    def _read_vars(self, rest: str) -> None:
+        name, _, assignments = rest.partition(" ")
+        logical_node, index = self._node(name)
+        vars = logical_node.vars_of(index)
+        for key, value in _VAR.findall(assignments):
+            vars[key] = _ESCAPE.sub(r"\1", value) if "\\" in value else value
+
+    def _read_retry(self, rest: str) -> None:
+        parts = rest.split()
+        logical_node, _ = self._node(parts[0])
+        logical_node.kwargs.setdefault("retries", int(parts[1]))
+        if len(parts) > 3 and parts[2].upper() == "UNLESS-EXIT":
+            logical_node.kwargs.setdefault("retry_unless_exit", int(parts[3]))
+
+    def _read_script(self, rest: str) -> None:
+        parts = rest.split()
+        retry = parts[0].upper() == "DEFER"
+        if retry:
+            retry_status, retry_delay = int(parts[1]), int(parts[2])
+            parts = parts[3:]
+        else:
+            retry_status, retry_delay = 1, 0
+
+        which, name, executable, arguments = (
+            parts[0].lower(),
+            parts[1],
+            parts[2],
+            parts[3:],
+        )
+        logical_node, _ = self._node(name)
+        logical_node.kwargs.setdefault(
+            which,
+            node.Script(
+                executable=executable,
+                arguments=arguments,
+                retry=retry,
+                retry_status=retry_status,
+                retry_delay=retry_delay,
+            ),
+        )
+
+    def _read_pre_skip(self, rest: str) -> None:
+        name, code = rest.split()
+        logical_node, _ = self._node(name)
+        logical_node.kwargs.setdefault("pre_skip_exit_code", int(code))
+
+    def _read_priority(self, rest: str) -> None:
+        name, priority = rest.split()
+        logical_node, _ = self._node(name)
+        logical_node.kwargs.setdefault("priority", int(priority))
+
+    def _read_category(self, rest: str) -> None:
+        name, category = rest.split()
+        layer, _ = self._parse(name)
+        if layer in self.nodes or name in self.nodes:
+            logical_node, _ = self._node(name)
+            logical_node.kwargs.setdefault("category", category)
+        else:
+            # write_dag writes category throttles as CATEGORY lines
+            # before any of the nodes
+            self.dag.max_jobs_per_category[name] = int(category)
+
+    def _read_maxjobs(self, rest: str) -> None:
+        category, value = rest.split()
+        self.dag.max_jobs_per_category[category] = int(value)
+
+    def _read_abort(self, rest: str) -> None:
+        parts = rest.split()
+        logical_node, _ = self._node(parts[0])
+        return_value = None
+        if len(parts) > 3 and parts[2].upper() == "RETURN":
+            return_value = int(parts[3])
+        logical_node.kwargs.setdefault(
+            "abort",
+            node.DAGAbortCondition(node_exit_value=int(parts[1]), dag_return_value=return_value),
+        )
+
+    def _read_done(self, rest: str) -> None:
+        logical_node, index = self._node(rest.split()[0])
+        logical_node.done[index] = True
+
+    def _read_config(self, rest: str) -> None:
+        path = self._path(rest.split()[0])
+        for line in path.read_text().splitlines():
+            key, sep, value = line.partition("=")
+            if sep == "" or key.strip().startswith("#"):
+                continue
+            self.dag.dagman_config[key.strip()] = value.strip()
+
+    def _read_jobstate_log(self, rest: str) -> None:
+        self.dag.jobstate_log = Path(rest.split()[0])
+
+    def _read_node_status_file(self, rest: str) -> None:
+        parts = rest.split()
+        update_time = None
+        if len(parts) > 1 and parts[1].upper() != "ALWAYS-UPDATE":
+            update_time = int(parts[1])
+        self.dag.node_status_file = dag.NodeStatusFile(
+            path=parts[0],
+            update_time=update_time,
+            always_update=parts[-1].upper() == "ALWAYS-UPDATE",
+        )
+
+    def _read_dot(self, rest: str) -> None:
+        parts = rest.split()
+        options = [p.upper() for p in parts[1:]]
+        include_file = None
+        if "INCLUDE" in options:
+            include_file = parts[1 + options.index("INCLUDE") + 1]
+        self.dag.dot_config = dag.DotConfig(
+            path=parts[0],
+            update="UPDATE" in options,
+            overwrite="DONT-OVERWRITE" not in options,
+            include_file=include_file,
+        )
+
+    def _read_set_job_attr(self, rest: str) -> None:
+        key, _, value = rest.partition("=")
+        self.dag.dagman_job_attrs[key.strip()] = value.strip()
+
+    def _read_parent(self, rest: str) -> None:
+        names = rest.split()
+        if len(names) == 3 and names[1] == "CHILD":
+            # the common case of a single edge between two nodes
+            parent, child = self._parse(names[0]), self._parse(names[2])
+            if JOIN_NODE_LAYER_NAME not in (parent[0], child[0]):
+                self.blocks.setdefault((parent[0], child[0]), []).append(
+                    ((parent[1],), (child[1],), None)
+                )
+                return
+        split = [name.upper() for name in names].index("CHILD")
+        parents = [self._parse(name) for name in names[:split]]
+        children = [self._parse(name) for name in names[split + 1 :]]
+
+        parent_joins = [index for layer, index in parents if layer == JOIN_NODE_LAYER_NAME]
+        child_joins = [index for layer, index in children if layer == JOIN_NODE_LAYER_NAME]
+        parents = [p for p in parents if p[0] != JOIN_NODE_LAYER_NAME]
+        children = [c for c in children if c[0] != JOIN_NODE_LAYER_NAME]
+
+        if len(parent_joins) > 0 and len(child_joins) > 0:
+            raise ValueError("join nodes cannot be connected to each other")
+
+        for join in parent_joins:
+            self.join_children[join].extend(children)
+        for join in child_joins:
+            self.join_parents[join].extend(parents)
+        if len(parent_joins) == 0 and len(child_joins) == 0:
+            self._add_blocks(parents, children)
+
+        for join in parent_joins + child_joins:
+            self._reserve_blocks(join)
+
+    def _add_blocks(
+        self,
+        parents: List[Tuple[str, int]],
+        children: List[Tuple[str, int]],
+        join: Optional[int] = None,
+    ) -> None:
+        """Record that every one of the ``parents`` is a parent of every one of the ``children``."""
+        for parent_layer, parent_indices in _group_by_layer(parents):
+            for child_layer, child_indices in _group_by_layer(children):
+                self.blocks.setdefault((parent_layer, child_layer), []).append(
+                    (parent_indices, child_indices, join)
+                )
+
+    def _reserve_blocks(self, join: int) -> None:
+        """
+        Once both sides of a join node have been seen, make sure the pairs of
+        logical nodes it connects keep their place in the order of the edges,
+        so that they are written back out in the same order (and with the
+        same join node numbers).
+        """
+        if join not in self.join_parents or join not in self.join_children:
+            return
+        for parent_layer, _ in _group_by_layer(self.join_parents[join]):
+            for child_layer, _ in _group_by_layer(self.join_children[join]):
+                self.blocks.setdefault((parent_layer, child_layer), [])
+
+    def _path(self, path: str) -> Path:
+        return self.dag_dir / path
+
+    def _submit_description(self, file: str) -> Union["htcondor.Submit", Path]:
+        if Path(file).is_absolute():
+            return Path(file)
+
+        path = self._path(file)
+        if self.load_submit_descriptions and path.exists():
+            return utils.bindings().Submit(path.read_text())
+        return path
+
+    def _build_nodes(self) -> None:
+        for logical_node in self.nodes.values():
+            kwargs = dict(logical_node.kwargs, name=logical_node.name)
+            if logical_node.dir is not None:
+                kwargs["dir"] = logical_node.dir
+            if len(logical_node.noop) > 0:
+                kwargs["noop"] = logical_node.noop
+            if len(logical_node.done) > 0:
+                kwargs["done"] = logical_node.done
+
+            if logical_node.kind == "JOB":
+                self.dag.layer(
+                    submit_description=self._submit_description(logical_node.file),
+                    vars=logical_node.vars,
+                    **kwargs,
+                )
+            elif logical_node.kind == "SUBDAG":
+                self.dag.subdag(dag_file=Path(logical_node.file), **kwargs)
+            elif logical_node.kind == "FINAL":
+                self.dag.final(
+                    submit_description=self._submit_description(logical_node.file), **kwargs,
+                )
+
+    def _build_edges(self) -> None:
+        for join in sorted(self.join_parents.keys() | self.join_children.keys()):
+            self._add_blocks(self.join_parents[join], self.join_children[join], join=join)
+
+        # the edges are recovered in the order they were written in, so that
+        # they use the same join nodes when they are written out again
+        join_factory = edges.JoinFactory()
+        for (parent_name, child_name), blocks in self.blocks.items():
+            try:
+                parent = self.dag._nodes[parent_name]
+                child = self.dag._nodes[child_name]
+            except KeyError as e:
+                raise exceptions.CannotReadDAGFile(
+                    "Edge between {} and {} refers to a node with no JOB line".format(
+                        parent_name, child_name
+                    )
+                ) from e
+            parent.add_children(child, edge=_recover_edge(parent, child, blocks, join_factory))
+
+
+def _group_by_layer(nodes: Iterable[Tuple[str, int]],) -> Iterator[Tuple[str, Tuple[int, ...]]]:
+    grouped = collections.OrderedDict()
+    for layer, index in nodes:
+        grouped.setdefault(layer, []).append(index)
+    for layer, indices in grouped.items():
+        yield layer, tuple(indices)
+
+
+def _recover_edge(
+    parent: node.BaseNode,
+    child: node.BaseNode,
+    blocks: List[Block],
+    join_factory: edges.JoinFactory,
+) -> edges.BaseEdge:
+    """
+    Find an edge between ``parent`` and ``child`` that produces exactly the
+    given ``blocks``, each of which gives parent and child indices where
+    every parent is connected to every child (directly, or through the join
+    node with the given ID).
+
+    An edge that writes out exactly the same lines (the same indices, in the
+    same order, with the same join nodes) is preferred; otherwise, the first
+    edge that writes out the same lines with different join nodes is used.
+    If there is none, the parents of each child in the resulting
+    :class:`SparseEdge` are kept in the order they were written in.
+    ``join_factory`` is where :func:`write_dag` was when it wrote this edge;
+    it is moved past the join nodes that the recovered edge uses.
+    """
+    observed = _normalize(blocks)
+    lines = sorted((p, c) for p, c, _ in blocks)
+
+    num_parent_vars, num_child_vars = len(parent), len(child)
+    if blocks == [(tuple(range(num_parent_vars)), tuple(range(num_child_vars)), None)]:
+        return edges.ManyToMany()
+    if num_parent_vars == num_child_vars == len(observed) and all(
+        p == c == (i,) and join is None for i, (p, c, join) in enumerate(sorted(blocks))
+    ):
+        return edges.OneToOne()
+
+    layout = collections.Counter(blocks)
+    first_join = join_factory.count
+    match = window = None
+    candidates = itertools.chain(
+        (edges.ManyToMany(), edges.OneToOne()),
+        _candidate_edges(observed, num_parent_vars, num_child_vars),
+    )
+    for candidate in candidates:
+        if isinstance(candidate, edges.Window) and candidate.compress:
+            window = candidate
+        join_factory.count = first_join
+        generated = _generate(candidate, parent, child, join_factory)
+        if generated is None:
+            continue
+        if collections.Counter(generated) == layout:
+            return candidate
+        if match is None and sorted((p, c) for p, c, _ in generated) == lines:
+            match = candidate, join_factory.count
+
+    if window is not None:
+        join_factory.count = first_join
+        for candidate in _wider_windows(parent, child, window, blocks, join_factory):
+            join_factory.count = first_join
+            generated = _generate(candidate, parent, child, join_factory)
+            if generated is not None and collections.Counter(generated) == layout:
+                return candidate
+
+    if match is not None:
+        candidate, join_factory.count = match
+        return candidate
+
+    join_factory.count = first_join
+    # keep the parents of each child in the order they were written in
+    rows = collections.defaultdict(dict)
+    for ps, cs, _ in blocks:
+        for c in cs:
+            rows[c].update(dict.fromkeys(ps))
+    children = sorted(rows)
+    return edges.SparseEdge(
+        array("q", (p for c in children for p in rows[c])),
+        array("q", (c for c in children for _ in rows[c])),
+    )
+
+
+def _generate(
+    edge: edges.BaseEdge,
+    parent: node.BaseNode,
+    child: node.BaseNode,
+    join_factory: edges.JoinFactory,
+) -> Optional[List[Block]]:
+    """The blocks that ``edge`` writes out, or ``None`` if it can't connect the layers."""
+    try:
+        return _resolve_joins(edge.get_edges(parent, child, join_factory))
+    except (exceptions.DAGsException, ValueError, IndexError):
+        return None
+
+
+def _normalize(blocks: Iterable[Block]) -> List[Tuple[Tuple[int, ...], Tuple[int, ...]]]:
+    """Sort the ``blocks`` and their indices, forgetting about join nodes."""
+    return sorted((_sorted_indices(p), _sorted_indices(c)) for p, c, _ in blocks)
+
+
+def _sorted_indices(indices: Tuple[int, ...]) -> Tuple[int, ...]:
+    return indices if len(indices) == 1 else tuple(sorted(set(indices)))
+
+
+def _resolve_joins(generated) -> List[Block]:
+    """Turn the output of :meth:`BaseEdge.get_edges` into blocks."""
+    blocks = []
+    join_parents, join_children = {}, {}
+    for p, c in generated:
+        if isinstance(c, edges.JoinNode):
+            join_parents[c] = p
+        elif isinstance(p, edges.JoinNode):
+            join_children[p] = c
+        else:
+            blocks.append((p, c, None))
+    for join, p in join_parents.items():
+        blocks.append((p, join_children.get(join, ()), join.id))
+    return blocks
+
+
+def _candidate_edges(
+    observed: List[Tuple[Tuple[int, ...], Tuple[int, ...]]],
+    num_parent_vars: int,
+    num_child_vars: int,
+) -> Iterator[edges.BaseEdge]:
+    first_parents, first_children = observed[0]
+    yield edges.Grouper(len(first_parents), len(first_children))
+    yield edges.Grouper(len(first_parents), len(first_children), ragged=True)
+    yield edges.Grouper(
+        parent_boundaries=[p[0] for p, _ in observed[1:]],
+        child_boundaries=[c[0] for _, c in observed[1:]],
+    )
+
+    if all(len(p) == 1 and len(c) == 1 for p, c in observed):
+        parents = [p[0] for p, _ in observed]
+        children = [c[0] for _, c in observed]
+        parent_slice, child_slice = _as_slice(parents), _as_slice(children)
+        if parent_slice is not None and child_slice is not None:
+            for parent_stop in (None, parents[-1] + 1):
+                for child_stop in (None, children[-1] + 1):
+                    yield edges.Slicer(
+                        slice(parent_slice.start, parent_stop, parent_slice.step),
+                        slice(child_slice.start, child_stop, child_slice.step),
+                    )
+
+    before = max(c - ps[0] for ps, cs in observed for c in cs)
+    after = max(ps[-1] - c for ps, cs in observed for c in cs)
+    width = before + after + 1
+    num_edges = sum(len(ps) * len(cs) for ps, cs in observed)
+    # children past the last parent's window have no parents at all
+    num_windows = min(num_child_vars, num_parent_vars + before)
+    # don't generate a huge window edge for something that is obviously not one
+    if before >= 0 and after >= 0 and width * num_windows <= 2 * num_edges + width * width:
+        yield edges.Window(before, after)
+        yield edges.Window(before, after, compress=False)
+
+
+def _wider_windows(
+    parent: node.BaseNode,
+    child: node.BaseNode,
+    window: edges.Window,
+    blocks: List[Block],
+    join_factory: edges.JoinFactory,
+) -> Iterator[edges.Window]:
+    """
+    A window that reaches past the ends of the parent layer is cut off there,
+    so only the part of it that is inside the layer shows up in the file,
+    but its full width still decides how many children share a join node.
+    Yield the narrowest windows that are wider than ``window`` (on either
+    side) and put as many children behind a join node as the ``blocks`` do.
+    """
+    target = max((len(cs) for _, cs, join in blocks if join is not None), default=0)
+
+    def block_size(extra: int) -> int:
+        wider = edges.Window(window.before + extra, window.after)
+        return wider._layer_block_size(parent, child, join_factory)
+
+    if block_size(0) >= target:
+        return
+
+    # the block size grows with the width of the window
+    low, high = 0, 1
+    while block_size(high) < target:
+        low, high = high, 2 * high
+    while high - low > 1:
+        middle = (low + high) // 2
+        if block_size(middle) < target:
+            low = middle
+        else:
+            high = middle
+
+    yield edges.Window(window.before, window.after + high)
+    yield edges.Window(window.before + high, window.after)
+
+
+def _as_slice(indices: List[int]) -> Optional[slice]:
+    """
+    Return the slice (without a stop) that produces the ``indices``,
+    if there is one.
+    """
+    step = indices[1] - indices[0] if len(indices) > 1 else 1
+    if step <= 0 or indices != list(range(indices[0], indices[-1] + 1, step)):
+        return None
+    return slice(indices[0] or None, None, None if step == 1 else step)
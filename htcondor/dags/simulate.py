@@ -0,0 +1,319 @@
+# Copyright 2020 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Optional, Dict, Mapping, Union, Callable
+
+import heapq
+import itertools
+import random
+from array import array
+
+from . import dag, utils
+from .expand import ExpandedGraph
+
+Runtime = Union[float, Callable[[random.Random], float]]
+
+
+class SimulationResult:
+    """
+    The result of :func:`simulate`.
+
+    Attributes
+    ----------
+    makespan
+        When the last node (including the ``FINAL`` node) finished.
+    peak_running
+        The largest number of jobs that were running at the same time.
+    peak_queued
+        The largest number of jobs that were in the queue (submitted by
+        DAGMan, idle or running) at the same time.
+    num_jobs
+        The number of underlying nodes (not including join nodes).
+    num_joins
+        The number of join nodes.
+    num_attempts
+        How many times jobs were run, including retries.
+    num_failed
+        The number of underlying nodes that failed, even after retrying.
+    num_unrun
+        The number of underlying nodes that never ran because one of their
+        ancestors failed.
+    layer_start
+        When the first underlying node of each logical node started running.
+    layer_finish
+        When the last underlying node of each logical node finished.
+    """
+
+    __slots__ = (
+        "makespan",
+        "peak_running",
+        "peak_queued",
+        "num_jobs",
+        "num_joins",
+        "num_attempts",
+        "num_failed",
+        "num_unrun",
+        "layer_start",
+        "layer_finish",
+    )
+
+    def __init__(self, **kwargs):
+        for k, v in kwargs.items():
+            setattr(self, k, v)
+
+    def __repr__(self) -> str:
+        return utils.make_repr(
+            self,
+            ("makespan", "peak_running", "peak_queued", "num_attempts", "num_failed", "num_unrun",),
+        )
+
+
+def simulate(
+    dag: "dag.DAG",
+    runtimes: Optional[Mapping[str, Runtime]] = None,
+    slots: Optional[int] = None,
+    max_jobs: Optional[int] = None,
+    max_jobs_by_category: Optional[Mapping[str, int]] = None,
+    failure_rates: Optional[Mapping[str, float]] = None,
+    use_priorities: bool = True,
+    default_runtime: float = 0,
+    seed: Optional[int] = None,
+) -> SimulationResult:
+    """
+    Simulate running the ``dag`` under DAGMan, to predict how long it will
+    take and how many jobs it will put in the queue at once.
+
+    The DAG is expanded into its underlying nodes and join nodes, exactly as
+    it would be written out.
+    Whenever a node's parents have all finished, DAGMan submits it, unless
+    that would go over ``max_jobs`` or the limit for its category, in which
+    case it waits; waiting nodes are submitted in ``priority`` order.
+    Submitted jobs run on the first free one of ``slots`` slots,
+    also in ``priority`` order.
+    Join nodes and nodes marked ``noop`` finish as soon as they are ready,
+    without being submitted, and nodes marked ``done`` are finished from the
+    start.
+    A job that fails is resubmitted until it has been retried ``retries``
+    times; if it still fails, none of its descendants run.
+    The ``FINAL`` node runs after everything else.
+    ``PRE`` and ``POST`` scripts are not simulated.
+
+    Parameters
+    ----------
+    dag
+        The DAG to simulate.
+    runtimes
+        A mapping of logical node names to the runtime of each of their
+        underlying nodes: either a number, or a function that takes a
+        :class:`random.Random` and returns a sampled runtime
+        (for example, ``lambda rng: rng.expovariate(1 / 60)``).
+        Logical nodes that are not in the mapping use their own ``runtime``.
+    slots
+        The number of jobs that can run at the same time.
+        If ``None``, there is no limit.
+    max_jobs
+        The maximum number of jobs DAGMan will have in the queue at once
+        (DAGMan's ``-maxjobs``). If ``None``, there is no limit.
+    max_jobs_by_category
+        The maximum number of jobs in each category that DAGMan will have in
+        the queue at once. If ``None``, the DAG's own limits are used.
+    failure_rates
+        A mapping of logical node names to the probability that each attempt
+        to run one of their underlying nodes fails.
+    use_priorities
+        If ``False``, node priorities are ignored, and ready nodes are
+        submitted and run in the order they became ready.
+    default_runtime
+        The runtime of underlying nodes that have no runtime from
+        ``runtimes`` or their own ``runtime``.
+    seed
+        The seed for the random number generator that runtime distributions
+        and failures use.
+    """
+    graph = ExpandedGraph(dag)
+    rng = random.Random(seed)
+
+    if max_jobs_by_category is None:
+        max_jobs_by_category = dag.max_jobs_per_category
+    runtimes = runtimes or {}
+    failure_rates = failure_rates or {}
+
+    # per-layer settings, indexed by layer ID
+    layers = graph.layers
+    samplers = [_sampler(runtimes.get(n.name, n.runtime), default_runtime, rng) for n in layers]
+    failure_rate = [failure_rates.get(n.name, 0) for n in layers]
+    max_attempts = [(n.retries or 0) + 1 for n in layers]
+    priority = [n.priority if use_priorities else 0 for n in layers]
+    category = [n.category if n.category in max_jobs_by_category else None for n in layers]
+    noop = [{idx for idx, flag in n.noop.items() if flag} for n in layers]
+    done = [{idx for idx, flag in n.done.items() if flag} for n in layers]
+
+    num_nodes = graph.num_nodes
+    offsets = graph.offsets
+    layer_ids = graph.layer_ids
+    child_offsets = graph.child_offsets
+    children = graph.children
+    remaining = array("l", graph.num_parents)
+    # 0 = waiting for parents, 1 = ready (waiting, queued, or running), 2 = finished
+    state = bytearray(len(graph))
+    attempts = {}
+
+    layer_start = [None] * len(layers)
+    layer_finish = [None] * len(layers)
+
+    sequence = itertools.count()
+    waiting = {c: [] for c in set(category)}
+    limits = {c: max_jobs_by_category[c] for c in waiting if c is not None}
+    in_category = dict.fromkeys(limits, 0)
+    queue = []
+    events = []
+
+    now = 0
+    num_queued = num_running = 0
+    peak_queued = peak_running = 0
+    num_attempts = num_failed = 0
+
+    def ready(n: int) -> bool:
+        """Make ``n`` ready, and return whether it finishes immediately."""
+        nonlocal num_queued
+        state[n] = 1
+        if n >= num_nodes:
+            return True
+        layer_id = layer_ids[n]
+        if n - offsets[layer_id] in noop[layer_id]:
+            return True
+        entry = (-priority[layer_id], next(sequence), n)
+        if max_jobs is None and category[layer_id] is None:
+            # nothing can hold it back, so it goes straight into the queue
+            heapq.heappush(queue, entry)
+            num_queued += 1
+        else:
+            heapq.heappush(waiting[category[layer_id]], entry)
+        return False
+
+    def finish(n: int) -> None:
+        # finishing a node can make children ready that finish immediately
+        stack = [n]
+        while len(stack) > 0:
+            n = stack.pop()
+            state[n] = 2
+            if n < num_nodes:
+                layer_finish[layer_ids[n]] = now
+            for c in children[child_offsets[n] : child_offsets[n + 1]]:
+                remaining[c] -= 1
+                if remaining[c] == 0 and state[c] == 0 and ready(c):
+                    stack.append(c)
+
+    # nodes that are already done are finished from the start, but their
+    # children only become ready once all of their parents are finished
+    for layer_id, indexes in enumerate(done):
+        for idx in indexes:
+            if idx < len(layers[layer_id]):
+                n = offsets[layer_id] + idx
+                state[n] = 2
+                for c in children[child_offsets[n] : child_offsets[n + 1]]:
+                    remaining[c] -= 1
+    for n in range(len(graph)):
+        if remaining[n] == 0 and state[n] == 0 and ready(n):
+            finish(n)
+
+    while True:
+        # DAGMan submits waiting nodes, as far as the throttles allow
+        while max_jobs is None or num_queued < max_jobs:
+            best = None
+            for c, heap in waiting.items():
+                if len(heap) == 0 or (c is not None and in_category[c] >= limits[c]):
+                    continue
+                if best is None or heap[0] < best[1][0]:
+                    best = (c, heap)
+            if best is None:
+                break
+            c, heap = best
+            entry = heapq.heappop(heap)
+            if c is not None:
+                in_category[c] += 1
+            heapq.heappush(queue, entry)
+            num_queued += 1
+        peak_queued = max(peak_queued, num_queued)
+
+        # the pool runs queued jobs on free slots
+        while len(queue) > 0 and (slots is None or num_running < slots):
+            _, _, n = heapq.heappop(queue)
+            layer_id = layer_ids[n]
+            if layer_start[layer_id] is None:
+                layer_start[layer_id] = now
+            runtime = samplers[layer_id](n - offsets[layer_id])
+            heapq.heappush(events, (now + runtime, next(sequence), n))
+            num_running += 1
+            num_attempts += 1
+        peak_running = max(peak_running, num_running)
+
+        if len(events) == 0:
+            break
+
+        # handle every job that finishes at this time before submitting more
+        now = events[0][0]
+        while len(events) > 0 and events[0][0] == now:
+            _, _, n = heapq.heappop(events)
+            num_running -= 1
+            num_queued -= 1
+            layer_id = layer_ids[n]
+            if category[layer_id] is not None:
+                in_category[category[layer_id]] -= 1
+
+            if failure_rate[layer_id] > 0 and rng.random() < failure_rate[layer_id]:
+                attempts[n] = attempts.get(n, 1) + 1
+                if attempts[n] <= max_attempts[layer_id]:
+                    ready(n)
+                else:
+                    num_failed += 1
+                continue
+
+            finish(n)
+
+    num_unrun = num_nodes - state[:num_nodes].count(2) - num_failed
+
+    makespan = now
+    final = dag._final_node
+    if final is not None:
+        sampler = _sampler(runtimes.get(final.name, final.runtime), default_runtime, rng)
+        makespan += sampler(0)
+        num_attempts += 1
+
+    return SimulationResult(
+        makespan=makespan,
+        peak_running=peak_running,
+        peak_queued=peak_queued,
+        num_jobs=num_nodes,
+        num_joins=graph.num_joins,
+        num_attempts=num_attempts,
+        num_failed=num_failed,
+        num_unrun=num_unrun,
+        layer_start={n: t for n, t in zip(layers, layer_start) if t is not None},
+        layer_finish={n: t for n, t in zip(layers, layer_finish) if t is not None},
+    )
+
+
+def _sampler(
+    runtime: Union[None, Runtime, Dict[int, float]], default_runtime: float, rng: random.Random,
+) -> Callable[[int], float]:
+    """Return a function from an underlying node's index to its runtime."""
+    if runtime is None:
+        return lambda idx: default_runtime
+    if callable(runtime):
+        return lambda idx: runtime(rng)
+    if isinstance(runtime, dict):
+        return lambda idx: runtime.get(idx, default_runtime)
+    return lambda idx: runtime
@@ -0,0 +1,451 @@
+# Copyright 2020 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Any, Dict, Iterator, List, Tuple
+
+import array
+import importlib
+import json
+import mmap
+import struct
+import sys
+from pathlib import Path
+
+from . import dag, node, edges, utils, exceptions
+
+MAGIC = b"HTCDAGS\n"
+FORMAT_VERSION = 1
+
+# magic, format version, header length
+_PREAMBLE = struct.Struct("<8sIQ")
+
+# the DAG attributes that are stored, besides its nodes and edges
+_DAG_ATTRIBUTES = (
+    "dagman_config",
+    "dagman_job_attrs",
+    "max_jobs_per_category",
+    "dot_config",
+    "jobstate_log",
+    "node_status_file",
+)
+
+# noop/done (and similar) dictionaries bigger than this are stored as arrays
+_ARRAY_DICT_THRESHOLD = 64
+
+
+def dump(dag: "dag.DAG", path: Path) -> Path:
+    """
+    Write the ``dag`` to ``path`` in a compact binary format that
+    :func:`load` can read back quickly.
+
+    The file starts with a small JSON header that describes the DAG
+    configuration, the logical nodes (referred to by their position in the
+    header), and one record for each edge with its parameters.
+    Submit descriptions are stored as their text.
+    Bulk data (the ``vars`` of each :class:`NodeLayer`, stored one column per
+    key, large ``noop``/``done`` dictionaries, and the index arrays of
+    :class:`SparseEdge`) follows the header as raw arrays.
+
+    Parameters
+    ----------
+    dag
+        The DAG to store.
+    path
+        The path to write the file to.
+
+    Returns
+    -------
+    path : :class:`pathlib.Path`
+        The path the file was written to.
+    """
+    path = Path(path)
+    encoder = _Encoder()
+
+    nodes = list(dag._nodes)
+    ids = {n: i for i, n in enumerate(nodes)}
+    header = {
+        "byteorder": sys.byteorder,
+        "dag": {attr: encoder.encode(getattr(dag, attr)) for attr in _DAG_ATTRIBUTES},
+        "nodes": [encoder.encode_node(n) for n in nodes],
+        "final": (None if dag._final_node is None else encoder.encode_node(dag._final_node)),
+        "edges": [
+            [ids[parent], ids[child], encoder.encode(edge)]
+            for (parent, child), edge in dag._edges.items()
+        ],
+        "submit_descriptions": encoder.submit_descriptions,
+    }
+
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    with path.open(mode="wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(bytes(_padding(_PREAMBLE.size + len(header_bytes))))
+        for chunk in encoder.chunks:
+            f.write(chunk)
+
+    return path
+
+
+def load(path: Path) -> "dag.DAG":
+    """
+    Read a DAG written by :func:`dump`.
+
+    The file is memory-mapped, and only the header is parsed up front.
+    The ``vars`` of each :class:`NodeLayer` are decoded the first time they
+    are used, and the index arrays of :class:`SparseEdge` are used directly
+    from the mapped file.
+
+    Parameters
+    ----------
+    path
+        The path to the file to read.
+
+    Returns
+    -------
+    dag : :class:`DAG`
+        The stored DAG.
+    """
+    path = Path(path)
+    with path.open(mode="rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # the file is empty
+            mapped = b""
+
+    if len(mapped) < _PREAMBLE.size:
+        raise exceptions.CannotLoadDAG("{} is not a stored DAG".format(path))
+    magic, version, header_length = _PREAMBLE.unpack_from(mapped)
+    if magic != MAGIC:
+        raise exceptions.CannotLoadDAG("{} is not a stored DAG".format(path))
+    if version > FORMAT_VERSION:
+        raise exceptions.CannotLoadDAG(
+            "{} was stored in format version {}, but only versions up to {} can be read".format(
+                path, version, FORMAT_VERSION
+            )
+        )
+
+    header_end = _PREAMBLE.size + header_length
+    header = json.loads(bytes(mapped[_PREAMBLE.size : header_end]))
+    if header["byteorder"] != sys.byteorder:
+        raise exceptions.CannotLoadDAG(
+            "{} was stored on a {}-endian machine".format(path, header["byteorder"])
+        )
+
+    data = memoryview(mapped)[header_end + _padding(header_end) :]
+    decoder = _Decoder(data, header["submit_descriptions"])
+
+    d = dag.DAG()
+    for attr in _DAG_ATTRIBUTES:
+        setattr(d, attr, decoder.decode(header["dag"][attr]))
+
+    nodes = [decoder.decode_node(record, d) for record in header["nodes"]]
+    d._nodes.add(*nodes)
+    if header["final"] is not None:
+        d._final_node = decoder.decode_node(header["final"], d)
+
+    for parent, child, edge in header["edges"]:
+        d._edges.add(nodes[parent], nodes[child], decoder.decode(edge))
+
+    return d
+
+
+def _padding(n: int) -> int:
+    """The number of bytes needed to bring ``n`` up to a multiple of 8."""
+    return -n % 8
+
+
+def _class_path(cls: type) -> str:
+    return "{}:{}".format(cls.__module__, cls.__qualname__)
+
+
+def _storable_classes() -> Tuple[type, ...]:
+    """Only these kinds of objects (and their subclasses) are stored field-by-field."""
+    return (
+        node.BaseNode,
+        node.Script,
+        node.DAGAbortCondition,
+        edges.BaseEdge,
+        dag.DotConfig,
+        dag.NodeStatusFile,
+    )
+
+
+class _Encoder:
+    """Turns objects into JSON-compatible values, collecting bulk data on the side."""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+        self.submit_descriptions = []
+        self.submit_ids = {}
+
+    def add_bytes(self, data: bytes) -> Dict[str, int]:
+        offset = self.size
+        self.chunks.append(data)
+        self.chunks.append(bytes(_padding(len(data))))
+        self.size += len(data) + _padding(len(data))
+        return {"offset": offset, "size": len(data)}
+
+    def add_array(self, values) -> Dict[str, Any]:
+        view = memoryview(values)
+        if len(view.format.lstrip("@")) != 1:
+            # only native formats can be cast back to when loading
+            view = memoryview(array.array("q", view.tolist()))
+        record = self.add_bytes(view.tobytes())
+        record["format"] = view.format
+        return record
+
+    def encode_node(self, n: "node.BaseNode") -> Dict[str, Any]:
+        instance_dict, slots = utils.slot_state(n)
+        slots.pop("_dag", None)
+        record = {
+            "type": _class_path(type(n)),
+            "slots": {k: self.encode(v) for k, v in slots.items() if k != "_vars"},
+        }
+        if instance_dict:
+            record["dict"] = {k: self.encode(v) for k, v in instance_dict.items()}
+        if isinstance(n, node.NodeLayer):
+            record["vars"] = self.encode_vars(n.vars)
+        return record
+
+    def encode_vars(self, rows: List[Dict[str, str]]) -> Dict[str, Any]:
+        """
+        Store the ``rows`` one column per key, if every value is a string
+        and the keys of every row are in the same order;
+        otherwise, fall back to storing them as JSON.
+        """
+        keys = {}
+        for row in rows:
+            keys.update(dict.fromkeys(row))
+        keys = list(keys)
+
+        columnar = True
+        orders = set()
+        for row in rows:
+            order = tuple(row)
+            if order not in orders:
+                if list(order) != [k for k in keys if k in row]:
+                    columnar = False
+                    break
+                orders.add(order)
+        if columnar:
+            for key in keys:
+                if not all(
+                    isinstance(row[key], str) and "\0" not in row[key] for row in rows if key in row
+                ):
+                    columnar = False
+                    break
+
+        if not columnar:
+            return {
+                "length": len(rows),
+                "json": self.add_bytes(
+                    json.dumps([self.encode(row) for row in rows], separators=(",", ":")).encode(
+                        "utf-8"
+                    )
+                ),
+            }
+
+        columns = []
+        for key in keys:
+            present = [i for i, row in enumerate(rows) if key in row]
+            values = "\0".join(rows[i][key] for i in present).encode("utf-8")
+            columns.append(
+                [
+                    key,
+                    self.add_bytes(values),
+                    (
+                        None
+                        if len(present) == len(rows)
+                        else self.add_array(array.array("q", present))
+                    ),
+                ]
+            )
+        return {"length": len(rows), "columns": columns}
+
+    def encode(self, value: Any) -> Any:
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if utils.is_submit(value):
+            key = id(value)
+            if key not in self.submit_ids:
+                self.submit_ids[key] = len(self.submit_descriptions)
+                self.submit_descriptions.append(str(value))
+            return {"submit": self.submit_ids[key]}
+        if isinstance(value, Path):
+            return {"path": str(value)}
+        if isinstance(value, dict):
+            return self.encode_dict(value)
+        if isinstance(value, list):
+            return {"list": [self.encode(v) for v in value]}
+        if isinstance(value, tuple):
+            return {"tuple": [self.encode(v) for v in value]}
+        if isinstance(value, slice):
+            return {"slice": [value.start, value.stop, value.step]}
+        if isinstance(value, (memoryview, array.array)):
+            return {"array": self.add_array(value)}
+        if isinstance(value, _storable_classes()):
+            instance_dict, slots = utils.slot_state(value)
+            return {
+                "object": _class_path(type(value)),
+                "state": {k: self.encode(v) for k, v in dict(instance_dict or {}, **slots).items()},
+            }
+
+        raise exceptions.CannotDumpDAG(
+            "Cannot store {!r} (of type {})".format(value, type(value).__name__)
+        )
+
+    def encode_dict(self, value: dict) -> Dict[str, Any]:
+        # big dictionaries from node indices to numbers (like noop, done,
+        # and runtime) are stored as a pair of arrays
+        if len(value) > _ARRAY_DICT_THRESHOLD and all(type(k) is int for k in value):
+            if all(type(v) is bool for v in value.values()):
+                return {
+                    "bools": self.add_array(array.array("q", value)),
+                    "values": self.add_bytes(bytes(value.values())),
+                }
+            if all(type(v) is float for v in value.values()):
+                return {
+                    "floats": self.add_array(array.array("q", value)),
+                    "values": self.add_array(array.array("d", value.values())),
+                }
+
+        return {"dict": [[self.encode(k), self.encode(v)] for k, v in value.items()]}
+
+
+class _Decoder:
+    """The inverse of :class:`_Encoder`."""
+
+    def __init__(self, data: memoryview, submit_descriptions: List[str]):
+        self.data = data
+        self.submit_texts = submit_descriptions
+        self.submit_descriptions = {}
+
+    def get_bytes(self, record: Dict[str, int]) -> memoryview:
+        return self.data[record["offset"] : record["offset"] + record["size"]]
+
+    def get_array(self, record: Dict[str, Any]) -> memoryview:
+        return self.get_bytes(record).cast(record["format"])
+
+    def decode_node(self, record: Dict[str, Any], d: "dag.DAG") -> "node.BaseNode":
+        cls = _import_class(record["type"])
+        n = cls.__new__(cls)
+        n._dag = d
+        for k, v in record["slots"].items():
+            setattr(n, k, self.decode(v))
+        for k, v in record.get("dict", {}).items():
+            setattr(n, k, self.decode(v))
+        if "vars" in record:
+            n._vars = _ColumnarVars(self, record["vars"])
+        return n
+
+    def decode(self, value: Any) -> Any:
+        if not isinstance(value, dict):
+            return value
+
+        if "submit" in value:
+            index = value["submit"]
+            if index not in self.submit_descriptions:
+                self.submit_descriptions[index] = utils.bindings().Submit(self.submit_texts[index])
+            return self.submit_descriptions[index]
+        if "path" in value:
+            return Path(value["path"])
+        if "dict" in value:
+            return {self.decode(k): self.decode(v) for k, v in value["dict"]}
+        if "bools" in value:
+            keys = self.get_array(value["bools"])
+            return dict(zip(keys, map(bool, self.get_bytes(value["values"]))))
+        if "floats" in value:
+            keys = self.get_array(value["floats"])
+            return dict(zip(keys, self.get_array(value["values"])))
+        if "list" in value:
+            return [self.decode(v) for v in value["list"]]
+        if "tuple" in value:
+            return tuple(self.decode(v) for v in value["tuple"])
+        if "slice" in value:
+            return slice(*value["slice"])
+        if "array" in value:
+            return self.get_array(value["array"])
+        if "object" in value:
+            cls = _import_class(value["object"])
+            obj = cls.__new__(cls)
+            for k, v in value["state"].items():
+                setattr(obj, k, self.decode(v))
+            return obj
+
+        raise exceptions.CannotLoadDAG("Unrecognized stored value {!r}".format(value))
+
+
+def _import_class(class_path: str) -> type:
+    module_name, _, qualname = class_path.partition(":")
+    cls = importlib.import_module(module_name)
+    for part in qualname.split("."):
+        cls = getattr(cls, part)
+
+    if not (isinstance(cls, type) and issubclass(cls, _storable_classes())):
+        raise exceptions.CannotLoadDAG(
+            "{} is not a kind of object that can be stored".format(class_path)
+        )
+    return cls
+
+
+class _ColumnarVars:
+    """
+    The ``vars`` of a :class:`NodeLayer` loaded by :func:`load`, still in the
+    stored file. The layer turns it into a list when its ``vars`` are used.
+    """
+
+    __slots__ = ("decoder", "record")
+
+    def __init__(self, decoder: _Decoder, record: Dict[str, Any]):
+        self.decoder = decoder
+        self.record = record
+
+    def __len__(self) -> int:
+        return self.record["length"]
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        return iter(self.materialize())
+
+    def materialize(self) -> List[Dict[str, str]]:
+        length = self.record["length"]
+        if "json" in self.record:
+            rows = json.loads(bytes(self.decoder.get_bytes(self.record["json"])))
+            return [self.decoder.decode(row) for row in rows]
+
+        columns = [
+            (
+                key,
+                str(self.decoder.get_bytes(values), "utf-8").split("\0"),
+                None if present is None else self.decoder.get_array(present),
+            )
+            for key, values, present in self.record["columns"]
+        ]
+
+        if all(present is None for _, _, present in columns):
+            keys = [key for key, _, _ in columns]
+            return [dict(zip(keys, row)) for row in zip(*(values for _, values, _ in columns))] or [
+                {} for _ in range(length)
+            ]
+
+        rows = [{} for _ in range(length)]
+        for key, values, present in columns:
+            for index, value in zip(range(length) if present is None else present, values):
+                rows[index][key] = value
+        return rows
+
+    def __reduce__(self) -> Tuple[type, Tuple[List[Dict[str, str]]]]:
+        # the stored file can't be pickled, so send the vars themselves
+        return list, (self.materialize(),)
@@ -22,13 +22,15 @@ from typing import (
     Iterator,
     TypeVar,
     Tuple,
+    Optional,
+    Set,
 )
 import logging
 
+import functools
 import itertools
 import re
-
-import htcondor
+import sys
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -46,6 +48,60 @@ def grouper(iterable, n, fill=None):
     return itertools.zip_longest(*args, fillvalue=fill)
 
 
+def sizeof(obj, seen: Optional[Set[int]] = None) -> int:
+    """
+    Return the approximate number of bytes used by ``obj``, including the
+    contents of any (nested) built-in containers and instance dictionaries.
+    Objects whose ``id`` is already in ``seen`` are not counted again,
+    so pass the same ``seen`` to several calls to avoid double-counting
+    shared objects.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        return size
+    if isinstance(obj, Mapping):
+        size += sum(sizeof(k, seen) + sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(sizeof(item, seen) for item in obj)
+    if isinstance(obj, type):
+        return size
+    if hasattr(obj, "__dict__"):
+        size += sizeof(vars(obj), seen)
+    for slot in slot_names(type(obj)):
+        if hasattr(obj, slot):
+            size += sizeof(getattr(obj, slot), seen)
+    return size
+
+
+def slot_names(cls: type) -> Iterator[str]:
+    """Yield the names of all of the ``__slots__`` of ``cls`` and its bases."""
+    for c in cls.__mro__:
+        slots = c.__dict__.get("__slots__", ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        for slot in slots:
+            if slot not in ("__dict__", "__weakref__"):
+                yield slot
+
+
+def slot_state(obj) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Return the state of ``obj`` in the ``(instance dict, slot values)``
+    form that :mod:`pickle` and :mod:`copy` know how to restore.
+    Unset slots are left out.
+    """
+    slots = {
+        slot: getattr(obj, slot) for slot in slot_names(type(obj)) if hasattr(obj, slot)
+    }
+    return getattr(obj, "__dict__", None) or None, slots
+
+
 def make_repr(obj, attrs):
     entries = ", ".join("{} = {}".format(k, getattr(obj, k)) for k in attrs)
     return "{}({})".format(type(obj).__name__, entries)
@@ -141,7 +197,7 @@ def parse_version(v: str) -> Tuple[int, int, int, str, int]:
     if match is None:
         raise Exception("Could not determine version info from {}".format(v))
 
-    (major, minor, micro, prerelease, prerelease_num) = match.group(1, 2, 4, 5, 6)
+    major, minor, micro, prerelease, prerelease_num = match.group(1, 2, 4, 5, 6)
 
     out = (
         int(major),
@@ -156,6 +212,39 @@ def parse_version(v: str) -> Tuple[int, int, int, str, int]:
 
 EXTRACT_HTCONDOR_VERSION_RE = re.compile(r"(\d+\.\d+\.\d+)", flags=re.ASCII)
 
-BINDINGS_VERSION_INFO = parse_version(
-    EXTRACT_HTCONDOR_VERSION_RE.search(htcondor.version()).group(0)
-)
+
+def bindings():
+    """
+    Return the :mod:`htcondor` bindings module, importing it on first use.
+
+    Nothing in this package imports the bindings at module level, so that
+    scripts which only build and write DAGs (like POST scripts that make
+    sub-DAGs) don't pay for loading them until an :class:`htcondor.Submit`
+    is actually needed.
+    """
+    import htcondor
+
+    return htcondor
+
+
+def is_submit(obj: Any) -> bool:
+    """
+    Return ``True`` if ``obj`` is an :class:`htcondor.Submit`.
+    This never imports the bindings: if they haven't been imported yet,
+    no ``Submit`` can exist.
+    """
+    htcondor = sys.modules.get("htcondor")
+    return htcondor is not None and isinstance(obj, htcondor.Submit)
+
+
+@functools.lru_cache(maxsize=None)
+def bindings_version_info() -> Tuple[int, int, int, str, int]:
+    """
+    Return the parsed version of the :mod:`htcondor` bindings,
+    as from :func:`parse_version`.
+    The bindings are imported and their version parsed on the first call only.
+
+    This replaces the ``BINDINGS_VERSION_INFO`` module attribute,
+    which was computed at import time.
+    """
+    return parse_version(EXTRACT_HTCONDOR_VERSION_RE.search(bindings().version()).group(0))
@@ -14,13 +14,13 @@
 # limitations under the License.
 
 import logging
-from typing import Optional, List, Dict, Iterator
+from typing import Optional, List, Dict, Iterator, Iterable, Tuple, TypeVar
 
+import collections
+import time
 from pathlib import Path
 
-import htcondor
-
-from . import dag, node, edges, formatter
+from . import dag, node, edges, formatter, utils
 from .walk_order import WalkOrder
 
 logger = logging.getLogger(__name__)
@@ -30,12 +30,16 @@ DEFAULT_DAG_FILE_NAME = "dagfile.dag"
 CONFIG_FILE_NAME = "dagman.config"
 NOOP_SUBMIT_FILE_NAME = "__JOIN__.sub"
 
+T = TypeVar("T")
+
 
 def write_dag(
     dag: dag.DAG,
     dag_dir: Path,
     dag_file_name: Optional[str] = DEFAULT_DAG_FILE_NAME,
     node_name_formatter: Optional[formatter.NodeNameFormatter] = None,
+    validate: bool = False,
+    stats: Optional["WriterStats"] = None,
 ) -> Path:
     """
     Write out the given DAG to the given directory.
@@ -53,6 +57,12 @@ def write_dag(
     node_name_formatter
         The :class:`NodeNameFormatter` to use for generating underlying node names.
         If not provided, the default is :class:`SimpleFormatter`.
+    validate
+        If ``True``, run :meth:`DAG.validate` before writing anything,
+        so that problems are found before any files are written.
+    stats
+        A :class:`WriterStats` to record timings and counters into.
+        If not provided, nothing is recorded.
 
     Returns
     -------
@@ -61,11 +71,92 @@ def write_dag(
         can be passed to :meth:`htcondor.Submit.from_dag` if you convert it to
         a string, like ``Submit.from_dag(str(write_dag(...)))``.
     """
-    return DAGWriter(dag, node_name_formatter=node_name_formatter).write(
-        dag_dir, dag_file_name=dag_file_name,
+    return DAGWriter(dag, node_name_formatter=node_name_formatter, stats=stats).write(
+        dag_dir, dag_file_name=dag_file_name, validate=validate
     )
 
 
+class WriterStats:
+    """
+    Collects timings and counters from a :class:`DAGWriter`.
+
+    Timings (in seconds) are accumulated per phase in :attr:`times`:
+
+    ``walk``
+        Walking over the logical nodes of the DAG.
+    ``nodes``
+        Generating the ``JOB``, ``VARS``, etc. lines for each logical node.
+    ``vars``
+        Escaping and formatting ``VARS`` lines (also included in ``nodes``).
+    ``names``
+        Generating node names with the :class:`NodeNameFormatter`
+        (also included in ``nodes`` and ``edges``).
+    ``edges``
+        Generating the ``PARENT ... CHILD ...`` lines for each logical node.
+    ``joins``
+        Generating the ``JOB`` lines for the join nodes.
+    ``io``
+        Writing the DAG description file.
+    ``submit_files``
+        Writing the submit files for the layers.
+    ``total``
+        The whole :meth:`DAGWriter.write` call.
+
+    The time spent on the ``nodes`` and ``edges`` of each logical node is
+    also accumulated in :attr:`layer_times`, keyed by its name.
+    :attr:`counts` holds the number of ``lines`` and ``bytes`` written to the
+    DAG description file, the number of ``join_nodes``, and the number of
+    ``formatter_calls``.
+
+    To send the measurements somewhere else as they happen, subclass this and
+    override :meth:`add_time` and :meth:`add_count`.
+    """
+
+    def __init__(self):
+        self.times = collections.defaultdict(float)
+        self.layer_times = collections.defaultdict(float)
+        self.counts = collections.Counter()
+
+    def add_time(self, phase: str, seconds: float, layer: Optional[str] = None):
+        """Record that ``seconds`` were spent in ``phase`` (on ``layer``, if given)."""
+        self.times[phase] += seconds
+        if layer is not None:
+            self.layer_times[layer] += seconds
+
+    def add_count(self, counter: str, n: int = 1):
+        """Add ``n`` to ``counter``."""
+        self.counts[counter] += n
+
+    def as_dict(self) -> Dict[str, Dict]:
+        """Return all of the measurements as plain dictionaries."""
+        return {
+            "times": dict(self.times),
+            "layer_times": dict(self.layer_times),
+            "counts": dict(self.counts),
+        }
+
+    def __repr__(self) -> str:
+        return utils.make_repr(self, ("times", "counts"))
+
+
+class _InstrumentedFormatter(formatter.NodeNameFormatter):
+    """Wraps another formatter to record the time spent in it."""
+
+    def __init__(self, wrapped: formatter.NodeNameFormatter, stats: WriterStats):
+        self.wrapped = wrapped
+        self.stats = stats
+
+    def generate(self, layer_name: str, node_index: int) -> str:
+        start = time.perf_counter()
+        name = self.wrapped.generate(layer_name, node_index)
+        self.stats.add_time("names", time.perf_counter() - start)
+        self.stats.add_count("formatter_calls")
+        return name
+
+    def parse(self, node_name: str) -> Tuple[str, int]:
+        return self.wrapped.parse(node_name)
+
+
 class DAGWriter:
     """Not re-entrant!"""
 
@@ -73,7 +164,20 @@ class DAGWriter:
         self,
         dag: "dag.DAG",
         node_name_formatter: Optional[formatter.NodeNameFormatter] = None,
+        stats: Optional[WriterStats] = None,
     ):
+        """
+        Parameters
+        ----------
+        dag
+            The DAG to write out.
+        node_name_formatter
+            The :class:`NodeNameFormatter` to use for generating underlying
+            node names. If not provided, the default is :class:`SimpleFormatter`.
+        stats
+            A :class:`WriterStats` to record timings and counters into.
+            If not provided, nothing is recorded (and nothing is timed).
+        """
         self.dag = dag
 
         if node_name_formatter is None:
@@ -82,9 +186,69 @@ class DAGWriter:
 
         self.join_factory = edges.JoinFactory()
 
+        self.stats = stats
+        if stats is not None:
+            self.node_name_formatter = _InstrumentedFormatter(
+                node_name_formatter, stats
+            )
+            self.get_vars_line = self._timed_call(self.get_vars_line, "vars")
+
+    def _timed(
+        self, iterable: Iterable[T], phase: str, layer: Optional[node.BaseNode] = None
+    ) -> Iterable[T]:
+        """
+        If we have stats, record the time spent producing each item of
+        ``iterable`` (but not the time spent consuming them).
+        Otherwise, just return the ``iterable``.
+        """
+        if self.stats is None:
+            return iterable
+        return self._timed_iter(iterable, phase, None if layer is None else layer.name)
+
+    def _timed_iter(
+        self, iterable: Iterable[T], phase: str, layer: Optional[str]
+    ) -> Iterator[T]:
+        iterator = iter(iterable)
+        elapsed = 0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - start
+                yield item
+        finally:
+            self.stats.add_time(phase, elapsed, layer)
+
+    def _timed_call(self, func, phase: str):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.stats.add_time(phase, time.perf_counter() - start)
+
+        return timed
+
     def write(
-        self, dag_dir: Path, dag_file_name: Optional[str] = DEFAULT_DAG_FILE_NAME
+        self,
+        dag_dir: Path,
+        dag_file_name: Optional[str] = DEFAULT_DAG_FILE_NAME,
+        validate: bool = False,
     ) -> Path:
+        start = time.perf_counter()
+
+        if validate:
+            # validate with the formatter we were given, so that validation
+            # doesn't show up in the stats for writing
+            node_name_formatter = self.node_name_formatter
+            if isinstance(node_name_formatter, _InstrumentedFormatter):
+                node_name_formatter = node_name_formatter.wrapped
+            self.dag.validate(node_name_formatter=node_name_formatter)
+
         dag_dir = Path(dag_dir).absolute()
         dag_file_name = dag_file_name or DEFAULT_DAG_FILE_NAME
 
@@ -93,25 +257,52 @@ class DAGWriter:
         dag_file_path = dag_dir / dag_file_name
 
         self.write_dag_file(dag_file_path)
+
+        submit_files_start = time.perf_counter()
         self.write_submit_files_for_layers(dag_dir)
-        if len(self.join_factory.joins) > 0:
+        if self.stats is not None:
+            self.stats.add_time(
+                "submit_files", time.perf_counter() - submit_files_start
+            )
+
+        if self.join_factory.count > 0:
             self.write_noop_submit_file(dag_dir)
         if len(self.dag.dagman_config) > 0:
             self.write_dagman_config_file(dag_dir)
 
+        if self.stats is not None:
+            self.stats.add_count("join_nodes", self.join_factory.count)
+            self.stats.add_time("total", time.perf_counter() - start)
+
         return dag_file_path
 
     def write_dag_file(self, dag_file_path):
         with dag_file_path.open(mode="w") as f:
+            if self.stats is None:
+                for line in self.yield_dag_file_lines():
+                    f.write(line + "\n")
+                return
+
+            num_lines = num_bytes = 0
+            io_time = 0
             for line in self.yield_dag_file_lines():
-                f.write(line + "\n")
+                text = line + "\n"
+                start = time.perf_counter()
+                f.write(text)
+                io_time += time.perf_counter() - start
+                # write() returns the number of characters, not bytes
+                num_bytes += len(text.encode(f.encoding))
+                num_lines += 1
+
+            self.stats.add_time("io", io_time)
+            self.stats.add_count("lines", num_lines)
+            self.stats.add_count("bytes", num_bytes)
 
     def write_submit_files_for_layers(self, path):
         for layer in (
             n
             for n in self.dag.nodes
-            if isinstance(n, node.NodeLayer)
-            and isinstance(n.submit_description, htcondor.Submit)
+            if isinstance(n, node.NodeLayer) and utils.is_submit(n.submit_description)
         ):
             text = str(layer.submit_description) + "\nqueue"
             (path / "{}.sub".format(layer.name)).write_text(text)
@@ -131,10 +322,10 @@ class DAGWriter:
         yield "# END META"
 
         yield "# BEGIN NODES AND EDGES"
-        for node in self.dag.walk(order=WalkOrder.BREADTH_FIRST):
-            yield from self.yield_node_lines(node)
-            yield from self.yield_edge_lines(node)
-        yield from self.yield_join_node_lines()
+        for node in self._timed(self.dag.walk(order=WalkOrder.BREADTH_FIRST), "walk"):
+            yield from self._timed(self.yield_node_lines(node), "nodes", node)
+            yield from self._timed(self.yield_edge_lines(node), "edges", node)
+        yield from self._timed(self.yield_join_node_lines(), "joins")
         yield "# END NODES AND EDGES"
 
         if self.dag._final_node is not None:
@@ -143,9 +334,9 @@ class DAGWriter:
             yield "# END FINAL NODE"
 
     def yield_join_node_lines(self):
-        for join in self.join_factory.joins:
+        for join_id in range(self.join_factory.count):
             yield "JOB {} {} NOOP".format(
-                self.join_node_name(join), NOOP_SUBMIT_FILE_NAME
+                self.join_node_name(edges.JoinNode(join_id)), NOOP_SUBMIT_FILE_NAME
             )
 
     def yield_dag_meta_lines(self):
@@ -201,28 +392,32 @@ class DAGWriter:
             )
 
     def yield_layer_lines(self, layer: node.NodeLayer) -> Iterator[str]:
+        sub_file = (
+            "{}.sub".format(layer.name)
+            if utils.is_submit(layer.submit_description)
+            else layer.submit_description.absolute().as_posix()
+        )
+
         # write out each low-level dagman node in the layer
         for idx, vars in enumerate(layer.vars):
             name = self.get_node_name(layer, idx)
-            sub_file = (
-                "{}.sub".format(layer.name)
-                if isinstance(layer.submit_description, htcondor.Submit)
-                else layer.submit_description.absolute().as_posix()
-            )
             parts = ["JOB {} {}".format(name, sub_file)] + self.get_node_meta_parts(
                 layer, idx
             )
             yield " ".join(parts)
 
             if len(vars) > 0:
-                parts = ["VARS {}".format(name)]
-                for key, value in vars.items():
-                    value_text = str(value).replace("\\", "\\\\").replace('"', r"\"")
-                    parts.append('{}="{}"'.format(key, value_text))
-                yield " ".join(parts)
+                yield self.get_vars_line(name, vars)
 
             yield from self.yield_node_meta_lines(layer, name)
 
+    def get_vars_line(self, name: str, vars: Dict[str, str]) -> str:
+        parts = ["VARS {}".format(name)]
+        for key, value in vars.items():
+            value_text = str(value).replace("\\", "\\\\").replace('"', r"\"")
+            parts.append('{}="{}"'.format(key, value_text))
+        return " ".join(parts)
+
     def yield_subdag_lines(self, subdag: node.SubDAG) -> Iterator[str]:
         name = self.get_node_name(subdag, 0)
         parts = ["SUBDAG EXTERNAL {} {}".format(name, subdag.dag_file)]
@@ -0,0 +1,96 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from htcondor import dags
+
+
+def test_add_layers_returns_layers_in_order(dag):
+    layers = dag.add_layers({"name": f"layer{i}", "vars": [{"x": str(i)}]} for i in range(5))
+
+    assert [layer.name for layer in layers] == [f"layer{i}" for i in range(5)]
+    assert all(layer in dag for layer in layers)
+    assert layers[3].vars == [{"x": "3"}]
+
+
+def test_add_layers_with_existing_name_adds_nothing(dag):
+    dag.layer(name="b")
+
+    with pytest.raises(dags.exceptions.DuplicateNodeName):
+        dag.add_layers([{"name": "a"}, {"name": "b"}])
+
+    assert "a" not in dag._nodes
+
+
+def test_add_layers_with_repeated_name_adds_nothing(dag):
+    with pytest.raises(dags.exceptions.DuplicateNodeName):
+        dag.add_layers([{"name": "a"}, {"name": "b"}, {"name": "a"}])
+
+    assert len(dag.nodes) == 0
+
+
+def test_add_layers_with_final_name_raises(dag):
+    dag.final(name="a")
+
+    with pytest.raises(dags.exceptions.DuplicateNodeName):
+        dag.add_layers([{"name": "a"}])
+
+
+def test_add_edges_shares_default_edge(dag):
+    a, b, c = dag.add_layers([{"name": "a"}, {"name": "b"}, {"name": "c"}])
+
+    dag.add_edges([(a, b), (b, c)])
+
+    assert isinstance(dag._edges.get(a, b), dags.ManyToMany)
+    assert dag._edges.get(a, b) is dag._edges.get(b, c)
+
+
+def test_add_edges_uses_given_edge(dag):
+    a, b, c = dag.add_layers([{"name": "a"}, {"name": "b"}, {"name": "c"}])
+    edge = dags.OneToOne()
+
+    dag.add_edges([(a, b), (a, c)], edge=edge)
+
+    assert dag._edges.get(a, b) is edge
+    assert dag._edges.get(a, c) is edge
+
+
+def test_add_edges_updates_children_and_parents(dag):
+    a, b, c = dag.add_layers([{"name": "a"}, {"name": "b"}, {"name": "c"}])
+
+    dag.add_edges([(a, b), (a, c), (b, c)])
+
+    assert a.children == dags.Nodes(b, c)
+    assert c.parents == dags.Nodes(a, b)
+    assert dag.roots == dags.Nodes(a)
+    assert dag.leaves == dags.Nodes(c)
+
+
+def test_bulk_and_incremental_construction_are_equivalent():
+    incremental = dags.DAG()
+    previous = incremental.layer(name="layer0")
+    for i in range(1, 10):
+        previous = previous.child_layer(name=f"layer{i}")
+
+    bulk = dags.DAG()
+    layers = bulk.add_layers({"name": f"layer{i}"} for i in range(10))
+    bulk.add_edges(zip(layers, layers[1:]))
+
+    def structure(dag):
+        return sorted((p.name, c.name) for p, c in dag._edges)
+
+    assert structure(bulk) == structure(incremental)
+    assert [n.name for n in bulk.walk()] == [n.name for n in incremental.walk()]
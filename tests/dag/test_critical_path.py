@@ -0,0 +1,109 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from htcondor import dags
+from htcondor.dags.analysis import node_duration
+
+
+@pytest.fixture(scope="function")
+def diamond(dag):
+    a = dag.layer(name="a", runtime=1)
+    b = a.child_layer(name="b", runtime=5)
+    c = a.child_layer(name="c", runtime=2)
+    d = dag.layer(name="d", runtime=1)
+    d.add_parents(b, c)
+    return a, b, c, d
+
+
+def test_critical_path_of_diamond(dag, diamond):
+    a, b, c, d = diamond
+
+    cp = dag.critical_path()
+
+    assert cp.path == [a, b, d]
+    assert cp.length == 7
+
+
+def test_slack(dag, diamond):
+    a, b, c, d = diamond
+
+    cp = dag.critical_path()
+
+    assert cp.slack == {a: 0, b: 0, c: 3, d: 0}
+    assert cp.earliest_start[c] == 1
+    assert cp.latest_start[c] == 4
+
+
+def test_default_runtime(dag):
+    a = dag.layer(name="a")
+    a.child_layer(name="b", runtime=3)
+
+    assert dag.critical_path().length == 3
+    assert dag.critical_path(default_runtime=2).length == 5
+
+
+def test_empty_dag(dag):
+    cp = dag.critical_path()
+
+    assert cp.path == []
+    assert cp.length == 0
+
+
+def test_layer_lasts_as_long_as_its_slowest_node(dag):
+    a = dag.layer(name="a", vars=[{}] * 4, runtime={0: 1, 1: 10, 2: 3})
+
+    assert node_duration(a, default_runtime=2) == (10, 16)
+
+
+def test_layer_work_counts_every_underlying_node(dag):
+    a = dag.layer(name="a", vars=[{}] * 4, runtime=3)
+
+    assert node_duration(a) == (3, 12)
+
+
+def test_noop_and_done_nodes_take_no_time(dag):
+    a = dag.layer(name="a", vars=[{}] * 3, runtime={0: 10, 1: 2, 2: 2}, noop={0: True})
+    b = dag.layer(name="b", vars=[{}] * 2, runtime=4, done=True, noop={1: True})
+
+    assert node_duration(a) == (2, 4)
+    assert node_duration(b) == (0, 0)
+
+
+def test_runtime_for_indices_outside_layer_is_ignored(dag):
+    a = dag.layer(name="a", vars=[{}] * 2, runtime={0: 1, 5: 100})
+
+    assert node_duration(a) == (1, 1)
+
+
+def test_slots_limit_parallelism(dag):
+    a = dag.layer(name="a", vars=[{}] * 10, runtime=2)
+    a.child_layer(name="b", runtime=1)
+
+    assert dag.critical_path().length == 3
+    assert dag.critical_path(slots=5).length == 5
+    assert dag.critical_path(slots=100).length == 3
+
+
+def test_cycle_raises(dag):
+    a = dag.layer(name="a")
+    b = a.child_layer(name="b")
+    b.add_children(a)
+
+    with pytest.raises(dags.exceptions.CycleInDAG):
+        dag.critical_path()
+
+    b.remove_children(a)
@@ -0,0 +1,215 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+import array
+import pickle
+from pathlib import Path
+
+import htcondor
+
+from htcondor import dags
+
+SUBMIT = htcondor.Submit(dict(executable="/bin/echo", arguments="$(x)"))
+
+
+@pytest.fixture(scope="function")
+def full_dag():
+    dag = dags.DAG(
+        dagman_config={"DAGMAN_MAX_JOBS_IDLE": 10},
+        dagman_job_attributes={"foo": "bar"},
+        max_jobs_by_category={"c": 3},
+        dot_config=dags.DotConfig("d.dot", update=True, overwrite=False, include_file="inc"),
+        jobstate_log="jobstate.log",
+        node_status_file=dags.NodeStatusFile("status", update_time=5, always_update=True),
+    )
+    a = dag.layer(
+        name="a",
+        submit_description=SUBMIT,
+        vars=[{"x": str(i), "y": 'a "quoted" \\ value'} for i in range(100)],
+        dir="subdir",
+        noop={1: True},
+        done={i: i % 2 == 0 for i in range(100)},
+        retries=3,
+        retry_unless_exit=2,
+        pre=dags.Script("pre.sh", ["1", "2"], retry=True, retry_status=4, retry_delay=5),
+        post=dags.Script("post.sh"),
+        pre_skip_exit_code=7,
+        priority=4,
+        category="c",
+        abort=dags.DAGAbortCondition(3, 4),
+        runtime={i: float(i) for i in range(100)},
+    )
+    b = a.child_layer(
+        name="b",
+        submit_description=SUBMIT,
+        vars=[{"x": str(i)} for i in range(100)],
+        edge=dags.OneToOne(),
+    )
+    c = b.child_layer(name="c", submit_description=SUBMIT, vars=[{}] * 50, edge=dags.Grouper(2, 1))
+    e = c.child_layer(
+        name="e",
+        submit_description=Path("/absolute/e.sub"),
+        vars=[{"a": "1"}, {"b": "2", "a": "3"}, {"b": "x"}, {}],
+        edge=dags.Slicer(slice(1, None, 2)),
+    )
+    f = e.child_layer(name="f", submit_description=SUBMIT, vars=[{}] * 8, edge=dags.Window(2, 1))
+    f.child_layer(
+        name="g",
+        submit_description=SUBMIT,
+        vars=[{}] * 4,
+        edge=dags.SparseEdge(array.array("i", [0, 3, 5]), array.array("i", [1, 1, 3])),
+    )
+    a.child_subdag(name="sub", dag_file="sub.dag")
+    dag.final(name="final", submit_description=SUBMIT, post=dags.Script("final.sh"))
+
+    return dag
+
+
+def dag_file_text(dag, path):
+    return dags.write_dag(dag, path).read_text()
+
+
+def test_dump_load_writes_same_dag_file(full_dag, tmp_path):
+    path = full_dag.dump(tmp_path / "dag.bin")
+
+    loaded = dags.DAG.load(path)
+
+    assert dag_file_text(loaded, tmp_path / "loaded") == dag_file_text(full_dag, tmp_path / "orig")
+
+
+def test_dump_load_keeps_attributes(full_dag, tmp_path):
+    loaded = dags.DAG.load(full_dag.dump(tmp_path / "dag.bin"))
+
+    assert loaded.dagman_config == {"DAGMAN_MAX_JOBS_IDLE": 10}
+    assert loaded.dagman_job_attrs == {"foo": "bar"}
+    assert loaded.max_jobs_per_category == {"c": 3}
+    assert loaded.jobstate_log == Path("jobstate.log")
+    assert loaded.dot_config.include_file == Path("inc")
+    assert loaded.node_status_file.update_time == 5
+
+    a = loaded._nodes["a"]
+    original = full_dag._nodes["a"]
+    assert a.vars == original.vars
+    assert a.done == original.done
+    assert a.runtime == original.runtime
+    assert a.pre.arguments == ["1", "2"]
+    assert a.abort.dag_return_value == 4
+    assert str(a.submit_description) == str(SUBMIT)
+    assert loaded._nodes["e"].vars == [{"a": "1"}, {"b": "2", "a": "3"}, {"b": "x"}, {}]
+    assert loaded._nodes["e"].submit_description == Path("/absolute/e.sub")
+    assert loaded._nodes["sub"].dag_file == "sub.dag"
+    assert loaded._final_node.post.executable == "final.sh"
+
+
+def test_dump_load_keeps_edges(full_dag, tmp_path):
+    loaded = dags.DAG.load(full_dag.dump(tmp_path / "dag.bin"))
+
+    def edge_reprs(dag):
+        return {(p.name, c.name): repr(e) for (p, c), e in dag._edges.items()}
+
+    assert edge_reprs(loaded) == edge_reprs(full_dag)
+    assert {n.name for n in loaded._nodes["a"].children} == {"b", "sub"}
+
+
+def test_shared_submit_descriptions_are_stored_once(full_dag, tmp_path):
+    loaded = dags.DAG.load(full_dag.dump(tmp_path / "dag.bin"))
+
+    assert loaded._nodes["a"].submit_description is loaded._nodes["b"].submit_description
+
+
+def test_vars_are_loaded_lazily(full_dag, tmp_path):
+    loaded = dags.DAG.load(full_dag.dump(tmp_path / "dag.bin"))
+    b = loaded._nodes["b"]
+
+    assert len(b) == 100
+    assert not isinstance(b._vars, list)
+
+    b.vars[0]["x"] = "changed"
+
+    assert b.vars[0] == {"x": "changed"}
+
+
+def test_layers_made_from_the_same_vars_do_not_share_them(dag):
+    vars = [{"x": "1"}, {"x": "2"}]
+    a = dag.layer(name="a", vars=vars)
+    b = dag.layer(name="b", vars=vars)
+
+    a.vars.append({"x": "3"})
+
+    assert len(a) == 3
+    assert len(b) == 2
+    assert vars == [{"x": "1"}, {"x": "2"}]
+
+
+def test_loaded_vars_can_be_given_to_another_layer(full_dag, tmp_path):
+    loaded = dags.DAG.load(full_dag.dump(tmp_path / "dag.bin"))
+    b = loaded._nodes["b"]
+
+    layer = loaded.layer(name="copy_of_b", vars=b._vars)
+
+    assert layer.vars == full_dag._nodes["b"].vars
+
+
+def test_non_string_vars_are_stored(dag, tmp_path):
+    dag.layer(name="a", submit_description=SUBMIT, vars=[{"x": 1}, {"x": "\0"}])
+
+    loaded = dags.DAG.load(dag.dump(tmp_path / "dag.bin"))
+
+    assert loaded._nodes["a"].vars == [{"x": 1}, {"x": "\0"}]
+
+
+def test_loaded_dag_can_be_pickled(full_dag, tmp_path):
+    loaded = dags.DAG.load(full_dag.dump(tmp_path / "dag.bin"))
+
+    unpickled = pickle.loads(pickle.dumps(loaded))
+
+    assert dag_file_text(unpickled, tmp_path / "unpickled") == dag_file_text(
+        full_dag, tmp_path / "orig"
+    )
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "dagfile.dag"
+    path.write_text("JOB a a.sub\n")
+
+    with pytest.raises(dags.exceptions.CannotLoadDAG):
+        dags.DAG.load(path)
+
+
+def test_load_rejects_empty_files(tmp_path):
+    path = tmp_path / "empty"
+    path.touch()
+
+    with pytest.raises(dags.exceptions.CannotLoadDAG):
+        dags.DAG.load(path)
+
+
+def test_load_rejects_newer_format(full_dag, tmp_path):
+    path = full_dag.dump(tmp_path / "dag.bin")
+    data = bytearray(path.read_bytes())
+    data[8] = 99
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(dags.exceptions.CannotLoadDAG):
+        dags.DAG.load(path)
+
+
+def test_dump_rejects_unknown_objects(dag, tmp_path):
+    dag.layer(name="a", submit_description=SUBMIT, category=object())
+
+    with pytest.raises(dags.exceptions.CannotDumpDAG):
+        dag.dump(tmp_path / "dag.bin")
@@ -0,0 +1,106 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from htcondor import dags
+
+
+def counted(edge, parent, child):
+    """The estimate made by actually generating the edges."""
+    return dags.BaseEdge.estimate(edge, parent, child)
+
+
+@pytest.mark.parametrize(
+    "num_parent_vars, num_child_vars, edge",
+    [
+        (1, 1, dags.ManyToMany()),
+        (1, 5, dags.ManyToMany()),
+        (5, 1, dags.ManyToMany()),
+        (5, 7, dags.ManyToMany()),
+        (6, 6, dags.OneToOne()),
+        (6, 4, dags.Grouper(3, 2)),
+        (9, 3, dags.Grouper(3, 1)),
+        (2, 2, dags.Grouper(1, 1)),
+        (10, 7, dags.Grouper(3, 2, ragged=True)),
+        (11, 4, dags.Grouper(3, 1, ragged=True)),
+        (2, 1, dags.Grouper(3, 2, ragged=True)),
+        (7, 6, dags.Grouper(parent_boundaries=[1, 4], child_boundaries=[3, 5])),
+        (6, 4, dags.Slicer()),
+        (10, 10, dags.Slicer(slice(None, None, 2), slice(1, None, 3))),
+        (10, 10, dags.Slicer(slice(2, 8), slice(None, 3))),
+        (10, 10, dags.Slicer(slice(20, None), slice(None))),
+        (30, 30, dags.Window(4, 4)),
+        (5, 3, dags.SparseEdge([0, 1, 4], [2, 2, 0])),
+    ],
+)
+def test_estimate_matches_generated_edges(dag, num_parent_vars, num_child_vars, edge):
+    parent = dag.layer(name="parent", vars=[{}] * num_parent_vars)
+    child = dag.layer(name="child", vars=[{}] * num_child_vars)
+
+    assert edge.estimate(parent, child) == counted(edge, parent, child)
+
+
+def test_estimate_for_many_to_many_uses_join():
+    dag = dags.DAG()
+    parent = dag.layer(name="parent", vars=[{}] * 5)
+    child = dag.layer(name="child", vars=[{}] * 7)
+
+    assert dags.ManyToMany().estimate(parent, child) == dags.EdgeEstimate(
+        lines=2, joins=1, names=14
+    )
+
+
+def test_estimate_raises_for_incompatible_edges(dag):
+    parent = dag.layer(name="parent", vars=[{}] * 5)
+    child = dag.layer(name="child", vars=[{}] * 7)
+
+    with pytest.raises(dags.exceptions.OneToOneEdgeNeedsSameNumberOfVars):
+        dags.OneToOne().estimate(parent, child)
+
+    with pytest.raises(dags.exceptions.IncompatibleGrouper):
+        dags.Grouper(2, 2).estimate(parent, child)
+
+
+@pytest.mark.parametrize(
+    "edge",
+    [
+        dags.Slicer(slice(-1, None)),
+        dags.Slicer(slice(None, -2)),
+        dags.Slicer(slice(None, None, 0)),
+        dags.Slicer(child_slice=slice(None, None, -1)),
+    ],
+)
+def test_estimate_rejects_slices_that_islice_rejects(dag, edge):
+    parent = dag.layer(name="parent", vars=[{}] * 5)
+    child = dag.layer(name="child", vars=[{}] * 5)
+
+    with pytest.raises(ValueError):
+        list(edge.get_edges(parent, child, dags.JoinFactory()))
+
+    with pytest.raises(ValueError):
+        edge.estimate(parent, child)
+
+
+def test_dag_estimate_sums_edge_estimates(dag):
+    a = dag.layer(name="a", vars=[{}] * 4)
+    b = a.child_layer(name="b", vars=[{}] * 4, edge=dags.OneToOne())
+    b.child_layer(name="c", vars=[{}] * 2)
+
+    assert dag.estimate() == dags.EdgeEstimate(lines=4 + 2, joins=1, names=8 + 8)
+
+
+def test_dag_estimate_of_empty_dag(dag):
+    assert dag.estimate() == dags.EdgeEstimate()
@@ -0,0 +1,50 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import htcondor
+
+
+def test_memory_report_has_all_consumers(dag):
+    a = dag.layer(name="a", vars=[{"x": str(i)} for i in range(10)])
+    a.child_layer(name="b")
+
+    report = dag.memory_report()
+
+    assert set(report) == {"nodes", "vars", "noop_and_done", "edges", "submit_descriptions"}
+    assert all(v > 0 for v in report.values())
+
+
+def test_memory_report_vars_grow_with_vars(dag):
+    a = dag.layer(name="a", vars=[{"x": str(i)} for i in range(10)])
+    small = dag.memory_report()
+
+    a.vars = [{"x": str(i)} for i in range(1000)]
+    large = dag.memory_report()
+
+    assert large["vars"] > 50 * small["vars"]
+    assert large["nodes"] == small["nodes"]
+
+
+def test_memory_report_counts_shared_objects_once(dag):
+    sub = htcondor.Submit({"executable": "/bin/echo"})
+    vars = {"x": "1"}
+    dag.layer(name="a", submit_description=sub, vars=[vars])
+    one = dag.memory_report()
+
+    dag.layer(name="b", submit_description=sub, vars=[vars])
+    two = dag.memory_report()
+
+    assert two["submit_descriptions"] == one["submit_descriptions"]
+    assert two["vars"] < 2 * one["vars"]
@@ -40,3 +40,22 @@ def test_other_does_not_contain_child_even_if_same_name():
 
     assert a_child not in b
     assert b_child not in a
+
+
+def test_nodes_contains_by_instance_and_name(dag):
+    a = dag.layer(name="a")
+    b = dag.layer(name="b")
+
+    nodes = dags.Nodes(a)
+
+    assert a in nodes
+    assert "a" in nodes
+    assert b not in nodes
+    assert "b" not in nodes
+
+
+def test_nodes_does_not_contain_node_from_other_dag_with_same_name(dag):
+    a = dag.layer(name="a")
+    other_a = dags.DAG().layer(name="a")
+
+    assert other_a not in dags.Nodes(a)
@@ -0,0 +1,84 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from htcondor import dags
+
+
+@pytest.fixture(scope="function")
+def abc(dag):
+    return dag.layer(name="a"), dag.layer(name="b"), dag.layer(name="c")
+
+
+def test_union(abc):
+    a, b, c = abc
+
+    assert dags.Nodes(a, b) | dags.Nodes(b, c) == dags.Nodes(a, b, c)
+
+
+def test_intersection(abc):
+    a, b, c = abc
+
+    assert dags.Nodes(a, b) & dags.Nodes(b, c) == dags.Nodes(b)
+
+
+def test_difference(abc):
+    a, b, c = abc
+
+    assert dags.Nodes(a, b) - dags.Nodes(b, c) == dags.Nodes(a)
+
+
+def test_set_operations_with_single_nodes(abc):
+    a, b, c = abc
+
+    assert dags.Nodes(a) | b == dags.Nodes(a, b)
+    assert b | dags.Nodes(a) == dags.Nodes(a, b)
+    assert dags.Nodes(a, b) & b == dags.Nodes(b)
+    assert dags.Nodes(a, b) - b == dags.Nodes(a)
+
+
+def test_set_operations_do_not_modify_operands(abc):
+    a, b, c = abc
+    left = dags.Nodes(a, b)
+    right = dags.Nodes(b, c)
+
+    left | right
+    left & right
+    left - right
+
+    assert left == dags.Nodes(a, b)
+    assert right == dags.Nodes(b, c)
+
+
+def test_set_operations_distinguish_dags(dag):
+    a = dag.layer(name="a")
+    other_a = dags.DAG().layer(name="a")
+
+    assert len(dags.Nodes(a) & dags.Nodes(other_a)) == 0
+    assert dags.Nodes(a) - dags.Nodes(other_a) == dags.Nodes(a)
+
+
+def test_set_operations_with_other_types_raise(abc):
+    a, b, c = abc
+
+    with pytest.raises(TypeError):
+        dags.Nodes(a) | 5
+
+
+def test_nodes_can_be_built_from_nodes(abc):
+    a, b, c = abc
+
+    assert dags.Nodes(dags.Nodes(a, b), c) == dags.Nodes(a, b, c)
@@ -0,0 +1,111 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+import array
+import pickle
+from pathlib import Path
+
+import htcondor
+
+from htcondor import dags
+from htcondor.dags import utils
+
+
+@pytest.fixture(scope="function")
+def pickleable_dag(dag):
+    a = dag.layer(
+        name="a",
+        submit_description=Path("a.sub"),
+        vars=[{"x": "1"}, {"x": "2"}],
+        pre=dags.Script("pre.sh", ["foo"]),
+        abort=dags.DAGAbortCondition(node_exit_value=3),
+    )
+    b = a.child_layer(name="b", submit_description=Path("b.sub"), edge=dags.Grouper(2, 1))
+    c = b.child_subdag(name="c", dag_file=Path("c.dag"))
+    dags.Nodes(b, c).child_layer(
+        name="d",
+        submit_description=Path("d.sub"),
+        type=dags.SparseEdge(array.array("i", [0]), array.array("i", [0])),
+    )
+    dag.final(name="final", submit_description=Path("final.sub"))
+
+    return dag
+
+
+def test_dag_round_trips_through_pickle(pickleable_dag):
+    unpickled = pickle.loads(pickle.dumps(pickleable_dag))
+
+    def edge_reprs(dag):
+        return {(p.name, c.name): repr(e) for (p, c), e in dag._edges.items()}
+
+    assert {n.name for n in unpickled.nodes} == {"a", "b", "c", "d"}
+    assert edge_reprs(unpickled) == edge_reprs(pickleable_dag)
+    assert unpickled._nodes["a"].vars == [{"x": "1"}, {"x": "2"}]
+    assert unpickled._nodes["a"].pre.arguments == ["foo"]
+    assert unpickled._final_node.name == "final"
+
+
+def test_node_round_trips_through_pickle(pickleable_dag):
+    b = pickleable_dag._nodes["b"]
+
+    unpickled = pickle.loads(pickle.dumps(b))
+
+    assert unpickled.name == "b"
+    assert {n.name for n in unpickled.parents} == {"a"}
+    assert {n.name for n in unpickled.children} == {"c", "d"}
+
+
+class TaggedLayer(dags.NodeLayer):
+    pass
+
+
+def test_node_subclasses_can_have_new_attributes(dag):
+    layer = TaggedLayer(dag, name="tagged", submit_description=Path("t.sub"))
+    layer.tag = "foo"
+
+    assert pickle.loads(pickle.dumps(layer)).tag == "foo"
+
+
+@pytest.mark.parametrize(
+    "obj",
+    [
+        dags.Script("foo.sh"),
+        dags.DAGAbortCondition(1, 2),
+        dags.JoinNode(5),
+        dags.ManyToMany(),
+        dags.OneToOne(),
+        dags.Grouper(2, 3, ragged=True),
+        dags.Slicer(slice(1, None)),
+        dags.Window(2, 3),
+    ],
+)
+def test_slotted_objects_have_no_instance_dict(obj):
+    assert not hasattr(obj, "__dict__")
+
+    unpickled = pickle.loads(pickle.dumps(obj))
+
+    assert type(unpickled) is type(obj)
+    assert repr(utils.slot_state(unpickled)) == repr(utils.slot_state(obj))
+
+
+def test_submit_descriptions_are_pickled_as_text(dag):
+    submit = htcondor.Submit({"executable": "/bin/echo", "arguments": "$(x)"})
+    dag.layer(name="a", submit_description=submit, vars=[{"x": "1"}])
+
+    unpickled = pickle.loads(pickle.dumps(dag))
+
+    assert str(unpickled._nodes["a"].submit_description) == str(submit)
@@ -0,0 +1,86 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from htcondor.dags.analysis import remaining_path_lengths
+
+
+@pytest.fixture(scope="function")
+def diamond(dag):
+    a = dag.layer(name="a", runtime=1)
+    b = a.child_layer(name="b", runtime=5)
+    c = a.child_layer(name="c", runtime=2)
+    d = dag.layer(name="d", runtime=1)
+    d.add_parents(b, c)
+    return a, b, c, d
+
+
+def test_remaining_path_lengths(dag, diamond):
+    a, b, c, d = diamond
+
+    assert remaining_path_lengths(dag) == {a: 7, b: 6, c: 3, d: 1}
+
+
+def test_remaining_path_lengths_unweighted(dag, diamond):
+    a, b, c, d = diamond
+
+    assert remaining_path_lengths(dag, weighted=False) == {a: 3, b: 2, c: 2, d: 1}
+
+
+def test_assign_priorities_by_runtime(dag, diamond):
+    a, b, c, d = diamond
+
+    priorities = dag.assign_priorities()
+
+    assert priorities == {a: 3, b: 2, c: 1, d: 0}
+    assert [n.priority for n in diamond] == [3, 2, 1, 0]
+
+
+def test_assign_priorities_by_depth(dag, diamond):
+    a, b, c, d = diamond
+
+    dag.assign_priorities(weighted=False)
+
+    assert [n.priority for n in diamond] == [2, 1, 1, 0]
+
+
+def test_assign_priorities_overwrites_existing(dag, diamond):
+    a, b, c, d = diamond
+    d.priority = 10
+
+    dag.assign_priorities()
+
+    assert d.priority == 0
+
+
+def test_throttled_category_is_more_urgent(dag):
+    root = dag.layer(name="root", runtime=1)
+    wide = root.child_layer(name="wide", vars=[{}] * 100, runtime=1, category="slow")
+    long = root.child_layer(name="long", runtime=10)
+    dag.max_jobs_per_category["slow"] = 5
+
+    dag.assign_priorities()
+    assert long.priority > wide.priority
+
+    dag.assign_priorities(respect_categories=True)
+    assert wide.priority > long.priority
+
+
+def test_throttled_category_counts_batches_when_unweighted(dag):
+    a = dag.layer(name="a", vars=[{}] * 10, category="slow")
+    dag.max_jobs_per_category["slow"] = 3
+
+    assert remaining_path_lengths(dag, weighted=False, respect_categories=True) == {a: 4}
@@ -0,0 +1,131 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from htcondor import dags
+
+
+@pytest.fixture(scope="function")
+def diamond(dag):
+    a = dag.layer(name="a")
+    b = a.child_layer(name="b")
+    c = a.child_layer(name="c")
+    d = dag.layer(name="d")
+    d.add_parents(b, c)
+    e = dag.layer(name="e")
+    return a, b, c, d, e
+
+
+def test_order_is_topological(dag, diamond):
+    index = dag.reachability()
+
+    positions = {n: idx for idx, n in enumerate(index.order)}
+    assert len(index.order) == 5
+    for parent, child in dag._edges:
+        assert positions[parent] < positions[child]
+
+
+def test_is_ancestor(dag, diamond):
+    a, b, c, d, e = diamond
+    index = dag.reachability()
+
+    assert index.is_ancestor(a, d)
+    assert index.is_ancestor(b, d)
+    assert not index.is_ancestor(d, a)
+    assert not index.is_ancestor(b, c)
+    assert not index.is_ancestor(a, a)
+    assert not index.is_ancestor(a, e)
+
+
+def test_is_descendant(dag, diamond):
+    a, b, c, d, e = diamond
+    index = dag.reachability()
+
+    assert index.is_descendant(d, a)
+    assert not index.is_descendant(a, d)
+
+
+def test_descendants(dag, diamond):
+    a, b, c, d, e = diamond
+    index = dag.reachability()
+
+    assert index.descendants(a) == dags.Nodes(b, c, d)
+    assert index.descendants(b, e) == dags.Nodes(d)
+    assert index.descendants(dags.Nodes(b, c)) == dags.Nodes(d)
+    assert len(index.descendants(d)) == 0
+
+
+def test_ancestors(dag, diamond):
+    a, b, c, d, e = diamond
+    index = dag.reachability()
+
+    assert index.ancestors(d) == dags.Nodes(a, b, c)
+    assert index.ancestors(b, c) == dags.Nodes(a)
+    assert len(index.ancestors(e)) == 0
+
+
+def test_matches_walk_descendants(dag, diamond):
+    index = dag.reachability()
+
+    for n in dag.nodes:
+        assert index.descendants(n) == dags.Nodes(dag.walk_descendants(n))
+
+
+def test_index_is_reused_until_dag_changes(dag, diamond):
+    a, b, c, d, e = diamond
+
+    index = dag.reachability()
+    assert dag.reachability() is index
+
+    d.add_children(e)
+    new_index = dag.reachability()
+    assert new_index is not index
+    assert new_index.is_ancestor(a, e)
+
+
+def test_index_is_invalidated_by_removing_edges(dag, diamond):
+    a, b, c, d, e = diamond
+    assert dag.reachability().is_ancestor(b, d)
+
+    b.remove_children(d)
+
+    assert not dag.reachability().is_ancestor(b, d)
+
+
+def test_index_is_invalidated_by_adding_nodes(dag, diamond):
+    index = dag.reachability()
+
+    f = dag.layer(name="f")
+
+    assert f not in index
+    assert f in dag.reachability()
+
+
+def test_node_not_in_index_raises(dag, diamond):
+    other = dags.DAG().layer(name="a")
+
+    with pytest.raises(dags.exceptions.NodeNotInDAG):
+        dag.reachability().is_ancestor(other, diamond[3])
+
+
+def test_cycle_raises():
+    dag = dags.DAG()
+    a = dag.layer(name="a")
+    b = a.child_layer(name="b")
+    b.add_children(a)
+
+    with pytest.raises(dags.exceptions.CycleInDAG):
+        dag.reachability()
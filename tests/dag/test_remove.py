@@ -0,0 +1,104 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from htcondor import dags
+
+
+def test_remove_children(dag):
+    a = dag.layer(name="a")
+    b = a.child_layer(name="b")
+    c = a.child_layer(name="c")
+
+    a.remove_children(b)
+
+    assert a.children == dags.Nodes(c)
+    assert len(b.parents) == 0
+    assert (a, b) not in dag._edges
+
+
+def test_remove_parents(dag):
+    a = dag.layer(name="a")
+    b = dag.layer(name="b")
+    c = dag.layer(name="c")
+    c.add_parents(a, b)
+
+    c.remove_parents(a, b)
+
+    assert len(c.parents) == 0
+    assert len(a.children) == 0
+    assert len(list(dag.edges)) == 0
+
+
+def test_remove_edge_that_does_not_exist(dag):
+    a = dag.layer(name="a")
+    b = dag.layer(name="b")
+
+    a.remove_children(b)
+
+    assert len(list(dag.edges)) == 0
+
+
+def test_remove_node_removes_its_edges(dag):
+    a = dag.layer(name="a")
+    b = a.child_layer(name="b")
+    c = b.child_layer(name="c")
+    d = dag.layer(name="d")
+    d.add_parents(a)
+
+    dag.remove(b)
+
+    assert b not in dag
+    assert dag.nodes == dags.Nodes(a, c, d)
+    assert a.children == dags.Nodes(d)
+    assert len(c.parents) == 0
+    assert sorted((p.name, ch.name) for p, ch in dag.edges) == [("a", "d")]
+
+
+def test_remove_nodes(dag):
+    a = dag.layer(name="a")
+    b = a.child_layer(name="b")
+    c = b.child_layer(name="c")
+
+    dag.remove(dags.Nodes(a, c))
+
+    assert dag.nodes == dags.Nodes(b)
+    assert len(list(dag.edges)) == 0
+
+
+def test_removed_name_can_be_reused(dag):
+    a = dag.layer(name="a")
+
+    dag.remove(a)
+    dag.layer(name="a")
+
+    assert len(dag.nodes) == 1
+
+
+def test_remove_node_from_other_dag_is_ignored(dag):
+    a = dag.layer(name="a")
+    other = dags.DAG().layer(name="a")
+
+    dag.remove(other)
+
+    assert a in dag
+
+
+def test_remove_final_node(dag):
+    final = dag.final(name="final")
+
+    dag.remove(final)
+
+    dag.layer(name="final")
+    assert dag._final_node is None
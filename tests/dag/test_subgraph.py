@@ -0,0 +1,141 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from htcondor import dags
+
+
+@pytest.fixture(scope="function")
+def diamond(dag):
+    a = dag.layer(name="a", vars=[{"x": "1"}, {"x": "2"}])
+    b = a.child_layer(name="b")
+    c = a.child_layer(name="c", edge=dags.OneToOne(), vars=[{}, {}])
+    d = dag.layer(name="d")
+    d.add_parents(b, c)
+    return a, b, c, d
+
+
+def names(dag):
+    return sorted(n.name for n in dag.nodes)
+
+
+def edge_names(dag):
+    return sorted((p.name, c.name) for p, c in dag.edges)
+
+
+def test_subgraph_keeps_edges_between_selected_nodes(dag, diamond):
+    a, b, c, d = diamond
+
+    sub = dag.subgraph(a, c, d)
+
+    assert names(sub) == ["a", "c", "d"]
+    assert edge_names(sub) == [("a", "c"), ("c", "d")]
+
+
+def test_subgraph_shares_edges_and_configuration(dag, diamond):
+    a, b, c, d = diamond
+
+    sub = dag.subgraph(dags.Nodes(a, c))
+    sub_a = sub._nodes["a"]
+    sub_c = sub._nodes["c"]
+
+    assert sub_a is not a
+    assert sub_a._dag is sub
+    assert sub_a.vars is a.vars
+    assert sub._edges.get(sub_a, sub_c) is dag._edges.get(a, c)
+
+
+def test_subgraph_shares_submit_descriptions(dag, diamond):
+    a, b, c, d = diamond
+
+    sub = dag.subgraph(a, b)
+
+    assert sub._nodes["a"].submit_description is a.submit_description
+    assert sub._nodes["b"].submit_description is b.submit_description
+
+
+def test_subgraph_nodes_are_separate_from_original(dag, diamond):
+    a, b, c, d = diamond
+
+    sub = dag.subgraph(a, b)
+    sub._nodes["a"].retries = 5
+    sub.remove(sub._nodes["b"])
+
+    assert a.retries is None
+    assert a.children == dags.Nodes(b, c)
+
+
+def test_downstream_of(dag, diamond):
+    a, b, c, d = diamond
+
+    sub = dag.downstream_of(b)
+
+    assert names(sub) == ["b", "d"]
+    assert edge_names(sub) == [("b", "d")]
+
+
+def test_upstream_of(dag, diamond):
+    a, b, c, d = diamond
+
+    sub = dag.upstream_of(c)
+
+    assert names(sub) == ["a", "c"]
+    assert edge_names(sub) == [("a", "c")]
+
+
+def test_downstream_of_several_nodes(dag, diamond):
+    a, b, c, d = diamond
+
+    sub = dag.downstream_of(b, c)
+
+    assert names(sub) == ["b", "c", "d"]
+    assert edge_names(sub) == [("b", "d"), ("c", "d")]
+
+
+def test_subgraph_copies_dag_configuration(dag, diamond):
+    a, b, c, d = diamond
+    dag.max_jobs_per_category["foo"] = 3
+
+    sub = dag.subgraph(a)
+    sub.max_jobs_per_category["foo"] = 4
+
+    assert dag.max_jobs_per_category == {"foo": 3}
+
+
+def test_subgraph_with_final_node(dag, diamond):
+    final = dag.final(name="final")
+
+    sub = dag.subgraph(diamond[0], final)
+
+    assert sub._final_node.name == "final"
+    assert sub._final_node._dag is sub
+
+
+def test_subgraph_of_node_not_in_dag_raises(dag, diamond):
+    other = dags.DAG().layer(name="a")
+
+    with pytest.raises(dags.exceptions.NodeNotInDAG):
+        dag.subgraph(other)
+
+
+def test_subgraph_can_be_written(dag, diamond, tmp_path):
+    a, b, c, d = diamond
+
+    dags.write_dag(dag.downstream_of(a), tmp_path)
+
+    text = (tmp_path / dags.DEFAULT_DAG_FILE_NAME).read_text()
+    assert "JOB a:0" in text
+    assert "PARENT c:0 c:1 CHILD d:0" in text
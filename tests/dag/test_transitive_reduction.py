@@ -0,0 +1,108 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from htcondor import dags
+
+
+def edge_names(dag):
+    return sorted((p.name, c.name) for p, c in dag.edges)
+
+
+def test_removes_shortcut_edge(dag):
+    a = dag.layer(name="a")
+    b = a.child_layer(name="b")
+    c = b.child_layer(name="c")
+    a.add_children(c)
+
+    removed = dag.transitive_reduction()
+
+    assert [(p.name, c.name) for p, c in removed] == [("a", "c")]
+    assert edge_names(dag) == [("a", "b"), ("b", "c")]
+
+
+def test_removes_shortcut_over_long_path(dag):
+    layers = dag.add_layers({"name": f"layer{i}"} for i in range(6))
+    dag.add_edges(zip(layers, layers[1:]))
+    dag.add_edges([(layers[0], layers[5]), (layers[1], layers[4]), (layers[2], layers[3])])
+
+    dag.transitive_reduction()
+
+    assert edge_names(dag) == [(f"layer{i}", f"layer{i + 1}") for i in range(5)]
+
+
+def test_keeps_diamond(dag):
+    a = dag.layer(name="a")
+    b = a.child_layer(name="b")
+    c = a.child_layer(name="c")
+    d = dag.layer(name="d")
+    d.add_parents(b, c)
+
+    assert dag.transitive_reduction() == []
+    assert len(list(dag.edges)) == 4
+
+
+def test_keeps_shortcut_when_path_is_not_many_to_many(dag):
+    a = dag.layer(name="a", vars=[{}, {}])
+    b = a.child_layer(name="b", vars=[{}, {}], edge=dags.OneToOne())
+    c = b.child_layer(name="c", vars=[{}, {}], edge=dags.OneToOne())
+    a.add_children(c)
+
+    assert dag.transitive_reduction() == []
+    assert len(list(dag.edges)) == 3
+
+
+def test_keeps_shortcut_that_is_not_many_to_many(dag):
+    a = dag.layer(name="a", vars=[{}, {}])
+    b = a.child_layer(name="b")
+    c = b.child_layer(name="c", vars=[{}, {}])
+    a.add_children(c, edge=dags.OneToOne())
+
+    assert dag.transitive_reduction() == []
+
+
+def test_keeps_shortcut_around_empty_layer(dag):
+    a = dag.layer(name="a")
+    b = a.child_layer(name="b", vars=[])
+    c = b.child_layer(name="c")
+    a.add_children(c)
+
+    assert dag.transitive_reduction() == []
+
+
+def test_preserves_reachability(dag):
+    layers = dag.add_layers({"name": f"layer{i}"} for i in range(20))
+    dag.add_edges(
+        (layers[i], layers[j]) for i in range(20) for j in range(i + 1, 20) if (i * j) % 3 != 1
+    )
+    before = {n.name: sorted(d.name for d in dag.walk_descendants(n)) for n in dag.nodes}
+
+    removed = dag.transitive_reduction()
+
+    after = {n.name: sorted(d.name for d in dag.walk_descendants(n)) for n in dag.nodes}
+    assert len(removed) > 0
+    assert after == before
+
+
+def test_cycle_raises(dag):
+    a = dag.layer(name="a")
+    b = a.child_layer(name="b")
+    b.add_children(a)
+
+    with pytest.raises(dags.exceptions.CycleInDAG):
+        dag.transitive_reduction()
+
+    b.remove_children(a)
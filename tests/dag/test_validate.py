@@ -0,0 +1,161 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from htcondor import dags
+
+
+def error_types(excinfo):
+    return sorted(type(e).__name__ for e in excinfo.value.errors)
+
+
+def test_valid_dag_passes(dag):
+    a = dag.layer(name="a", vars=[{}] * 4)
+    b = a.child_layer(name="b", vars=[{}] * 4, edge=dags.OneToOne())
+    b.child_layer(name="c", vars=[{}] * 2, edge=dags.Grouper(2, 1))
+    dag.final(name="final")
+
+    dag.validate()
+
+
+def test_validate_collects_all_edge_errors(dag):
+    a = dag.layer(name="a", vars=[{}] * 4)
+    a.child_layer(name="b", vars=[{}] * 3, edge=dags.OneToOne())
+    a.child_layer(name="c", vars=[{}] * 3, edge=dags.Grouper(2, 1))
+
+    with pytest.raises(dags.exceptions.InvalidDAG) as excinfo:
+        dag.validate()
+
+    assert error_types(excinfo) == [
+        "IncompatibleGrouper",
+        "OneToOneEdgeNeedsSameNumberOfVars",
+    ]
+
+
+@pytest.mark.parametrize(
+    "edge",
+    [
+        dags.SparseEdge([0, 4], [0, 1]),
+        dags.SparseEdge([0, 1], [0, 3]),
+        dags.SparseEdge([0, -1], [0, 1]),
+        dags.SparseEdge.from_csr([0, 1, 1, 1, 2], [0, 1]),
+    ],
+)
+def test_validate_finds_sparse_edge_indices_outside_layers(dag, edge):
+    a = dag.layer(name="a", vars=[{}] * 4)
+    a.child_layer(name="b", vars=[{}] * 3, edge=edge)
+
+    with pytest.raises(dags.exceptions.InvalidDAG) as excinfo:
+        dag.validate()
+
+    assert error_types(excinfo) == ["IncompatibleSparseEdge"]
+
+
+def test_validate_allows_csr_rows_without_parents_past_child_layer(dag):
+    a = dag.layer(name="a", vars=[{}] * 4)
+    a.child_layer(name="b", vars=[{}] * 2, edge=dags.SparseEdge.from_csr([0, 1, 2, 2, 2], [3, 0]))
+
+    dag.validate()
+
+
+class CustomEdge(dags.BaseEdge):
+    def get_edges(self, parent, child, join_factory):
+        yield (0,), (0,)
+
+
+def explode(self, parent, child, join_factory):
+    raise Exception("validate should not generate edges")
+
+
+@pytest.mark.parametrize(
+    "edge", [CustomEdge(), dags.Window(2, 2), dags.ManyToMany(), dags.Slicer(slice(10, None))]
+)
+def test_validate_does_not_generate_edges(dag, monkeypatch, edge):
+    monkeypatch.setattr(type(edge), "get_edges", explode)
+    a = dag.layer(name="a", vars=[{}] * 4)
+    a.child_layer(name="b", vars=[{}] * 3, edge=edge)
+
+    dag.validate()
+
+
+def test_validate_finds_separator_in_layer_name(dag):
+    dag.layer(name=f"a{dags.DEFAULT_SEPARATOR}b")
+
+    with pytest.raises(dags.exceptions.InvalidDAG) as excinfo:
+        dag.validate()
+
+    assert error_types(excinfo) == ["LayerNameContainsSeparator"]
+
+
+def test_validate_uses_given_formatter(dag):
+    dag.layer(name="a-b")
+
+    dag.validate()
+
+    with pytest.raises(dags.exceptions.InvalidDAG):
+        dag.validate(node_name_formatter=dags.SimpleFormatter(separator="-"))
+
+
+def test_validate_finds_duplicate_names(dag):
+    a = dag.layer(name="a")
+    dag.final(name="b")
+    a.name = "b"
+
+    with pytest.raises(dags.exceptions.InvalidDAG) as excinfo:
+        dag.validate()
+
+    # put the DAG back together so that the fixture can describe it
+    a.name = "a"
+
+    assert "DuplicateNodeName" in error_types(excinfo)
+
+
+def test_validate_finds_cycles(dag):
+    a = dag.layer(name="a")
+    b = a.child_layer(name="b")
+    c = b.child_layer(name="c")
+    c.add_children(b)
+
+    with pytest.raises(dags.exceptions.InvalidDAG) as excinfo:
+        dag.validate()
+
+    assert error_types(excinfo) == ["CycleInDAG"]
+    assert "b, c" in str(excinfo.value.errors[0])
+
+
+def test_validate_finds_edges_to_other_dags(dag):
+    other = dags.DAG()
+    a = dag.layer(name="a")
+    b = other.layer(name="b")
+    a.add_children(b)
+
+    with pytest.raises(dags.exceptions.InvalidDAG) as excinfo:
+        dag.validate()
+
+    # put the DAG back together so that the fixture can describe it
+    dag._edges.pop(a, b)
+
+    assert "NodeNotInDAG" in error_types(excinfo)
+
+
+def test_write_with_validate_writes_nothing_for_invalid_dag(dag, tmp_path):
+    a = dag.layer(name="a", vars=[{}] * 4)
+    a.child_layer(name="b", vars=[{}] * 3, edge=dags.OneToOne())
+
+    with pytest.raises(dags.exceptions.InvalidDAG):
+        dags.write_dag(dag, tmp_path / "dag-dir", validate=True)
+
+    assert not (tmp_path / "dag-dir").exists()
@@ -99,6 +99,19 @@ def test_ancestors_of_nodes_joins_ancestors(dag):
     assert set(dags.Nodes(b, d).walk_ancestors()) == {a, c}
 
 
+def test_ancestors_of_nodes_visits_shared_ancestors_once(dag):
+    a = dag.layer(name="a")
+    b = a.child_layer(name="b")
+    c1 = b.child_layer(name="c1")
+    c2 = b.child_layer(name="c2")
+
+    assert sorted(n.name for n in dags.Nodes(c1, c2).walk_ancestors()) == ["a", "b"]
+
+
+def test_ancestors_of_no_nodes_is_empty():
+    assert list(dags.Nodes().walk_ancestors()) == []
+
+
 def test_descendants_has_all_descendants_linear(dag):
     a = dag.layer(name="a")
     b = a.child_layer(name="b")
@@ -132,3 +145,13 @@ def test_descendants_of_nodes_joins_descendants(dag):
     d = c.child_layer(name="d")
 
     assert set(dags.Nodes(a, c).walk_descendants()) == {b, d}
+
+
+def test_descendants_of_nodes_visits_shared_descendants_once(dag):
+    a1 = dag.layer(name="a1")
+    a2 = dag.layer(name="a2")
+    b = a1.child_layer(name="b")
+    b.add_parents(a2)
+    b.child_layer(name="c")
+
+    assert sorted(n.name for n in dags.Nodes(a1, a2).walk_descendants()) == ["b", "c"]
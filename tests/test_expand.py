@@ -0,0 +1,69 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from htcondor import dags
+from htcondor.dags.expand import ExpandedGraph
+from htcondor.dags.writer import DAGWriter
+
+
+def edges_of(graph):
+    return sorted((p, c) for p in range(len(graph)) for c in graph.children_of(p))
+
+
+def test_layers_get_consecutive_ids(dag):
+    a = dag.layer(name="a", vars=[{}] * 3)
+    b = a.child_layer(name="b", vars=[{}] * 2, edge=dags.Grouper(3, 2))
+
+    graph = ExpandedGraph(dag)
+
+    assert graph.num_nodes == 5
+    assert list(graph.ids_of(a)) == [0, 1, 2]
+    assert list(graph.ids_of(b)) == [3, 4]
+    assert graph.locate(4) == (b, 1)
+
+
+def test_one_to_one(dag):
+    a = dag.layer(name="a", vars=[{}] * 2)
+    a.child_layer(name="b", vars=[{}] * 2, edge=dags.OneToOne())
+
+    graph = ExpandedGraph(dag)
+
+    assert graph.num_joins == 0
+    assert edges_of(graph) == [(0, 2), (1, 3)]
+    assert list(graph.num_parents) == [0, 0, 1, 1]
+
+
+def test_many_to_many_uses_join_node(dag):
+    a = dag.layer(name="a", vars=[{}] * 2)
+    a.child_layer(name="b", vars=[{}] * 2)
+
+    graph = ExpandedGraph(dag)
+
+    assert graph.num_joins == 1
+    assert graph.locate(4) is None
+    assert list(graph.layer_ids) == [0, 0, 1, 1, -1]
+    assert edges_of(graph) == [(0, 4), (1, 4), (4, 2), (4, 3)]
+
+
+def test_matches_number_of_joins_written(dag):
+    a = dag.layer(name="a", vars=[{}] * 4)
+    b = a.child_layer(name="b", vars=[{}] * 4)
+    c = b.child_layer(name="c", vars=[{}] * 2, edge=dags.Grouper(2, 1))
+    c.child_layer(name="d", vars=[{}] * 3)
+
+    writer = DAGWriter(dag)
+    list(writer.yield_dag_file_lines())
+
+    assert ExpandedGraph(dag).num_joins == writer.join_factory.count
@@ -0,0 +1,238 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+import htcondor
+
+from htcondor import dags
+from htcondor.dags.local import split_arguments
+
+
+def shell(command, **kwargs):
+    """A submit description that runs a shell command."""
+    return htcondor.Submit(dict(executable="/bin/sh", arguments=f"\"-c '{command}'\"", **kwargs))
+
+
+def lines(path):
+    return path.read_text().split()
+
+
+@pytest.mark.parametrize(
+    "arguments, expected",
+    [
+        ("a b  c", ["a", "b", "c"]),
+        ('"a b"', ["a", "b"]),
+        ("\"-c 'echo hi there'\"", ["-c", "echo hi there"]),
+        ('"say ""hi"""', ["say", '"hi"']),
+        ("", []),
+    ],
+)
+def test_split_arguments(arguments, expected):
+    assert split_arguments(arguments) == expected
+
+
+def test_runs_nodes_in_dependency_order(dag, tmp_path):
+    a = dag.layer(
+        name="a", submit_description=shell("echo a$(x) >> log"), vars=[{"x": "0"}, {"x": "1"}]
+    )
+    a.child_layer(name="b", submit_description=shell("echo $(JOB) >> log"))
+
+    result = dags.run_locally(dag, tmp_path)
+
+    assert result.return_code == 0
+    assert result.num_succeeded == 3
+    assert result.rescue_file is None
+    assert sorted(lines(tmp_path / "log")[:2]) == ["a0", "a1"]
+    assert lines(tmp_path / "log")[2] == "b:0"
+
+
+def test_output_and_error_files(dag, tmp_path):
+    dag.layer(
+        name="a", submit_description=shell("echo out; echo err >&2", output="a.out", error="a.err"),
+    )
+
+    dags.run_locally(dag, tmp_path)
+
+    assert lines(tmp_path / "a.out") == ["out"]
+    assert lines(tmp_path / "a.err") == ["err"]
+
+
+def test_failure_blocks_children_and_writes_rescue_file(dag, tmp_path):
+    a = dag.layer(name="a", submit_description=shell("exit $(x)"), vars=[{"x": "0"}, {"x": "3"}])
+    a.child_layer(
+        name="b", submit_description=shell("touch b"), vars=[{}] * 2, edge=dags.OneToOne()
+    )
+
+    result = dags.run_locally(dag, tmp_path)
+
+    assert result.return_code == 1
+    assert result.failed == ["a:1"]
+    assert result.num_succeeded == 2
+    assert result.num_unrun == 1
+    assert result.rescue_file == tmp_path / "dagfile.dag.rescue001"
+    assert dags.find_rescue_file(tmp_path) == result.rescue_file
+
+    dags.rescue(dag, result.rescue_file)
+    assert a.done == {0: True}
+
+
+def test_rescue_files_are_numbered(dag, tmp_path):
+    dag.layer(name="a", submit_description=shell("exit 1"))
+
+    dags.run_locally(dag, tmp_path)
+    result = dags.run_locally(dag, tmp_path)
+
+    assert result.rescue_file.name == "dagfile.dag.rescue002"
+
+
+def test_retries(dag, tmp_path):
+    dag.layer(name="a", submit_description=shell("echo x >> tries; exit 1"), retries=2)
+
+    result = dags.run_locally(dag, tmp_path)
+
+    assert result.num_failed == 1
+    assert len(lines(tmp_path / "tries")) == 3
+
+
+def test_retry_unless_exit(dag, tmp_path):
+    dag.layer(
+        name="a",
+        submit_description=shell("echo x >> tries; exit 2"),
+        retries=5,
+        retry_unless_exit=2,
+    )
+
+    dags.run_locally(dag, tmp_path)
+
+    assert len(lines(tmp_path / "tries")) == 1
+
+
+def test_pre_and_post_scripts(dag, tmp_path):
+    (tmp_path / "script.sh").write_text('echo "$@" >> scripts\nexit 0\n')
+    dag.layer(
+        name="a",
+        submit_description=shell("exit 7"),
+        pre=dags.Script("/bin/sh", arguments=["script.sh", "pre", "$JOB", "$RETRY"]),
+        post=dags.Script("/bin/sh", arguments=["script.sh", "post", "$JOB", "$RETURN"]),
+    )
+
+    result = dags.run_locally(dag, tmp_path)
+
+    # the POST script decides whether the node succeeded
+    assert result.return_code == 0
+    assert (tmp_path / "scripts").read_text().splitlines() == ["pre a:0 0", "post a:0 7"]
+
+
+def test_pre_skip(dag, tmp_path):
+    a = dag.layer(
+        name="a",
+        submit_description=shell("touch ran"),
+        pre=dags.Script("/bin/sh", arguments=["-c", "exit 5"]),
+        pre_skip_exit_code=5,
+    )
+    a.child_layer(name="b", submit_description=shell("touch child"))
+
+    result = dags.run_locally(dag, tmp_path)
+
+    assert result.num_skipped == 1
+    assert not (tmp_path / "ran").exists()
+    assert (tmp_path / "child").exists()
+
+
+def test_failed_pre_script_fails_node(dag, tmp_path):
+    dag.layer(
+        name="a",
+        submit_description=shell("touch ran"),
+        pre=dags.Script("/bin/sh", arguments=["-c", "exit 1"]),
+    )
+
+    result = dags.run_locally(dag, tmp_path)
+
+    assert result.num_failed == 1
+    assert not (tmp_path / "ran").exists()
+
+
+def test_abort_dag_on(dag, tmp_path):
+    a = dag.layer(
+        name="a",
+        submit_description=shell("exit 3"),
+        abort=dags.DAGAbortCondition(node_exit_value=3, dag_return_value=9),
+        retries=5,
+    )
+    a.child_layer(name="b", submit_description=shell("touch b"))
+
+    result = dags.run_locally(dag, tmp_path)
+
+    assert result.aborted
+    assert result.return_code == 9
+    assert result.num_unrun == 1
+    assert result.rescue_file is not None
+
+
+def test_done_and_noop_nodes_do_not_run(dag, tmp_path):
+    a = dag.layer(
+        name="a",
+        submit_description=shell("echo $(JOB) >> ran"),
+        vars=[{}] * 3,
+        done={0: True},
+        noop={1: True},
+    )
+    a.child_layer(name="b", submit_description=shell("echo $(JOB) >> ran"))
+
+    result = dags.run_locally(dag, tmp_path)
+
+    assert result.num_succeeded == 4
+    assert lines(tmp_path / "ran") == ["a:2", "b:0"]
+
+
+def test_category_limit(dag, tmp_path):
+    dag.layer(
+        name="a",
+        submit_description=shell("mkdir lock || exit 1; sleep 0.05; rmdir lock"),
+        vars=[{}] * 4,
+        category="one",
+    )
+    dag.max_jobs_per_category["one"] = 1
+
+    result = dags.run_locally(dag, tmp_path, max_workers=4)
+
+    assert result.return_code == 0
+
+
+def test_node_dir(dag, tmp_path):
+    (tmp_path / "sub").mkdir()
+    dag.layer(name="a", submit_description=shell("touch here"), dir="sub")
+
+    dags.run_locally(dag, tmp_path)
+
+    assert (tmp_path / "sub" / "here").exists()
+
+
+def test_final_node_runs_after_failure(dag, tmp_path):
+    dag.layer(name="a", submit_description=shell("exit 1"))
+    dag.final(name="final", submit_description=shell("touch final"))
+
+    result = dags.run_locally(dag, tmp_path)
+
+    assert result.return_code == 1
+    assert (tmp_path / "final").exists()
+
+
+def test_subdag_cannot_run_locally(dag, tmp_path):
+    dag.subdag(name="sub", dag_file="sub.dag")
+
+    with pytest.raises(dags.exceptions.CannotRunLocally):
+        dags.run_locally(dag, tmp_path)
@@ -0,0 +1,384 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pickle
+
+import pytest
+
+import htcondor
+
+from htcondor import dags
+
+LOG = """\
+1000 INTERNAL *** DAGMAN_STARTED 1.0 ***
+1001 a:0 SUBMIT 2.0 local - 1
+1001 a:1 SUBMIT 3.0 local - 2
+1002 a:0 EXECUTE 2.0 local - 3
+1002 a:1 EXECUTE 3.0 local - 4
+1012 a:0 JOB_TERMINATED 2.0 local - 5
+1012 a:0 JOB_SUCCESS 0 local - 6
+1102 a:1 JOB_TERMINATED 3.0 local - 7
+1102 a:1 JOB_FAILURE 1 local - 8
+1103 __JOIN__:0 SUBMIT 4.0 local - 9
+1104 b:0 SUBMIT 5.0 local - 10
+"""
+
+
+def formatter():
+    return dags.SimpleFormatter(separator=":")
+
+
+@pytest.fixture
+def log(tmp_path):
+    return tmp_path / "dagman.jobstate.log"
+
+
+def test_counts_events_per_layer(log):
+    log.write_text(LOG)
+    tailer = dags.JobstateLogTailer(log, node_name_formatter=formatter())
+
+    assert tailer.poll() == 11
+
+    a = tailer.layers["a"]
+    assert (a.submitted, a.idle, a.running, a.done, a.failed) == (2, 0, 0, 1, 1)
+    b = tailer.layers["b"]
+    assert (b.submitted, b.idle, b.running, b.done, b.failed) == (1, 1, 0, 0, 0)
+    assert "__JOIN__" not in tailer.layers
+    assert tailer.dagman_started == 1000
+    assert not tailer.finished
+
+
+def test_runtime_histogram(log):
+    log.write_text(LOG)
+    tailer = dags.JobstateLogTailer(log, node_name_formatter=formatter())
+    tailer.poll()
+
+    runtimes = tailer.layers["a"].runtimes
+    assert runtimes.count == 2
+    assert runtimes.mean == 55
+    assert runtimes.max == 100
+    assert runtimes.counts[4] == 1  # 10 seconds
+    assert runtimes.counts[7] == 1  # 100 seconds
+    assert runtimes.quantile(0.5) == 16
+    assert runtimes.quantile(1) == 100
+
+
+def test_poll_only_reads_new_whole_lines(log):
+    log.write_text("1001 a:0 SUBMIT 2.0 local - 1\n1002 a:0 EXEC")
+    tailer = dags.JobstateLogTailer(log, node_name_formatter=formatter())
+
+    assert tailer.poll() == 1
+    assert tailer.layers["a"].idle == 1
+    assert tailer.poll() == 0
+
+    with log.open(mode="a") as f:
+        f.write("UTE 2.0 local - 2\n")
+
+    assert tailer.poll() == 1
+    assert tailer.layers["a"].running == 1
+    assert tailer.offset == log.stat().st_size
+
+
+def test_resume_after_pickling(log):
+    log.write_text(LOG)
+    tailer = dags.JobstateLogTailer(log, node_name_formatter=formatter())
+    tailer.poll()
+
+    with log.open(mode="a") as f:
+        f.write("1110 b:0 EXECUTE 5.0 local - 11\n")
+        f.write("1120 INTERNAL *** DAGMAN_FINISHED 1 ***\n")
+
+    resumed = pickle.loads(pickle.dumps(tailer))
+
+    assert resumed.poll() == 2
+    assert resumed.layers["b"].running == 1
+    assert resumed.layers["a"].done == 1
+    assert resumed.finished
+    assert resumed.dagman_exit_code == 1
+
+
+def test_start_from_offset(log):
+    first = "1001 a:0 SUBMIT 2.0 local - 1\n"
+    log.write_text(first + "1002 a:0 EXECUTE 2.0 local - 2\n")
+    tailer = dags.JobstateLogTailer(log, node_name_formatter=formatter(), offset=len(first))
+
+    assert tailer.poll() == 1
+    assert tailer.layers["a"].submitted == 0
+
+
+def test_retry_moves_node_out_of_failed(log):
+    log.write_text(
+        "1 a:0 SUBMIT 2.0 local - 1\n"
+        "2 a:0 JOB_FAILURE 1 local - 2\n"
+        "3 a:0 SUBMIT 3.0 local - 3\n"
+    )
+    tailer = dags.JobstateLogTailer(log, node_name_formatter=formatter())
+    tailer.poll()
+
+    a = tailer.layers["a"]
+    assert (a.submitted, a.idle, a.failed) == (2, 1, 0)
+
+
+def test_eviction_returns_job_to_idle(log):
+    log.write_text(
+        "1 a:0 SUBMIT 2.0 local - 1\n"
+        "2 a:0 EXECUTE 2.0 local - 2\n"
+        "5 a:0 JOB_EVICTED 2.0 local - 3\n"
+    )
+    tailer = dags.JobstateLogTailer(log, node_name_formatter=formatter())
+    tailer.poll()
+
+    a = tailer.layers["a"]
+    assert (a.idle, a.running) == (1, 0)
+    assert a.runtimes.count == 1
+
+
+POST_LOG = """\
+1 a:0 SUBMIT 2.0 local - 1
+2 a:0 EXECUTE 2.0 local - 2
+3 a:0 JOB_TERMINATED 2.0 local - 3
+3 a:0 JOB_SUCCESS 0 local - 4
+4 a:0 POST_SCRIPT_STARTED 2.0 local - 5
+5 a:0 POST_SCRIPT_TERMINATED 2.0 local - 6
+5 a:0 POST_SCRIPT_FAILURE 2.0 local - 7
+"""
+
+
+def test_post_script_decides_outcome_when_dag_is_given(dag, log):
+    dag.layer(name="a", post=dags.Script(executable="post.sh"))
+    log.write_text(POST_LOG)
+    tailer = dags.JobstateLogTailer(log, node_name_formatter=formatter(), dag=dag)
+    tailer.poll()
+
+    a = tailer.layers["a"]
+    assert (a.done, a.failed) == (0, 1)
+
+
+@pytest.mark.parametrize(
+    "job_event, post_event, expected",
+    [
+        ("JOB_SUCCESS 0", "POST_SCRIPT_SUCCESS", (1, 0)),
+        ("JOB_SUCCESS 0", "POST_SCRIPT_FAILURE", (0, 1)),
+        ("JOB_FAILURE 1", "POST_SCRIPT_SUCCESS", (1, 0)),
+        ("JOB_FAILURE 1", "POST_SCRIPT_FAILURE", (0, 1)),
+    ],
+)
+def test_post_script_decides_outcome_without_dag(log, job_event, post_event, expected):
+    log.write_text(
+        "\n".join(
+            (
+                "1 a:0 SUBMIT 2.0 local - 1",
+                "2 a:0 EXECUTE 2.0 local - 2",
+                "3 a:0 JOB_TERMINATED 2.0 local - 3",
+                f"3 a:0 {job_event} local - 4",
+                "4 a:0 POST_SCRIPT_STARTED 2.0 local - 5",
+                "5 a:0 POST_SCRIPT_TERMINATED 2.0 local - 6",
+                f"5 a:0 {post_event} 2.0 local - 7",
+                "",
+            )
+        )
+    )
+    tailer = dags.JobstateLogTailer(log, node_name_formatter=formatter())
+    tailer.poll()
+
+    a = tailer.layers["a"]
+    assert (a.done, a.failed) == expected
+    assert tailer.totals().done + tailer.totals().failed == 1
+    assert tailer.failed_nodes == ({("a", 0)} if expected[1] else set())
+    assert "a" in tailer.post_layers
+
+
+def test_post_script_layer_is_learned_for_later_nodes(log):
+    log.write_text(POST_LOG + POST_LOG.replace("a:0", "a:1"))
+    tailer = dags.JobstateLogTailer(log, node_name_formatter=formatter())
+    tailer.poll()
+
+    a = tailer.layers["a"]
+    assert (a.done, a.failed) == (0, 2)
+
+
+def test_pre_script_failure_fails_node(log):
+    log.write_text("1 a:0 PRE_SCRIPT_FAILURE - local - 1\n")
+    tailer = dags.JobstateLogTailer(log, node_name_formatter=formatter())
+    tailer.poll()
+
+    assert tailer.layers["a"].failed == 1
+
+
+def test_unparseable_names_are_their_own_layer(log):
+    log.write_text("1 final SUBMIT 2.0 local - 1\n")
+    tailer = dags.JobstateLogTailer(log, node_name_formatter=formatter())
+    tailer.poll()
+
+    assert tailer.layers["final"].submitted == 1
+
+
+def test_truncated_log_is_read_again(log):
+    log.write_text(LOG)
+    tailer = dags.JobstateLogTailer(log, node_name_formatter=formatter())
+    tailer.poll()
+
+    log.write_text("1 c:0 SUBMIT 2.0 local - 1\n")
+
+    assert tailer.poll() == 1
+    assert tailer.layers["c"].submitted == 1
+
+
+def test_missing_log_reads_nothing(log):
+    tailer = dags.JobstateLogTailer(log)
+
+    assert tailer.poll() == 0
+    assert tailer.offset == 0
+
+
+def test_small_chunks(log):
+    log.write_text(LOG)
+    tailer = dags.JobstateLogTailer(log, node_name_formatter=formatter(), chunk_size=7)
+
+    assert tailer.poll() == 11
+    assert tailer.totals().submitted == 3
+
+
+def test_reads_log_written_for_dag(dag, tmp_path):
+    dag.layer(name="a", submit_description=htcondor.Submit(), vars=[{}] * 2)
+    dags.write_dag(dag, tmp_path, node_name_formatter=formatter())
+
+    log = tmp_path / "jobstate.log"
+    log.write_text("1 a:1 SUBMIT 2.0 local - 1\n")
+    tailer = dags.JobstateLogTailer(log, node_name_formatter=formatter(), dag=dag)
+    tailer.poll()
+
+    assert tailer.layers["a"].submitted == 1
+
+
+def node_ad(name, status):
+    return f"""[
+  Type = "NodeStatus";
+  Node = "{name}";
+  NodeStatus = {status}; /* "STATUS_WHATEVER" */
+  StatusDetails = "";
+  RetryCount = 0;
+  JobProcsQueued = 0;
+  JobProcsHeld = 0;
+]
+"""
+
+
+def node_status_file(statuses, next_update=1010):
+    return (
+        """[
+  Type = "DagStatus";
+  DagFiles = {
+    "dagfile.dag"
+  };
+  Timestamp = 1000; /* "Thu Jan  1 00:16:40 1970" */
+  DagStatus = 3; /* "STATUS_SUBMITTED ()" */
+  NodesTotal = 5;
+  NodesDone = 2;
+  NodesFailed = 1;
+  StatusDetails = "";
+]
+"""
+        + "".join(node_ad(name, status) for name, status in statuses)
+        + f"""[
+  Type = "StatusEnd";
+  EndTime = 1000; /* "Thu Jan  1 00:16:40 1970" */
+  NextUpdate = {next_update}; /* "Thu Jan  1 00:16:50 1970" */
+]
+"""
+    )
+
+
+STATUSES = [
+    ("a:0", dags.NodeStatus.DONE),
+    ("a:1", dags.NodeStatus.DONE),
+    ("a:2", dags.NodeStatus.ERROR),
+    ("__JOIN__:0", dags.NodeStatus.READY),
+    ("b:0", dags.NodeStatus.SUBMITTED),
+    ("final", dags.NodeStatus.NOT_READY),
+]
+
+
+@pytest.fixture
+def status_file(tmp_path):
+    return tmp_path / "dagfile.dag.status"
+
+
+def test_reads_node_status_file(status_file):
+    status_file.write_text(node_status_file(STATUSES))
+    reader = dags.NodeStatusFileReader(status_file, node_name_formatter=formatter())
+
+    assert reader.poll()
+
+    assert reader.layers["a"][dags.NodeStatus.DONE] == 2
+    assert reader.layers["a"][dags.NodeStatus.ERROR] == 1
+    assert reader.layers["a"].total == 3
+    assert reader.layers["b"][dags.NodeStatus.SUBMITTED] == 1
+    assert reader.layers["final"][dags.NodeStatus.NOT_READY] == 1
+    assert "__JOIN__" not in reader.layers
+    assert reader.totals().total == 5
+    assert reader.dag_status["NodesDone"] == 2
+    assert reader.dag_status["DagStatus"] == 3
+    assert reader.next_update == 1010
+
+
+def test_poll_skips_unchanged_file(status_file):
+    status_file.write_text(node_status_file(STATUSES))
+    reader = dags.NodeStatusFileReader(status_file, node_name_formatter=formatter())
+
+    assert reader.poll()
+    assert not reader.poll()
+
+
+def test_poll_rereads_replaced_file(status_file, tmp_path):
+    status_file.write_text(node_status_file(STATUSES))
+    reader = dags.NodeStatusFileReader(status_file, node_name_formatter=formatter())
+    reader.poll()
+
+    new = tmp_path / "new"
+    new.write_text(node_status_file([("b:0", dags.NodeStatus.DONE)], next_update=1020))
+    new.replace(status_file)
+
+    assert reader.poll()
+    assert set(reader.layers) == {"b"}
+    assert reader.layers["b"][dags.NodeStatus.DONE] == 1
+    assert reader.next_update == 1020
+
+
+def test_missing_status_file(status_file):
+    reader = dags.NodeStatusFileReader(status_file)
+
+    assert not reader.poll()
+    assert reader.layers == {}
+
+
+def test_small_chunks_status_file(status_file):
+    status_file.write_text(node_status_file(STATUSES))
+    reader = dags.NodeStatusFileReader(status_file, node_name_formatter=formatter(), chunk_size=13)
+    reader.poll()
+
+    assert reader.totals().total == 5
+    assert reader.dag_status["NodesTotal"] == 5
+    assert reader.next_update == 1010
+
+
+def test_reader_takes_node_status_file_config(status_file):
+    status_file.write_text(node_status_file(STATUSES))
+    reader = dags.NodeStatusFileReader(
+        dags.NodeStatusFile(status_file), node_name_formatter=formatter()
+    )
+
+    assert reader.poll()
+    assert reader.path == status_file
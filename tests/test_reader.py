@@ -0,0 +1,273 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+from pathlib import Path
+
+import pytest
+
+import htcondor
+
+from htcondor import dags
+
+SUBMIT = htcondor.Submit(dict(executable="/bin/echo", arguments="$(x)"))
+
+
+def round_trip(dag, tmp_path, **kwargs):
+    """Write the dag, read it back, and write it again; return the new DAG and both files' text."""
+    first = dags.write_dag(dag, tmp_path / "first", **kwargs)
+    read = dags.read_dag(first, **kwargs)
+    second = dags.write_dag(read, tmp_path / "second", **kwargs)
+    return read, first.read_text(), second.read_text()
+
+
+@pytest.mark.parametrize(
+    "edge, num_parent_vars, num_child_vars",
+    [
+        (dags.ManyToMany(), 3, 4),
+        (dags.ManyToMany(), 1, 4),
+        (dags.OneToOne(), 5, 5),
+        (dags.Grouper(2, 3), 4, 6),
+        (dags.Grouper(3, 2, ragged=True), 7, 5),
+        (dags.Grouper(parent_boundaries=[1, 4], child_boundaries=[2, 3]), 6, 5),
+        (dags.Slicer(slice(1, None, 2), slice(None, 3)), 8, 8),
+        (dags.Window(2, 1), 10, 10),
+        (dags.Window(1, 1, compress=False), 6, 6),
+        (dags.Window(4, 6), 3, 9),
+        (dags.SparseEdge([0, 3, 2], [1, 1, 0]), 4, 2),
+    ],
+)
+def test_edges_round_trip(dag, tmp_path, edge, num_parent_vars, num_child_vars):
+    parent = dag.layer(name="parent", submit_description=SUBMIT, vars=[{}] * num_parent_vars)
+    parent.child_layer(
+        name="child", submit_description=SUBMIT, vars=[{}] * num_child_vars, edge=edge
+    )
+
+    read, first, second = round_trip(dag, tmp_path)
+
+    assert first == second
+    recovered = read._edges.get(read._nodes["parent"], read._nodes["child"])
+    assert type(recovered) is type(edge)
+
+
+def random_edge(rng, parent, child):
+    """Pick a random edge that connects at least one pair of nodes between the layers."""
+    num_parent_vars, num_child_vars = len(parent), len(child)
+    num_boundaries = rng.randint(1, min(num_parent_vars, num_child_vars) - 1)
+    edge = rng.choice(
+        [
+            dags.ManyToMany(),
+            dags.OneToOne(),
+            dags.Grouper(rng.randint(1, 4), rng.randint(1, 4)),
+            dags.Grouper(rng.randint(1, 4), rng.randint(1, 4), ragged=True),
+            dags.Grouper(
+                parent_boundaries=sorted(rng.sample(range(1, num_parent_vars), num_boundaries)),
+                child_boundaries=sorted(rng.sample(range(1, num_child_vars), num_boundaries)),
+            ),
+            dags.Slicer(
+                slice(rng.randint(0, 1), None, rng.randint(1, 2)), slice(rng.randint(0, 1), None)
+            ),
+            dags.Window(rng.randint(0, 6), rng.randint(0, 6), compress=rng.random() < 0.8),
+            dags.SparseEdge(
+                *zip(
+                    *(
+                        (rng.randrange(num_parent_vars), rng.randrange(num_child_vars))
+                        for _ in range(rng.randint(1, num_parent_vars * num_child_vars))
+                    )
+                )
+            ),
+        ]
+    )
+    try:
+        list(edge.get_edges(parent, child, dags.JoinFactory()))
+    except dags.exceptions.DAGsException:
+        return random_edge(rng, parent, child)
+    return edge
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_random_dags_round_trip(tmp_path, seed):
+    rng = random.Random(seed)
+    dag = dags.DAG()
+    layers = []
+    for index in range(rng.randint(2, 6)):
+        layer = dag.layer(
+            name=f"layer{index}", submit_description=SUBMIT, vars=[{}] * rng.randint(2, 12)
+        )
+        for parent in rng.sample(layers, min(len(layers), rng.randint(1, 3))):
+            parent.add_children(layer, edge=random_edge(rng, parent, layer))
+        layers.append(layer)
+
+    read, first, second = round_trip(dag, tmp_path)
+
+    assert first == second
+
+
+def test_irregular_edge_becomes_sparse(tmp_path):
+    (tmp_path / "dagfile.dag").write_text(
+        "JOB a:0 a.sub\nJOB a:1 a.sub\nJOB a:2 a.sub\n"
+        "JOB b:0 b.sub\nJOB b:1 b.sub\n"
+        "PARENT a:0 CHILD b:1\n"
+        "PARENT a:2 a:1 CHILD b:0\n"
+    )
+
+    dag = dags.read_dag(tmp_path / "dagfile.dag")
+
+    edge = dag._edges.get(dag._nodes["a"], dag._nodes["b"])
+    assert isinstance(edge, dags.SparseEdge)
+    assert sorted(zip(edge.parents, edge.children)) == [(0, 1), (1, 0), (2, 0)]
+
+
+def test_node_settings_round_trip(dag, tmp_path):
+    dag.layer(
+        name="a",
+        submit_description=SUBMIT,
+        vars=[{"x": str(i), "y": 'a "quoted" \\ value'} for i in range(3)],
+        dir="subdir",
+        noop={1: True},
+        done={2: True},
+        retries=3,
+        retry_unless_exit=2,
+        pre=dags.Script("pre.sh", ["1", "2"], retry=True, retry_status=4, retry_delay=5),
+        post=dags.Script("post.sh"),
+        pre_skip_exit_code=7,
+        priority=4,
+        category="c",
+        abort=dags.DAGAbortCondition(3, 4),
+    )
+
+    read, first, second = round_trip(dag, tmp_path)
+
+    assert first == second
+    a = read._nodes["a"]
+    assert a.vars == [{"x": str(i), "y": 'a "quoted" \\ value'} for i in range(3)]
+    assert a.dir == Path("subdir")
+    assert a.noop == {1: True}
+    assert a.done == {2: True}
+    assert (a.retries, a.retry_unless_exit) == (3, 2)
+    assert a.pre.executable == "pre.sh"
+    assert a.pre.arguments == ["1", "2"]
+    assert (a.pre.retry, a.pre.retry_status, a.pre.retry_delay) == (True, 4, 5)
+    assert a.post.executable == "post.sh"
+    assert a.pre_skip_exit_code == 7
+    assert a.priority == 4
+    assert a.category == "c"
+    assert (a.abort.node_exit_value, a.abort.dag_return_value) == (3, 4)
+
+
+def test_dag_settings_round_trip(tmp_path):
+    dag = dags.DAG(
+        dagman_config={"DAGMAN_MAX_JOBS_IDLE": "10"},
+        dagman_job_attributes={"foo": "bar"},
+        max_jobs_by_category={"c": 3},
+        dot_config=dags.DotConfig("d.dot", update=True, overwrite=False, include_file="inc"),
+        jobstate_log="jobstate.log",
+        node_status_file=dags.NodeStatusFile("status", update_time=5, always_update=True),
+    )
+    dag.layer(name="a", submit_description=SUBMIT, category="c")
+
+    read, first, second = round_trip(dag, tmp_path)
+
+    assert first == second
+    assert read.dagman_config == {"DAGMAN_MAX_JOBS_IDLE": "10"}
+    assert read.dagman_job_attrs == {"foo": "bar"}
+    assert read.max_jobs_per_category == {"c": 3}
+    assert read.jobstate_log == Path("jobstate.log")
+    assert read.node_status_file.update_time == 5
+    assert read.node_status_file.always_update
+    assert read.dot_config.update
+    assert not read.dot_config.overwrite
+    assert read.dot_config.include_file == Path("inc")
+
+
+def test_subdag_and_final_round_trip(dag, tmp_path):
+    a = dag.layer(name="a", submit_description=SUBMIT)
+    a.child_subdag(name="sub", dag_file="sub.dag", retries=2)
+    dag.final(name="fin", submit_description=SUBMIT, post=dags.Script("post.sh"))
+
+    read, first, second = round_trip(dag, tmp_path)
+
+    assert first == second
+    assert isinstance(read._nodes["sub"], dags.SubDAG)
+    assert read._nodes["sub"].dag_file == Path("sub.dag")
+    assert read._nodes["sub"].retries == 2
+    assert read._final_node.name == "fin"
+    assert read._final_node.post.executable == "post.sh"
+
+
+def test_custom_formatter_round_trip(dag, tmp_path):
+    formatter = dags.SimpleFormatter(separator="-", index_format="{:05}", offset=1)
+    parent = dag.layer(name="a", submit_description=SUBMIT, vars=[{}] * 4)
+    parent.child_layer(name="b", submit_description=SUBMIT, vars=[{}] * 4, edge=dags.OneToOne())
+
+    read, first, second = round_trip(dag, tmp_path, node_name_formatter=formatter)
+
+    assert first == second
+    assert len(read._nodes["a"].vars) == 4
+
+
+def test_submit_descriptions(dag, tmp_path):
+    dag.layer(name="a", submit_description=SUBMIT)
+    dag.layer(name="b", submit_description=Path("/absolute/b.sub"))
+    dag_file = dags.write_dag(dag, tmp_path)
+
+    read = dags.read_dag(dag_file)
+    assert isinstance(read._nodes["a"].submit_description, htcondor.Submit)
+    assert str(read._nodes["a"].submit_description) == str(SUBMIT)
+    assert read._nodes["b"].submit_description == Path("/absolute/b.sub")
+
+    read = dags.read_dag(dag_file, load_submit_descriptions=False)
+    assert read._nodes["a"].submit_description == tmp_path / "a.sub"
+
+
+def test_hand_written_dag(tmp_path):
+    (tmp_path / "dagfile.dag").write_text(
+        """\
+# a comment
+MAXJOBS big 2
+JOB setup setup.sub
+JOB work:0 work.sub
+Job work:1 work.sub
+VARS work:1 x="1"
+CATEGORY work:0 big
+PARENT setup CHILD work:0 work:1
+DONE setup
+"""
+    )
+
+    dag = dags.read_dag(tmp_path / "dagfile.dag")
+
+    assert dag.max_jobs_per_category == {"big": 2}
+    setup, work = dag._nodes["setup"], dag._nodes["work"]
+    assert work.vars == [{}, {"x": "1"}]
+    assert work.category == "big"
+    assert setup.done == {0: True}
+    assert isinstance(dag._edges.get(setup, work), dags.ManyToMany)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "SPLICE other other.dag\n",
+        "JOB a:0\n",
+        "JOB a:0 a.sub\nRETRY a:0 lots\n",
+        "JOB a:0 a.sub\nPARENT a:0 CHILD b:0\n",
+    ],
+)
+def test_bad_dag_files(tmp_path, text):
+    (tmp_path / "dagfile.dag").write_text(text)
+
+    with pytest.raises(dags.exceptions.CannotReadDAGFile):
+        dags.read_dag(tmp_path / "dagfile.dag")
@@ -0,0 +1,146 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from htcondor import dags
+
+
+@pytest.fixture(scope="function")
+def small(dag):
+    a = dag.layer(name="a", vars=[{}] * 3, runtime=2)
+    b = a.child_layer(name="b", vars=[{}] * 2, runtime=3)
+    b.child_layer(name="c", vars=[{}] * 2, edge=dags.OneToOne(), runtime={0: 1, 1: 5})
+    return dag
+
+
+def test_unlimited_slots(small):
+    result = dags.simulate(small)
+
+    assert result.makespan == 10
+    assert result.peak_running == 3
+    assert result.num_jobs == 7
+    assert result.num_joins == 1
+    assert result.num_attempts == 7
+
+
+def test_one_slot_runs_everything_in_sequence(small):
+    result = dags.simulate(small, slots=1)
+
+    assert result.makespan == 18
+    assert result.peak_running == 1
+    assert result.peak_queued == 3
+
+
+def test_layer_times(small):
+    result = dags.simulate(small)
+    a, b, c = (small._nodes[name] for name in "abc")
+
+    assert result.layer_start == {a: 0, b: 2, c: 5}
+    assert result.layer_finish == {a: 2, b: 5, c: 10}
+
+
+def test_runtimes_override_node_runtime(small):
+    result = dags.simulate(small, runtimes={"a": 10, "c": lambda rng: 1})
+
+    assert result.makespan == 14
+
+
+def test_max_jobs_limits_queue(small):
+    result = dags.simulate(small, max_jobs=2)
+
+    assert result.peak_queued == 2
+    assert result.makespan == 12
+
+
+def test_category_throttle(dag):
+    dag.layer(name="a", vars=[{}] * 4, runtime=1, category="slow")
+    dag.layer(name="b", vars=[{}] * 4, runtime=1)
+    dag.max_jobs_per_category["slow"] = 2
+
+    result = dags.simulate(dag)
+
+    assert result.makespan == 2
+    assert result.peak_running == 6
+
+
+def test_category_limits_can_be_overridden(dag):
+    dag.layer(name="a", vars=[{}] * 4, runtime=1, category="slow")
+    dag.max_jobs_per_category["slow"] = 2
+
+    assert dags.simulate(dag, max_jobs_by_category={}).makespan == 1
+    assert dags.simulate(dag, max_jobs_by_category={"slow": 1}).makespan == 4
+
+
+def test_priorities_decide_what_runs_first(dag):
+    dag.layer(name="low", runtime=1)
+    high = dag.layer(name="high", runtime=1, priority=10)
+    high.child_layer(name="after", runtime=1)
+
+    assert dags.simulate(dag, slots=1).layer_finish[high] == 1
+    assert dags.simulate(dag, slots=1, use_priorities=False).layer_finish[high] == 2
+
+
+def test_noop_and_done_nodes_do_not_run(dag):
+    a = dag.layer(name="a", vars=[{}] * 2, runtime=5, done={0: True, 1: True})
+    a.child_layer(name="b", vars=[{}] * 2, runtime=1, noop={1: True})
+
+    result = dags.simulate(dag)
+
+    assert result.makespan == 1
+    assert result.num_attempts == 1
+
+
+def test_failure_without_retries_blocks_descendants(dag):
+    a = dag.layer(name="a", runtime=1)
+    a.child_layer(name="b", vars=[{}] * 3, runtime=1)
+
+    result = dags.simulate(dag, failure_rates={"a": 1})
+
+    assert result.num_failed == 1
+    assert result.num_unrun == 3
+    assert result.makespan == 1
+
+
+def test_retries(dag):
+    dag.layer(name="a", runtime=1, retries=2)
+
+    result = dags.simulate(dag, failure_rates={"a": 1})
+
+    assert result.num_attempts == 3
+    assert result.num_failed == 1
+    assert result.makespan == 3
+
+
+def test_seed_makes_runs_repeatable(small):
+    runtimes = {"a": lambda rng: rng.expovariate(1)}
+
+    first = dags.simulate(small, runtimes=runtimes, seed=42)
+    second = dags.simulate(small, runtimes=runtimes, seed=42)
+
+    assert first.makespan == second.makespan
+
+
+def test_final_node_runs_last(small):
+    small.final(name="final", runtime=4)
+
+    assert dags.simulate(small).makespan == 14
+
+
+def test_empty_dag(dag):
+    result = dags.simulate(dag)
+
+    assert result.makespan == 0
+    assert result.num_jobs == 0
@@ -0,0 +1,67 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+import htcondor
+
+from htcondor import dags
+from htcondor.dags import utils
+
+
+def test_bindings_is_the_htcondor_module():
+    assert utils.bindings() is htcondor
+
+
+@pytest.mark.parametrize(
+    "obj, expected",
+    [
+        (htcondor.Submit({}), True),
+        (htcondor.Submit({"executable": "foo"}), True),
+        (None, False),
+        ("executable = foo", False),
+        (dags.DAG(), False),
+    ],
+)
+def test_is_submit(obj, expected):
+    assert utils.is_submit(obj) is expected
+
+
+def test_bindings_version_info_matches_bindings_version():
+    info = utils.bindings_version_info()
+
+    assert ".".join(str(v) for v in info[:3]) in htcondor.version()
+
+
+def test_bindings_version_info_is_cached():
+    assert utils.bindings_version_info() is utils.bindings_version_info()
+
+
+def test_importing_dags_does_not_parse_bindings_version():
+    env = dict(os.environ)
+    env.setdefault("CONDOR_CONFIG", "/dev/null")
+    code = (
+        "from htcondor.dags import utils; print(utils.bindings_version_info.cache_info().currsize)"
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-c", code], env=env, check=True, stdout=subprocess.PIPE
+    )
+
+    assert result.stdout.strip() == b"0"
@@ -0,0 +1,28 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from .conftest import s, dagfile_lines
+
+
+def test_assigned_priorities_are_written(dag, writer):
+    a = dag.layer(name="a", vars=[{}, {}], runtime=2)
+    a.child_layer(name="b", runtime=1)
+
+    dag.assign_priorities()
+
+    lines = dagfile_lines(writer)
+    assert f"PRIORITY a{s}0 1" in lines
+    assert f"PRIORITY a{s}1 1" in lines
+    assert not any(line.startswith(f"PRIORITY b{s}") for line in lines)
@@ -73,3 +73,55 @@ def test_incompatible_grouper_edges(
 
     with pytest.raises(dags.exceptions.IncompatibleGrouper):
         dagfile_lines(writer)
+
+
+def test_grouper_edge_skips_join_for_single_node_chunks(dag, writer):
+    parent = dag.layer(name="parent", vars=[{}] * 6)
+    child = parent.child_layer(name="child", vars=[{}] * 2, edge=dags.Grouper(3, 1))
+
+    lines = dagfile_lines(writer)
+
+    assert f"PARENT parent{s}0 parent{s}1 parent{s}2 CHILD child{s}0" in lines
+    assert f"PARENT parent{s}3 parent{s}4 parent{s}5 CHILD child{s}1" in lines
+    assert not any("__JOIN__" in line for line in lines)
+
+
+def test_ragged_grouper_edge_produces_correct_dagfile_lines(dag, writer):
+    parent = dag.layer(name="parent", vars=[{}] * 5)
+    child = parent.child_layer(name="child", vars=[{}] * 3, edge=dags.Grouper(3, 2, ragged=True))
+
+    lines = dagfile_lines(writer)
+
+    assert f"PARENT parent{s}0 parent{s}1 parent{s}2 CHILD __JOIN__{s}0" in lines
+    assert f"PARENT __JOIN__{s}0 CHILD child{s}0 child{s}1" in lines
+    assert f"PARENT parent{s}3 parent{s}4 CHILD child{s}2" in lines
+
+
+def test_grouper_edge_with_explicit_boundaries(dag, writer):
+    parent = dag.layer(name="parent", vars=[{}] * 4)
+    child = parent.child_layer(
+        name="child", vars=[{}] * 3, edge=dags.Grouper(parent_boundaries=[1], child_boundaries=[2]),
+    )
+
+    lines = dagfile_lines(writer)
+
+    assert f"PARENT parent{s}0 CHILD child{s}0 child{s}1" in lines
+    assert f"PARENT parent{s}1 parent{s}2 parent{s}3 CHILD child{s}2" in lines
+
+
+@pytest.mark.parametrize(
+    "num_parent_vars, num_child_vars, edge",
+    [
+        (5, 1, dags.Grouper(3, 1, ragged=True)),
+        (4, 2, dags.Grouper(parent_boundaries=[2, 2])),
+        (4, 2, dags.Grouper(parent_boundaries=[4])),
+        (4, 2, dags.Grouper(parent_boundaries=[0, 2])),
+        (4, 3, dags.Grouper(parent_boundaries=[2], child_boundaries=[1, 2])),
+    ],
+)
+def test_incompatible_ragged_grouper_edges(num_parent_vars, num_child_vars, edge, dag, writer):
+    parent = dag.layer(name="parent", vars=[{}] * num_parent_vars)
+    child = parent.child_layer(name="child", vars=[{}] * num_child_vars, edge=edge)
+
+    with pytest.raises(dags.exceptions.IncompatibleGrouper):
+        dagfile_lines(writer)
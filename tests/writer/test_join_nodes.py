@@ -0,0 +1,53 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+import pickle
+
+from htcondor import dags
+
+from .conftest import s, dagfile_lines
+
+
+def test_join_factory_hands_out_sequential_ids():
+    factory = dags.JoinFactory()
+
+    joins = [factory.get_join_node() for _ in range(3)]
+
+    assert joins == [0, 1, 2]
+    assert [j.id for j in joins] == [0, 1, 2]
+    assert all(isinstance(j, dags.JoinNode) for j in joins)
+    assert factory.count == 3
+
+
+def test_join_node_pickles_as_join_node():
+    join = pickle.loads(pickle.dumps(dags.JoinNode(7)))
+
+    assert isinstance(join, dags.JoinNode)
+    assert join.id == 7
+
+
+def test_join_node_job_lines_come_from_count(dag, writer):
+    a = dag.layer(name="a", vars=[{}] * 2)
+    b = a.child_layer(name="b", vars=[{}] * 2)
+    b.child_layer(name="c", vars=[{}] * 2)
+
+    lines = dagfile_lines(writer)
+
+    assert writer.join_factory.count == 2
+    assert f"JOB __JOIN__{s}0 __JOIN__.sub NOOP" in lines
+    assert f"JOB __JOIN__{s}1 __JOIN__.sub NOOP" in lines
+    assert not any(f"__JOIN__{s}2" in line for line in lines)
@@ -0,0 +1,115 @@
+# Copyright 2020 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+import array
+
+from htcondor import dags
+
+from .conftest import s, dagfile_lines
+
+
+def test_sparse_edge_produces_correct_dagfile_lines(dag, writer):
+    parent = dag.layer(name="parent", vars=[{}] * 3)
+    child = parent.child_layer(
+        name="child",
+        vars=[{}] * 3,
+        edge=dags.SparseEdge(parents=[2, 0, 1, 0], children=[0, 0, 2, 2]),
+    )
+
+    lines = dagfile_lines(writer)
+
+    assert f"PARENT parent{s}2 parent{s}0 CHILD child{s}0" in lines
+    assert f"PARENT parent{s}1 parent{s}0 CHILD child{s}2" in lines
+    assert not any(f"child{s}1" in line for line in lines if line.startswith("PARENT"))
+
+
+def test_sparse_edge_merges_consecutive_children_with_same_parents(dag, writer):
+    parent = dag.layer(name="parent", vars=[{}] * 2)
+    child = parent.child_layer(
+        name="child",
+        vars=[{}] * 3,
+        edge=dags.SparseEdge(parents=[0, 1, 0, 1, 1], children=[0, 0, 1, 1, 2]),
+    )
+
+    lines = dagfile_lines(writer)
+
+    assert f"PARENT parent{s}0 parent{s}1 CHILD child{s}0 child{s}1" in lines
+    assert f"PARENT parent{s}1 CHILD child{s}2" in lines
+
+
+@pytest.mark.parametrize(
+    "edge",
+    [
+        dags.SparseEdge(parents=[1, 0, 1, 1], children=[0, 0, 0, 1]),
+        dags.SparseEdge(parents=[1, 1, 1, 0], children=[1, 0, 0, 0]),
+        dags.SparseEdge.from_csr(offsets=[0, 3, 4], parents=[1, 0, 1, 1]),
+    ],
+)
+def test_sparse_edge_ignores_duplicate_edges(dag, writer, edge):
+    parent = dag.layer(name="parent", vars=[{}] * 2)
+    parent.child_layer(name="child", vars=[{}] * 2, edge=edge)
+
+    lines = dagfile_lines(writer)
+
+    assert f"PARENT parent{s}1 parent{s}0 CHILD child{s}0" in lines
+    assert f"PARENT parent{s}1 CHILD child{s}1" in lines
+
+
+def test_sparse_edge_from_csr(dag, writer):
+    parent = dag.layer(name="parent", vars=[{}] * 3)
+    child = parent.child_layer(
+        name="child",
+        vars=[{}] * 3,
+        edge=dags.SparseEdge.from_csr(offsets=[0, 1, 1, 3], parents=[2, 0, 1]),
+    )
+
+    lines = dagfile_lines(writer)
+
+    assert f"PARENT parent{s}2 CHILD child{s}0" in lines
+    assert f"PARENT parent{s}0 parent{s}1 CHILD child{s}2" in lines
+
+
+def test_sparse_edge_does_not_copy_arrays():
+    parents = array.array("i", [0, 1])
+    children = array.array("i", [1, 0])
+
+    edge = dags.SparseEdge(parents, children)
+    parents[0] = 1
+
+    assert edge.parents[0] == 1
+
+
+@pytest.mark.parametrize(
+    "edge",
+    [
+        dags.SparseEdge(parents=[0], children=[3]),
+        dags.SparseEdge(parents=[3], children=[0]),
+        dags.SparseEdge(parents=[0, 0], children=[1, -1]),
+        dags.SparseEdge.from_csr(offsets=[0, 0, 0, 0, 1], parents=[0]),
+    ],
+)
+def test_sparse_edge_out_of_range_indices(dag, writer, edge):
+    parent = dag.layer(name="parent", vars=[{}] * 3)
+    child = parent.child_layer(name="child", vars=[{}] * 3, edge=edge)
+
+    with pytest.raises(dags.exceptions.IncompatibleSparseEdge):
+        dagfile_lines(writer)
+
+
+def test_sparse_edge_needs_same_length_arrays():
+    with pytest.raises(dags.exceptions.IncompatibleSparseEdge):
+        dags.SparseEdge(parents=[0, 1], children=[0])
@@ -0,0 +1,142 @@
+# Copyright 2020 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from htcondor import dags
+
+from .conftest import s, dagfile_lines
+
+
+def expand(edge, parent, child):
+    """Resolve join nodes to get the real (parent index, child index) pairs."""
+    into_join = {}
+    pairs = set()
+    specs = list(edge.get_edges(parent, child, dags.JoinFactory()))
+    for p, c in specs:
+        if isinstance(c, dags.JoinNode):
+            into_join[c.id] = p
+    for p, c in specs:
+        if isinstance(c, dags.JoinNode):
+            continue
+        parents = into_join[p.id] if isinstance(p, dags.JoinNode) else p
+        pairs.update((i, j) for i in parents for j in c)
+    return pairs
+
+
+def test_window_edge_produces_correct_dagfile_lines(dag, writer):
+    parent = dag.layer(name="parent", vars=[{}] * 3)
+    child = parent.child_layer(name="child", vars=[{}] * 3, edge=dags.Window(1, 1, compress=False))
+
+    lines = dagfile_lines(writer)
+
+    assert f"PARENT parent{s}0 parent{s}1 CHILD child{s}0" in lines
+    assert f"PARENT parent{s}0 parent{s}1 parent{s}2 CHILD child{s}1" in lines
+    assert f"PARENT parent{s}1 parent{s}2 CHILD child{s}2" in lines
+
+
+@pytest.mark.parametrize("compress", [True, False])
+@pytest.mark.parametrize(
+    "num_parent_vars, num_child_vars, before, after",
+    [
+        (10, 10, 1, 1),
+        (50, 50, 5, 5),
+        (50, 50, 10, 0),
+        (50, 50, 0, 10),
+        (7, 12, 3, 2),
+        (12, 7, 3, 2),
+        (1, 1, 4, 4),
+        (5, 5, 0, 0),
+    ],
+)
+def test_window_edge_connects_exactly_the_windows(
+    dag, num_parent_vars, num_child_vars, before, after, compress
+):
+    parent = dag.layer(name="parent", vars=[{}] * num_parent_vars)
+    child = dag.layer(name="child", vars=[{}] * num_child_vars)
+    edge = dags.Window(before, after, compress=compress)
+
+    expected = {
+        (p, c)
+        for c in range(num_child_vars)
+        for p in range(c - before, c + after + 1)
+        if 0 <= p < num_parent_vars
+    }
+
+    assert expand(edge, parent, child) == expected
+
+
+def test_window_edge_compression_uses_joins_and_fewer_names(dag):
+    parent = dag.layer(name="parent", vars=[{}] * 100)
+    child = dag.layer(name="child", vars=[{}] * 100)
+
+    def num_names(edge):
+        factory = dags.JoinFactory()
+        total = 0
+        for p, c in edge.get_edges(parent, child, factory):
+            total += 1 if isinstance(p, dags.JoinNode) else len(p)
+            total += 1 if isinstance(c, dags.JoinNode) else len(c)
+        return total, factory.count
+
+    compressed, compressed_joins = num_names(dags.Window(10, 10))
+    uncompressed, uncompressed_joins = num_names(dags.Window(10, 10, compress=False))
+
+    assert compressed_joins > 0
+    assert uncompressed_joins == 0
+    assert compressed < uncompressed / 2
+
+
+@pytest.mark.parametrize("num_vars", [1, 10, 100, 1000])
+@pytest.mark.parametrize(
+    "before, after", [(1, 1), (2, 2), (5, 5), (10, 0), (0, 10), (10, 10), (50, 50)]
+)
+def test_compressed_window_edge_is_never_larger_than_uncompressed(
+    tmp_path, num_vars, before, after
+):
+    def write(compress):
+        dag = dags.DAG()
+        parent = dag.layer(name="parent", vars=[{}] * num_vars)
+        parent.child_layer(
+            name="child", vars=[{}] * num_vars, edge=dags.Window(before, after, compress=compress)
+        )
+        return dags.write_dag(dag, tmp_path / str(compress)).stat().st_size
+
+    assert write(True) <= write(False)
+
+
+def test_narrow_window_edge_does_not_use_joins(dag):
+    parent = dag.layer(name="parent", vars=[{}] * 100)
+    child = dag.layer(name="child", vars=[{}] * 100)
+
+    factory = dags.JoinFactory()
+    list(dags.Window(2, 2).get_edges(parent, child, factory))
+
+    assert factory.count == 0
+
+
+def test_window_edge_joins_identical_clipped_windows(dag):
+    parent = dag.layer(name="parent", vars=[{}] * 3)
+    child = dag.layer(name="child", vars=[{}] * 30)
+
+    factory = dags.JoinFactory()
+    specs = list(dags.Window(40, 40).get_edges(parent, child, factory))
+
+    assert factory.count > 0
+    assert len(specs) < 30
+
+
+def test_window_edge_rejects_negative_sizes():
+    with pytest.raises(ValueError):
+        dags.Window(-1, 1)
@@ -0,0 +1,99 @@
+# Copyright 2019 HTCondor Team, Computer Sciences Department,
+# University of Wisconsin-Madison, WI.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from htcondor import dags
+from htcondor.dags.writer import DAGWriter, WriterStats
+
+from .conftest import dagfile_lines
+
+
+@pytest.fixture(scope="function")
+def stats():
+    return WriterStats()
+
+
+def test_writer_stats_counts(dag, dag_dir, stats):
+    a = dag.layer(name="a", vars=[{"x": "1"}, {"x": "2"}])
+    a.child_layer(name="b", vars=[{}] * 3)
+
+    dag_file = DAGWriter(dag, stats=stats).write(dag_dir)
+    lines = dag_file.read_text().splitlines()
+
+    assert stats.counts["lines"] == len(lines)
+    assert stats.counts["bytes"] == dag_file.stat().st_size
+    assert stats.counts["join_nodes"] == 1
+    # 2 + 3 node names, plus a join node name for each of its 3 uses
+    assert stats.counts["formatter_calls"] >= 5 + 3
+
+
+def test_writer_stats_counts_bytes_of_non_ascii_text(dag, dag_dir, stats):
+    dag.layer(name="a", vars=[{"x": "caf\u00e9 \u2615"}])
+
+    dag_file = DAGWriter(dag, stats=stats).write(dag_dir)
+
+    assert stats.counts["bytes"] == dag_file.stat().st_size
+    assert stats.counts["bytes"] > len(dag_file.read_text())
+
+
+def test_writer_stats_do_not_include_validation(dag, dag_dir):
+    a = dag.layer(name="a", vars=[{}] * 3)
+    a.child_layer(name="b", vars=[{}] * 3, edge=dags.OneToOne())
+
+    without_validation = WriterStats()
+    DAGWriter(dag, stats=without_validation).write(dag_dir)
+    with_validation = WriterStats()
+    DAGWriter(dag, stats=with_validation).write(dag_dir, validate=True)
+
+    assert with_validation.counts["formatter_calls"] == without_validation.counts["formatter_calls"]
+
+
+def test_writer_stats_times(dag, dag_dir, stats):
+    a = dag.layer(name="a", vars=[{"x": "1"}, {"x": "2"}])
+    a.child_layer(name="b", vars=[{}] * 3)
+
+    dags.write_dag(dag, dag_dir, stats=stats)
+
+    for phase in ("walk", "nodes", "vars", "names", "edges", "joins", "io", "total"):
+        assert stats.times[phase] > 0, phase
+    assert set(stats.layer_times) == {"a", "b"}
+    assert stats.times["total"] >= stats.times["nodes"] + stats.times["edges"]
+
+
+def test_writer_stats_do_not_change_output(dag, stats):
+    a = dag.layer(name="a", vars=[{"x": 'a "quoted" value'}, {"x": "2"}])
+    a.child_layer(name="b", vars=[{}] * 3)
+
+    assert dagfile_lines(DAGWriter(dag, stats=stats)) == dagfile_lines(DAGWriter(dag))
+
+
+def test_writer_stats_can_be_subclassed(dag, dag_dir):
+    class Recorder(WriterStats):
+        def __init__(self):
+            super().__init__()
+            self.events = []
+
+        def add_time(self, phase, seconds, layer=None):
+            super().add_time(phase, seconds, layer)
+            self.events.append((phase, layer))
+
+    dag.layer(name="a")
+    recorder = Recorder()
+
+    dags.write_dag(dag, dag_dir, stats=recorder)
+
+    assert ("nodes", "a") in recorder.events
+    assert recorder.as_dict()["times"]["total"] > 0